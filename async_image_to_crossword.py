@@ -0,0 +1,186 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor
+
+import numpy as np
+
+from clue_preprocessing import CluePreprocessor
+from image_to_crossword import CrosswordImageProcessor
+from instrumentation import Instrumentation
+from ocr_backends import OcrError, TesseractSubprocessBackend, encode_image
+
+
+class AsyncCrosswordImageProcessor:
+    """
+    Digitises puzzles from images without blocking the event loop. Tesseract runs in asyncio subprocesses,
+    and the OpenCV work runs on an executor, so one process can keep many puzzles in flight.
+    Cancelling a puzzle (or letting it time out) kills the Tesseract processes reading it.
+    """
+
+    def __init__(self, tesseract_path: str = 'tesseract', max_ocr_processes: int = None, max_puzzles: int = None,
+                 executor: Executor = None, clue_preprocessor: CluePreprocessor = None,
+                 instrumentation: Instrumentation = None):
+        """
+        :param tesseract_path: path to the Tesseract executable
+        :param max_ocr_processes: most Tesseract processes running at once (defaults to the number of CPUs)
+        :param max_puzzles: most puzzles processed at once, with the rest waiting their turn (defaults to no limit)
+        :param executor: executor for the OpenCV work (defaults to the event loop's default executor)
+        :param clue_preprocessor: preprocessing applied to the clue images before OCR (defaults to every step)
+        :param instrumentation: receives the time taken by each stage and counts of what was read
+        """
+
+        self._tesseract_path = tesseract_path
+        self._tesseract = TesseractSubprocessBackend(tesseract_path)
+        self._max_ocr_processes = max_ocr_processes or os.cpu_count() or 1
+        self._max_puzzles = max_puzzles
+        self._executor = executor
+        self._clue_preprocessor = clue_preprocessor if clue_preprocessor is not None else CluePreprocessor()
+        self._instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+
+        # Created on first use, inside the event loop
+        self._ocr_slots = None
+        self._puzzle_slots = None
+
+    async def crossword_from_images(self, grid_img, across_clues_img, down_clues_img, rows: int = None,
+                                    cols: int = None, cell_size: int = 10, white_threshold: float = 0.5,
+                                    timeout: float = None):
+        """
+        Digitises a puzzle, like CrosswordImageProcessor.crossword_from_images()
+        :param grid_img: image of the grid, either from cv2.imread() or the bytes of an image file
+        :param across_clues_img: image of the across clues, either from cv2.imread() or the bytes of an image file
+        :param down_clues_img: image of the down clues, either from cv2.imread() or the bytes of an image file
+        :param rows: number of rows in the grid (inferred from the grid image if not given)
+        :param cols: number of columns in the grid (inferred from the grid image if not given)
+        :param cell_size: side length in pixels that each cell is resized to before classification
+        :param white_threshold: fraction of white pixels above which a cell is treated as white
+        :param timeout: seconds the puzzle may take once started, after which asyncio.TimeoutError is raised
+        :return: the verified CrosswordPuzzle
+        """
+
+        if self._puzzle_slots is None and self._max_puzzles is not None:
+            self._puzzle_slots = asyncio.Semaphore(self._max_puzzles)
+
+        puzzle = self.__crossword_from_images(grid_img, across_clues_img, down_clues_img, rows, cols,
+                                              cell_size, white_threshold)
+
+        if self._puzzle_slots is None:
+            return await asyncio.wait_for(puzzle, timeout)
+
+        async with self._puzzle_slots:
+            return await asyncio.wait_for(puzzle, timeout)
+
+    async def clues_from_image(self, img, is_across: bool):
+        """
+        Reads a column of clues, like CrosswordImageProcessor.clues_from_image()
+        :param img: image of the clues, either from cv2.imread() or the bytes of an image file
+        :param is_across: True if the clues are from the across column, False otherwise
+        :return: list of (clue number, clue text, answer length) tuples
+        """
+
+        img = await self.__decode(img)
+        reader = CrosswordImageProcessor.clue_reader(img, is_across, self._clue_preprocessor, self._instrumentation)
+
+        # The reader does its preprocessing and parsing between OCR requests, so run each step on the executor
+        done, value = await self.__run(_advance, reader, None)
+
+        while not done:
+            ocr_img, psm = value
+            done, value = await self.__run(_advance, reader, await self.image_to_data(ocr_img, psm=psm))
+
+        return value
+
+    async def image_to_data(self, img, lang: str = 'eng', psm: int = 6):
+        """
+        Reads an image with a Tesseract subprocess, like OcrBackend.image_to_data()
+        :param img: image object from cv2.imread()
+        :param lang: language of the text
+        :param psm: Tesseract page segmentation mode
+        :return: Tesseract's TSV output
+        """
+
+        if self._ocr_slots is None:
+            self._ocr_slots = asyncio.Semaphore(self._max_ocr_processes)
+
+        data = await self.__run(encode_image, img)
+
+        async with self._ocr_slots:
+
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *self._tesseract.build_command(lang, psm, 'tsv'),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                raise OcrError(f"Tesseract executable not found at {self._tesseract_path}")
+
+            try:
+                stdout, stderr = await process.communicate(data)
+            except asyncio.CancelledError:
+                # Don't leave Tesseract running for a puzzle nobody is waiting for
+                process.kill()
+                await process.wait()
+                raise
+
+        if process.returncode != 0:
+            raise OcrError(f"Tesseract failed with exit code {process.returncode}: "
+                           f"{stderr.decode(errors='replace').strip()}")
+
+        return stdout.decode()
+
+    async def __crossword_from_images(self, grid_img, across_clues_img, down_clues_img, rows: int, cols: int,
+                                      cell_size: int, white_threshold: float):
+        """
+        Digitises a puzzle once it has been given a slot
+        """
+
+        grid_img = await self.__decode(grid_img)
+
+        tasks = [
+            asyncio.ensure_future(self.__run(CrosswordImageProcessor.grid_from_image, grid_img, rows, cols,
+                                             cell_size, white_threshold, self._instrumentation)),
+            asyncio.ensure_future(self.clues_from_image(across_clues_img, True)),
+            asyncio.ensure_future(self.clues_from_image(down_clues_img, False))
+        ]
+
+        try:
+            grid_cells, across_clues, down_clues = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop reading the other images if one fails or the puzzle is cancelled
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return await self.__run(CrosswordImageProcessor.assemble_puzzle, grid_cells, across_clues, down_clues,
+                                self._instrumentation)
+
+    async def __decode(self, img):
+        """
+        Decodes an image given as the bytes of an image file, passing decoded images through
+        """
+
+        if isinstance(img, np.ndarray):
+            return img
+
+        return await self.__run(CrosswordImageProcessor.read_image, img, self._instrumentation)
+
+    def __run(self, function, *args):
+        """
+        Runs a function on the executor
+        :return: awaitable of its result
+        """
+        return asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(function, *args))
+
+
+def _advance(reader, value):
+    """
+    Sends a value into a generator, returning whether it finished and either what it yielded or what it returned.
+    StopIteration can't be passed through an asyncio future, so it's turned into a result here
+    """
+
+    try:
+        return False, reader.send(value)
+    except StopIteration as stop:
+        return True, stop.value
@@ -0,0 +1,280 @@
+#!/usr/bin/python
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from image_to_crossword import CrosswordImageProcessor
+from instrumentation import Instrumentation
+
+# Where a worker process reports the puzzle it's starting and its process ID, set when each worker starts
+_worker_started = None
+
+
+class CrosswordBatchProcessor:
+
+    # Images are grouped into puzzles by their prefix, e.g. 8_grid.png, 8_clues_across.png, 8_clues_down.png
+    IMAGE_NAME_PATTERN = re.compile(r'^(.+)_(grid|clues_across|clues_down)\.(png|jpe?g|bmp|tiff?)$', re.IGNORECASE)
+
+    @staticmethod
+    def find_puzzles(directory: str):
+        """
+        Finds the puzzles in a directory by the naming convention N_grid, N_clues_across and N_clues_down.
+        Puzzles that are missing any of the three images are ignored.
+        :param directory: path to the directory containing the images
+        :return: map of puzzle names to a map of image types ("grid", "clues_across", "clues_down") to paths
+        """
+
+        puzzles = {}
+
+        for file_name in os.listdir(directory):
+            match = CrosswordBatchProcessor.IMAGE_NAME_PATTERN.match(file_name)
+            if match:
+                puzzle_name, image_type = match.group(1), match.group(2).lower()
+                puzzles.setdefault(puzzle_name, {})[image_type] = os.path.join(directory, file_name)
+
+        # Order the puzzles numerically where possible (so 10 comes after 9)
+        complete_puzzles = [name for name, images in puzzles.items() if len(images) == 3]
+        complete_puzzles.sort(key=lambda name: (0, int(name), name) if name.isdigit() else (1, 0, name))
+
+        return {name: puzzles[name] for name in complete_puzzles}
+
+    @staticmethod
+    def crosswords_from_directory(tesseract_path, directory: str, rows: int = None, cols: int = None,
+                                  dimensions: dict = None, max_workers: int = None, timeout: float = None,
+                                  **options):
+        """
+        Digitises every puzzle in a directory on a pool of processes, yielding a result for each
+        puzzle as soon as it is finished. A puzzle that fails, hangs or crashes its worker produces
+        an error result rather than stopping the run.
+        :param tesseract_path: path to the Tesseract executable
+        :param directory: path to the directory containing the images
+        :param rows: number of rows in the grids (inferred from each grid image if not given)
+        :param cols: number of columns in the grids (inferred from each grid image if not given)
+        :param dimensions: optional map of puzzle names to (rows, cols), overriding rows and cols
+        :param max_workers: number of worker processes (defaults to the number of CPUs)
+        :param timeout: seconds a puzzle may take before its worker is stopped (no limit if not given)
+        :param options: further keyword arguments passed to CrosswordImageProcessor.crossword_from_images()
+        :return: generator of result dictionaries, in the order the puzzles finish
+        """
+
+        puzzles = CrosswordBatchProcessor.find_puzzles(directory)
+        dimensions = dimensions or {}
+
+        jobs = {puzzle_name: (tesseract_path, puzzle_name, images, *dimensions.get(puzzle_name, (rows, cols)), options)
+                for puzzle_name, images in puzzles.items()}
+
+        return CrosswordBatchProcessor.run_isolated(_process_puzzle, jobs, max_workers, timeout)
+
+    @staticmethod
+    def run_isolated(function, jobs: dict, max_workers: int = None, timeout: float = None):
+        """
+        Runs a function for each puzzle on a pool of processes, keeping one puzzle from affecting the others.
+        A puzzle that runs longer than the timeout has its worker stopped. A worker dying breaks the whole
+        pool, so the puzzles that hadn't started are sent to a new one, and those that were running are run
+        again one at a time, so that one still killing its worker is known to be the cause.
+        :param function: module-level function taking a job's arguments and returning a result dictionary
+        :param jobs: map of puzzle names to the arguments of the function
+        :param max_workers: number of worker processes (defaults to the number of CPUs)
+        :param timeout: seconds a puzzle may take (no limit if not given)
+        :return: generator of result dictionaries, in the order the puzzles finish
+        """
+
+        max_workers = max_workers or os.cpu_count() or 1
+        context = multiprocessing.get_context()
+        started_queue = context.SimpleQueue()
+
+        waiting = deque(jobs)
+        # Puzzles running when a worker died, each run again on its own
+        suspects = deque()
+
+        while waiting or suspects:
+
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker,
+                                       initargs=(started_queue,))
+
+            # Puzzles in flight, and the process running each one and when it started
+            in_flight = {}
+            started = {}
+            isolated = None
+            timed_out = set()
+            broken = False
+
+            try:
+                while (waiting or suspects or in_flight) and not broken:
+
+                    # Each puzzle in flight has a worker, so it starts as soon as it's submitted
+                    if suspects and not in_flight:
+                        isolated = suspects.popleft()
+                        in_flight[pool.submit(function, *jobs[isolated])] = isolated
+                    while waiting and isolated is None and len(in_flight) < max_workers:
+                        puzzle_name = waiting.popleft()
+                        in_flight[pool.submit(function, *jobs[puzzle_name])] = puzzle_name
+
+                    done, _ = wait(in_flight, timeout=None if timeout is None else 0.1, return_when=FIRST_COMPLETED)
+
+                    while not started_queue.empty():
+                        puzzle_name, pid = started_queue.get()
+                        started[puzzle_name] = pid, time.monotonic()
+
+                    for future in done:
+                        puzzle_name = in_flight[future]
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            # Left in flight, so it's sorted out with the others that failed with the pool
+                            broken = True
+                            continue
+                        except Exception as e:
+                            result = _error_result(puzzle_name, e)
+                        del in_flight[future]
+                        started.pop(puzzle_name, None)
+                        if isolated == puzzle_name:
+                            isolated = None
+                        yield result
+
+                    # Stopping a worker breaks the pool, which is handled like a crash once it's noticed
+                    for puzzle_name, (pid, start) in list(started.items()):
+                        if timeout is not None and puzzle_name not in timed_out and time.monotonic() - start > timeout:
+                            timed_out.add(puzzle_name)
+                            _kill(pid)
+
+                if broken:
+                    # Every puzzle in flight failed along with the pool
+                    not_started = []
+                    for future, puzzle_name in in_flight.items():
+                        if puzzle_name in timed_out:
+                            yield _error_result(puzzle_name, TimeoutError(f"Took longer than {timeout} seconds"))
+                        elif puzzle_name == isolated:
+                            yield _error_result(puzzle_name, future.exception())
+                        elif puzzle_name in started:
+                            suspects.append(puzzle_name)
+                        else:
+                            not_started.append(puzzle_name)
+                    waiting.extendleft(reversed(not_started))
+            finally:
+                pool.shutdown(wait=not broken, cancel_futures=True)
+
+    @staticmethod
+    def write_jsonl(results, output):
+        """
+        Writes results to a file as JSON Lines, flushing after every result
+        :param results: iterable of result dictionaries
+        :param output: writable file-like object
+        :return: the number of puzzles that failed
+        """
+
+        failures = 0
+
+        for result in results:
+            if result["status"] != "ok":
+                failures += 1
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+        return failures
+
+
+def _init_worker(started_queue):
+    global _worker_started
+    _worker_started = started_queue
+
+
+def _report_start(puzzle_name: str):
+    """
+    Tells CrosswordBatchProcessor.run_isolated() that this worker process has started a puzzle
+    """
+    if _worker_started is not None:
+        _worker_started.put((puzzle_name, os.getpid()))
+
+
+def _kill(pid: int):
+    try:
+        os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+    except OSError:
+        # The worker has already finished
+        pass
+
+
+def _process_puzzle(tesseract_path, puzzle_name: str, images: dict, rows: int, cols: int, options: dict):
+    """
+    Digitises a single puzzle inside a worker process
+    :return: a result dictionary, containing either the crossword or the error that occurred
+    """
+
+    _report_start(puzzle_name)
+
+    try:
+
+        grid_img = CrosswordImageProcessor.read_image(images["grid"])
+        across_img = CrosswordImageProcessor.read_image(images["clues_across"])
+        down_img = CrosswordImageProcessor.read_image(images["clues_down"])
+
+        # Keep progress messages away from stdout, which may be carrying the results
+        with contextlib.redirect_stdout(sys.stderr):
+            crossword_puzzle = CrosswordImageProcessor.crossword_from_images(
+                tesseract_path=tesseract_path,
+                grid_img=grid_img,
+                across_clues_img=across_img,
+                down_clues_img=down_img,
+                rows=rows,
+                cols=cols,
+                **options
+            )
+
+        return {"puzzle": puzzle_name, "status": "ok", "crossword": crossword_puzzle.to_dict()}
+
+    except Exception as e:
+        return _error_result(puzzle_name, e)
+
+
+def _error_result(puzzle_name: str, error: Exception):
+    return {"puzzle": puzzle_name, "status": "error", "error": {"type": type(error).__name__, "message": str(error)}}
+
+
+def main(argv):
+
+    parser = argparse.ArgumentParser(description="Digitise every puzzle in a directory, writing JSON Lines results")
+    parser.add_argument("directory", help="directory containing N_grid, N_clues_across and N_clues_down images")
+    parser.add_argument("--tesseract", default="tesseract", help="path to the Tesseract executable")
+    parser.add_argument("--rows", type=int, default=None, help="number of rows in the grids (inferred if not given)")
+    parser.add_argument("--cols", type=int, default=None, help="number of columns in the grids (inferred if not given)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds each puzzle may take")
+    parser.add_argument("--ocr-cache", default=None, metavar="DIR",
+                        help="directory to cache OCR results in, so images already read aren't read again")
+    parser.add_argument("--output", default=None, help="file to write the results to (defaults to stdout)")
+    parser.add_argument("--quiet", action="store_true", help="don't print progress messages")
+    args = parser.parse_args(argv)
+
+    results = CrosswordBatchProcessor.crosswords_from_directory(
+        tesseract_path=args.tesseract,
+        directory=args.directory,
+        rows=args.rows,
+        cols=args.cols,
+        max_workers=args.workers,
+        timeout=args.timeout,
+        instrumentation=Instrumentation(verbose=not args.quiet),
+        ocr_cache_dir=args.ocr_cache
+    )
+
+    if args.output is None:
+        failures = CrosswordBatchProcessor.write_jsonl(results, sys.stdout)
+    else:
+        with open(args.output, "w") as output:
+            failures = CrosswordBatchProcessor.write_jsonl(results, output)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
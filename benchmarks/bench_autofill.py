@@ -0,0 +1,57 @@
+#!/usr/bin/python
+
+import random
+import string
+import sys
+
+from benchmarks.bench_verify import random_cells
+from crossword_puzzle.autofill import CrosswordAutofill
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+
+
+def planted_problem(size: int, extra_words: int = 50000, seed: int = 0):
+    """
+    Builds an empty puzzle and a word list that is guaranteed to contain a fill for it: the entries
+    of a grid filled with random letters, hidden among random words
+    :param size: number of rows and columns
+    :param extra_words: number of random words added to the word list
+    :param seed: seed for the random number generators
+    :return: a verified CrosswordPuzzle and the word list
+    """
+
+    rng = random.Random(seed)
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(random_cells(size, black_ratio=0.18, seed=seed))
+    crossword_puzzle.verify_and_sync()
+
+    letters = [[rng.choice(string.ascii_uppercase) for _ in range(size)] for _ in range(size)]
+
+    words = ["".join(letters[row][col] for row, col in crossword_puzzle.get_clue_cells(clue_no, is_across))
+             for clue_no, is_across in crossword_puzzle.get_entries()]
+    words += ["".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 15)))
+              for _ in range(extra_words)]
+    rng.shuffle(words)
+
+    return crossword_puzzle, words
+
+
+def main(argv):
+
+    sizes = [int(arg) for arg in argv] or [15, 21, 31, 51]
+
+    # Random words give every letter at every position, so arc consistency prunes little, and the planted
+    # fill is close to the only one: the more of them, the harder the search. In grids with no entries
+    # longer than the random words (15 letters), tens of thousands of them leave nothing to pick out the
+    # planted fill until most of it has been guessed, which is more than a search can do in seconds.
+    # Real word lists share letter patterns, so grids usually have many fills and fill far more easily
+    for extra_words in (5000, 20000, 50000):
+        for size in sizes:
+            crossword_puzzle, words = planted_problem(size, extra_words)
+            # Random letters can repeat short entries, so duplicates are allowed here
+            stats = CrosswordAutofill(crossword_puzzle, words, allow_duplicates=True).fill(time_limit=30)
+            print(f"{size}x{size}, {extra_words} extra words: {stats}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_verify import random_puzzle
+from crossword_puzzle.clue_table import ClueTable
+
+
+def corpus(puzzle_count: int, size: int = 15, vocabulary: int = 5000, seed: int = 0):
+    """
+    Builds verified puzzles whose clue texts are drawn from a fixed pool, as clues recur across a real corpus
+    :return: list of CrosswordPuzzle
+    """
+
+    rng = random.Random(seed)
+    pool = [" ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+                     for _ in range(rng.randint(3, 7))) for _ in range(vocabulary)]
+
+    puzzles = []
+
+    for puzzle_seed in range(puzzle_count):
+        crossword_puzzle, _ = random_puzzle(size, seed=puzzle_seed)
+        for _, _, clue in crossword_puzzle.get_clues():
+            clue.clue_text = rng.choice(pool)
+        crossword_puzzle.verify_and_sync()
+        puzzles.append(crossword_puzzle)
+
+    return puzzles
+
+
+def allocated(build):
+    """
+    Measures the memory allocated by what a function builds and keeps
+    :return: what the function returned, and the bytes still allocated for it
+    """
+
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, size
+
+
+def main(argv):
+
+    puzzle_count = int(argv[0]) if argv else 2000
+    puzzles = corpus(puzzle_count)
+
+    # The clue objects as the puzzles hold them, copied so the measurement only counts the clues
+    clues, object_bytes = allocated(lambda: [(clue_no, is_across, type(clue)(clue.clue_text, list(clue.answer_len),
+                                                                              tuple(clue.pos)))
+                                             for crossword_puzzle in puzzles
+                                             for clue_no, is_across, clue in crossword_puzzle.get_clues()])
+
+    table, table_bytes = allocated(lambda: ClueTable.from_puzzles(puzzles))
+
+    print(f"{len(table)} clues from {puzzle_count} puzzles, {len(table.texts)} distinct texts")
+    print(f"Clue objects: {object_bytes / 1e6:>8.2f} MB (texts shared with the puzzles)")
+    print(f"ClueTable:    {table_bytes / 1e6:>8.2f} MB ({table.nbytes / 1e6:.2f} MB of columns)")
+
+    start = time.perf_counter()
+    long_across = sum(1 for _, is_across, clue in clues if is_across and sum(clue.answer_len) >= 7)
+    object_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    long_across_table = int(np.count_nonzero(table.is_across & (table.answer_lengths >= 7)))
+    table_seconds = time.perf_counter() - start
+
+    assert long_across == long_across_table
+
+    print(f"Counting across clues of 7+ letters: {object_seconds * 1e3:.2f} ms over the objects, "
+          f"{table_seconds * 1e3:.2f} ms over the table")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+
+import glob
+import sys
+import time
+
+import cv2.cv2 as cv2
+
+from clue_layout import UnreadableCluesError
+from clue_preprocessing import CluePreprocessor
+from image_to_crossword import CrosswordImageProcessor
+from ocr_backends import OcrError, create_ocr_backend
+
+
+def best_time(function, repeats: int):
+    """
+    Times a function, returning the best of several runs in seconds and its last result
+    """
+
+    best = float('inf')
+    result = None
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def read_clues(ocr_backend, img, is_across: bool, clue_preprocessor):
+    """
+    Reads the clues in an image, timing the whole read including any preprocessing
+    :return: time in seconds, and the number of clues parsed or the error that stopped parsing
+    """
+
+    def read():
+        try:
+            return len(CrosswordImageProcessor.clues_from_image(ocr_backend, img, is_across, clue_preprocessor))
+        except UnreadableCluesError as e:
+            return len(e.clues)
+        except ValueError as e:
+            return e
+
+    return best_time(read, repeats=3)
+
+
+def main(argv):
+
+    paths = argv or sorted(glob.glob("test_images/*_clues_*"))
+    clue_preprocessor = CluePreprocessor()
+
+    try:
+        ocr_backend = create_ocr_backend()
+        print(f"OCR engine: {ocr_backend.version}")
+    except OcrError as e:
+        # Preprocessing can still be measured without Tesseract
+        print(f"OCR disabled: {e}")
+        ocr_backend = None
+
+    print(f"{'image':<30} {'size':>11} {'preprocessed':>12} {'prep (ms)':>10}", end="")
+    print(f" {'raw OCR (ms)':>13} {'prep OCR (ms)':>14}  clues raw / preprocessed" if ocr_backend else "")
+
+    for path in paths:
+
+        img = cv2.imread(path)
+        is_across = "across" in path
+
+        prep_seconds, processed = best_time(lambda: clue_preprocessor.preprocess(img), repeats=5)
+
+        print(f"{path:<30} {img.shape[1]:>5}x{img.shape[0]:<5} {processed.shape[1]:>5}x{processed.shape[0]:<6} "
+              f"{prep_seconds * 1e3:>10.1f}", end="")
+
+        if ocr_backend is None:
+            print()
+            continue
+
+        raw_seconds, raw_clues = read_clues(ocr_backend, img, is_across, None)
+        new_seconds, new_clues = read_clues(ocr_backend, img, is_across, clue_preprocessor)
+
+        print(f" {raw_seconds * 1e3:>13.1f} {new_seconds * 1e3:>14.1f}  {raw_clues} / {new_clues}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+#!/usr/bin/python
+
+import glob
+import sys
+import time
+
+import cv2.cv2 as cv2
+
+from image_to_crossword import CrosswordImageProcessor
+
+
+def full_resolution_rect(img):
+    """
+    Locates the grid the way crossword_from_images() used to: thresholding the whole image and
+    approximating every contour at full resolution
+    :return: bounding rectangle (x, y, width, height) of the grid
+    """
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+
+    max_area = -1
+    max_cnt = None
+
+    for cnt in contours:
+        approx = cv2.approxPolyDP(cnt, 0.02 * cv2.arcLength(cnt, True), True)
+        if len(approx) == 4 and cv2.contourArea(cnt) > max_area:
+            max_area = cv2.contourArea(cnt)
+            max_cnt = cnt
+
+    return cv2.boundingRect(max_cnt)
+
+
+def best_time(function, img, repeats: int):
+    """
+    Times a function on an image, returning the best of several runs in seconds and its last result
+    """
+
+    best = float('inf')
+    result = None
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(img)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main(argv):
+
+    paths = argv or sorted(glob.glob("test_images/*_grid.*"))
+
+    print(f"{'image':<24} {'size':>11} {'full res (ms)':>14} {'pyramid (ms)':>13} {'speedup':>8}  same grid")
+
+    for path in paths:
+
+        img = cv2.imread(path)
+
+        old_seconds, old_rect = best_time(full_resolution_rect, img, repeats=5)
+        new_seconds, new_rect = best_time(CrosswordImageProcessor.locate_grid, img, repeats=5)
+
+        # Cell classification is compared on a nominal 15x15 grid, since the images have different sizes
+        same_cells = (CrosswordImageProcessor.classify_cells(img, old_rect, 15, 15) ==
+                      CrosswordImageProcessor.classify_cells(img, new_rect, 15, 15)).all()
+
+        print(f"{path:<24} {img.shape[1]:>5}x{img.shape[0]:<5} {old_seconds * 1e3:>14.2f} {new_seconds * 1e3:>13.2f} "
+              f"{old_seconds / new_seconds:>7.1f}x  {'yes' if same_cells else 'no'} {old_rect} {new_rect}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
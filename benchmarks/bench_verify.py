@@ -0,0 +1,112 @@
+#!/usr/bin/python
+
+import sys
+import time
+
+import numpy as np
+
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+from crossword_puzzle.exceptions import GridVerificationError
+from crossword_puzzle.slots import find_slots
+
+
+def random_cells(size: int, black_ratio: float = 0.2, seed: int = 0):
+    """
+    Generates a square grid structure with randomly placed black cells
+    :return: 2D boolean NumPy array, True for white cells
+    """
+    rng = np.random.default_rng(seed)
+    return rng.random((size, size)) >= black_ratio
+
+
+def random_puzzle(size: int, black_ratio: float = 0.2, seed: int = 0):
+    """
+    Builds a square puzzle with randomly placed black cells and a clue for every slot
+    :param size: number of rows and columns
+    :param black_ratio: fraction of cells that are black
+    :param seed: seed for the random number generator
+    :return: a CrosswordPuzzle ready to be verified, and the number of slots in it
+    """
+
+    cells = random_cells(size, black_ratio, seed)
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(cells)
+
+    across_metadata, down_metadata = find_slots(cells.astype(np.uint8))
+
+    slots = len(across_metadata) + len(down_metadata)
+
+    for is_across, metadata in ((True, across_metadata), (False, down_metadata)):
+        for clue_no, clue_metadata in metadata.items():
+            crossword_puzzle.add_clue(clue_no, is_across, f"Clue {clue_no}", [clue_metadata.length])
+
+    return crossword_puzzle, slots
+
+
+def time_verify(size: int, repeats: int):
+    """
+    Times a full verify_and_sync() of a fresh puzzle, returning the best of several runs in seconds
+    """
+
+    best = float('inf')
+
+    for _ in range(repeats):
+        crossword_puzzle, _ = random_puzzle(size)
+        start = time.perf_counter()
+        crossword_puzzle.verify_and_sync()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def time_edit(size: int, edits: int, seed: int = 1):
+    """
+    Times verify_and_sync() after flipping a single random cell between black and white, returning
+    the median over several edits in seconds. Edits near the top of the grid renumber more clues.
+    """
+
+    crossword_puzzle, _ = random_puzzle(size)
+    crossword_puzzle.verify_and_sync()
+
+    cells = random_cells(size)
+    rng = np.random.default_rng(seed)
+    timings = []
+
+    for row, col in rng.integers(0, size, (edits, 2)).tolist():
+
+        flip, restore = (crossword_puzzle.turn_cell_black, crossword_puzzle.turn_cell_white) if cells[row, col] \
+            else (crossword_puzzle.turn_cell_white, crossword_puzzle.turn_cell_black)
+
+        flip(row, col)
+
+        start = time.perf_counter()
+        try:
+            crossword_puzzle.verify_and_sync()
+        except GridVerificationError:
+            # The clues no longer match the grid, which is still fully checked
+            pass
+        timings.append(time.perf_counter() - start)
+
+        restore(row, col)
+        crossword_puzzle.verify_and_sync()
+
+    return float(np.median(timings))
+
+
+def main(argv):
+
+    sizes = [int(arg) for arg in argv] or [15, 21, 50, 100, 200, 400]
+
+    print(f"{'size':>6} {'slots':>8} {'verify (ms)':>12} {'per cell (us)':>14} {'after edit (ms)':>16}")
+
+    for size in sizes:
+        _, slots = random_puzzle(size)
+        seconds = time_verify(size, repeats=5)
+        edit_seconds = time_edit(size, edits=20)
+        print(f"{size:>6} {slots:>8} {seconds * 1e3:>12.2f} {seconds * 1e6 / (size * size):>14.3f} "
+              f"{edit_seconds * 1e3:>16.2f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,306 @@
+#!/usr/bin/python
+
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import random
+import string
+import sys
+import time
+
+import cv2.cv2 as cv2
+import numpy as np
+
+from benchmarks.bench_verify import random_puzzle
+from clue_layout import ClueLayoutParser
+from clue_preprocessing import CluePreprocessor
+from image_to_crossword import CrosswordImageProcessor
+from json_to_crossword import CrosswordJsonProcessor
+from ocr_backends import OcrError, create_ocr_backend, parse_tsv
+
+# Version of the results file format
+RESULTS_VERSION = 1
+
+
+def timed(function):
+    """
+    Wraps a function so that calling the wrapper runs it and returns the time it took in seconds
+    """
+
+    def run():
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+    return run
+
+
+def verified_puzzle(size: int, seed: int = 0):
+    """
+    Builds a verified puzzle with a clue for every slot, and a set of answers that are all consistent
+    with each other, taken from a grid of random letters
+    :return: the puzzle and a list of (clue number, is across, answer) tuples
+    """
+
+    crossword_puzzle, _ = random_puzzle(size, seed=seed)
+    crossword_puzzle.verify_and_sync()
+
+    rng = random.Random(seed)
+    letters = [[rng.choice(string.ascii_uppercase) for _ in range(size)] for _ in range(size)]
+
+    answers = [(clue_no, is_across, "".join(letters[row][col]
+                                            for row, col in crossword_puzzle.get_clue_cells(clue_no, is_across)))
+               for clue_no, is_across in crossword_puzzle.get_entries()]
+
+    return crossword_puzzle, answers
+
+
+def synthetic_clue_tsv(clue_count: int, seed: int = 0):
+    """
+    Generates Tesseract TSV output for a page of clues laid out with hanging indents, some spanning
+    several lines, so clue parsing can be timed without running OCR
+    """
+
+    rng = random.Random(seed)
+    rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"]
+    line_no = 0
+
+    for clue_no in range(1, clue_count + 1):
+
+        words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+                 for _ in range(rng.randint(3, 12))]
+        words.append(f"({rng.randint(3, 12)})")
+
+        # Five words to a line, with the clue number in its own column
+        for start in range(0, len(words), 5):
+
+            line_no += 1
+            line_words = ([str(clue_no)] if start == 0 else []) + words[start:start + 5]
+            left = 8 if start == 0 else 60
+
+            for word_no, word in enumerate(line_words, start=1):
+                rows.append(f"5\t1\t1\t1\t{line_no}\t{word_no}\t{left}\t{line_no * 25}\t{len(word) * 10}\t20\t"
+                            f"{rng.uniform(80, 97):.2f}\t{word}")
+                left += len(word) * 10 + 8
+
+    return "\n".join(rows)
+
+
+def image_benchmarks(ocr_backend):
+    """
+    Benchmarks of the grid and clue stages on the images in test_images
+    :return: list of (name, function returning the seconds taken by one run) tuples
+    """
+
+    benchmarks = []
+
+    for path in sorted(glob.glob("test_images/*_grid.*")):
+
+        name = os.path.basename(path)
+        img = cv2.imread(path)
+
+        benchmarks.append((f"grid.locate[{name}]", timed(lambda img=img: CrosswordImageProcessor.locate_grid(img))))
+
+        try:
+            grid_rect = CrosswordImageProcessor.locate_grid(img)
+            rows, cols = CrosswordImageProcessor.infer_dimensions(img, grid_rect)
+        except ValueError:
+            # Not every test image holds a grid that can be read
+            continue
+
+        benchmarks.append((f"grid.infer_dimensions[{name}]", timed(
+            lambda img=img, grid_rect=grid_rect: CrosswordImageProcessor.infer_dimensions(img, grid_rect))))
+        benchmarks.append((f"grid.classify[{name}]", timed(
+            lambda img=img, grid_rect=grid_rect, rows=rows, cols=cols:
+            CrosswordImageProcessor.classify_cells(img, grid_rect, rows, cols))))
+
+    clue_preprocessor = CluePreprocessor()
+
+    for path in sorted(glob.glob("test_images/*_clues_*")):
+
+        name = os.path.basename(path)
+        img = cv2.imread(path)
+
+        benchmarks.append((f"clues.preprocess[{name}]", timed(lambda img=img: clue_preprocessor.preprocess(img))))
+
+        if ocr_backend is not None:
+            processed = clue_preprocessor.preprocess(img)
+            benchmarks.append((f"clues.ocr[{name}]", timed(
+                lambda processed=processed: ocr_backend.image_to_data(processed, lang='eng', psm=6))))
+
+    return benchmarks
+
+
+def puzzle_benchmarks(sizes):
+    """
+    Benchmarks of clue parsing, JSON ingestion, verification and solving on synthetic puzzles
+    :return: list of (name, function returning the seconds taken by one run) tuples
+    """
+
+    benchmarks = []
+
+    for clue_count in (30, 300):
+        tsv = synthetic_clue_tsv(clue_count)
+        benchmarks.append((f"clues.parse[{clue_count} clues]", timed(
+            lambda tsv=tsv: ClueLayoutParser.parse(parse_tsv(tsv)))))
+
+    for size in sizes:
+
+        crossword_puzzle, answers = verified_puzzle(size)
+        json_string = json.dumps(crossword_puzzle.to_dict())
+
+        benchmarks.append((f"json.load[{size}x{size}]", timed(
+            lambda json_string=json_string: CrosswordJsonProcessor.crossword_from_json(json_string))))
+
+        def verify(size=size):
+            # Verification is timed on a fresh puzzle each run, as later calls only check what changed
+            fresh_puzzle, _ = random_puzzle(size)
+            start = time.perf_counter()
+            fresh_puzzle.verify_and_sync()
+            return time.perf_counter() - start
+
+        benchmarks.append((f"verify_and_sync[{size}x{size}]", verify))
+
+        def solve(size=size):
+            # Solving is timed on a fresh puzzle each run, as answers already in the grid change nothing
+            fresh_puzzle, fresh_answers = verified_puzzle(size)
+            start = time.perf_counter()
+            for clue_no, is_across, answer in fresh_answers:
+                fresh_puzzle.solve_clue(clue_no, is_across, answer)
+            return time.perf_counter() - start
+
+        benchmarks.append((f"solve_clue[{size}x{size}, {len(answers)} clues]", solve))
+
+    # A JSON Lines file of many small puzzles
+    jsonl = "\n".join(json.dumps(verified_puzzle(15, seed)[0].to_dict()) for seed in range(200))
+
+    benchmarks.append(("json.jsonl[200 puzzles]", timed(
+        lambda: sum(1 for _ in CrosswordJsonProcessor.crosswords_from_jsonl(io.StringIO(jsonl))))))
+
+    return benchmarks
+
+
+def run_benchmarks(benchmarks, repeats: int, pattern: str = None):
+    """
+    Runs each benchmark several times, after a warm-up run
+    :param benchmarks: list of (name, function returning the seconds taken by one run) tuples
+    :param repeats: number of timed runs
+    :param pattern: only run the benchmarks whose names contain this
+    :return: map of benchmark names to their best and median times in seconds
+    """
+
+    results = {}
+
+    for name, run in benchmarks:
+
+        if pattern is not None and pattern not in name:
+            continue
+
+        run()
+        timings = [run() for _ in range(repeats)]
+
+        results[name] = {"best": min(timings), "median": float(np.median(timings)), "runs": repeats}
+        print(f"{name:<50} {results[name]['median'] * 1e3:>10.3f} ms", file=sys.stderr)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_time: float = 0.0):
+    """
+    Compares results against a baseline, printing the change in the median time of each benchmark.
+    Benchmarks whose baseline and current medians are both shorter than min_time can't regress, since
+    timer resolution and scheduling noise make up a large share of such short times.
+    :param results: map of benchmark names to results, from run_benchmarks()
+    :param baseline: results loaded from a previous run
+    :param threshold: ratio of the current to the baseline median above which a benchmark has regressed
+    :param min_time: median time in seconds below which the ratio is ignored
+    :return: list of the names of the benchmarks that regressed
+    """
+
+    regressions = []
+
+    print(f"{'benchmark':<50} {'baseline (ms)':>14} {'current (ms)':>13} {'ratio':>7}")
+
+    for name, result in results.items():
+
+        if name not in baseline:
+            print(f"{name:<50} {'-':>14} {result['median'] * 1e3:>13.3f} {'new':>7}")
+            continue
+
+        ratio = result["median"] / baseline[name]["median"]
+        too_short = max(result["median"], baseline[name]["median"]) < min_time
+        regressed = ratio > threshold and not too_short
+
+        if regressed:
+            regressions.append(name)
+
+        note = '  REGRESSION' if regressed else '  (too short to compare)' if too_short and ratio > threshold else ''
+        print(f"{name:<50} {baseline[name]['median'] * 1e3:>14.3f} {result['median'] * 1e3:>13.3f} "
+              f"{ratio:>6.2f}x{note}")
+
+    return regressions
+
+
+def main(argv):
+
+    parser = argparse.ArgumentParser(description="Time every stage of the pipeline, optionally against a baseline")
+    parser.add_argument("--output", default=None, help="file to write the results to as JSON")
+    parser.add_argument("--baseline", default=None, help="results file from a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown relative to the baseline counted as a regression (default 1.25)")
+    parser.add_argument("--min-time", type=float, default=1.0,
+                        help="milliseconds below which a benchmark isn't compared with the baseline (default 1)")
+    parser.add_argument("--repeats", type=int, default=15, help="number of timed runs of each benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 50, 200], help="sizes of the synthetic grids")
+    parser.add_argument("--only", default=None, help="only run the benchmarks whose names contain this")
+    parser.add_argument("--no-ocr", action="store_true", help="skip the benchmarks that run Tesseract")
+    args = parser.parse_args(argv)
+
+    ocr_backend = None
+    engine = None
+
+    if not args.no_ocr:
+        try:
+            ocr_backend = create_ocr_backend()
+            engine = ocr_backend.version
+        except OcrError as e:
+            print(f"Skipping OCR benchmarks: {e}", file=sys.stderr)
+            ocr_backend = None
+
+    benchmarks = image_benchmarks(ocr_backend) + puzzle_benchmarks(args.sizes)
+    results = run_benchmarks(benchmarks, args.repeats, args.only)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "ocr_engine": engine,
+        "results": results
+    }
+
+    if args.output is not None:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline["results"], args.threshold, args.min_time / 1e3)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold}x", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+import re
+from statistics import median
+
+# A clue number at the start of a line's first word, e.g. "12" or "12.", or "12.Flower" when OCR missed the space
+_CLUE_NO = re.compile(r'([1-9][0-9]?)[.,:]?(?=\D|$)')
+
+# The answer length at the end of a clue, e.g. "(6)", "(3,4)" or "(2-2)"
+_ENUMERATION = re.compile(r'\(\s*([1-9][0-9]?(?:\s*[,-]\s*[1-9][0-9]?)*)\s*\)[\s.,;:]*$')
+_ENUMERATION_SEPARATOR = re.compile(r'\s*[,-]\s*')
+
+# What looks like an answer length (possibly misread) followed by a clue number, found inside a clue when
+# the next clue's number wasn't recognised
+_MISSED_CLUE = re.compile(r'\([^()]{1,12}\)\s+[1-9][0-9]?\.?\s')
+
+
+class OcrLine:
+    """
+    A line of words read by OCR
+    """
+
+    def __init__(self, words: list):
+        """
+        :param words: list of OcrWord on the line, from left to right
+        """
+        self.words = words
+
+    @property
+    def left(self):
+        return min(word.left for word in self.words)
+
+    @property
+    def top(self):
+        return min(word.top for word in self.words)
+
+    @property
+    def right(self):
+        return max(word.left + word.width for word in self.words)
+
+    @property
+    def bottom(self):
+        return max(word.top + word.height for word in self.words)
+
+    @property
+    def confidence(self):
+        """
+        Confidence of the least certain word on the line, from 0 to 100
+        """
+        return min(word.confidence for word in self.words)
+
+
+class ClueEntry:
+    """
+    A clue found in the layout of a page of clues, and the lines of text it was read from
+    """
+
+    def __init__(self, clue_no: int, lines: list):
+        """
+        :param clue_no: clue number
+        :param lines: list of OcrLine making up the clue, the first starting with the clue number
+        """
+
+        self.clue_no = clue_no
+        self.lines = lines
+
+        # Filled in by ClueLayoutParser.read_entry(), unless the clue can't be read
+        self.text = None
+        self.answer_len = None
+        self.error = None
+
+    @property
+    def confidence(self):
+        """
+        Confidence of the least certain word in the clue, from 0 to 100
+        """
+        return min(line.confidence for line in self.lines)
+
+
+class ClueLayoutParser:
+    """
+    Finds clues from the layout of the words OCR read on a page, rather than from the text alone.
+    A clue starts on a line whose first word is a number in the column the clue numbers are aligned in,
+    and carries on over the following lines, so a misread clue only affects itself.
+    """
+
+    @staticmethod
+    def parse(words):
+        """
+        Finds the clues in the words read from a page of clues
+        :param words: list of OcrWord in reading order, from ocr_backends.parse_tsv()
+        :return: list of ClueEntry in the order they appear, with the error set on any that couldn't be read
+        """
+
+        lines = ClueLayoutParser.lines_from_words(words)
+        entries = []
+
+        if not lines:
+            return entries
+
+        number_left, tolerance = ClueLayoutParser.__number_column(lines)
+
+        for line in lines:
+
+            clue_no_match = _CLUE_NO.match(line.words[0].text)
+            clue_no = int(clue_no_match.group(1)) if clue_no_match else None
+
+            # Clue numbers increase down the page. A number also starts a clue away from the number column
+            # if the previous clue has already ended with its answer length
+            if clue_no is None:
+                starts_clue = False
+            elif not entries:
+                starts_clue = abs(line.left - number_left) <= tolerance
+            else:
+                starts_clue = clue_no > entries[-1].clue_no and (
+                    abs(line.left - number_left) <= tolerance or
+                    _ENUMERATION.search(ClueLayoutParser.__line_text(entries[-1].lines[-1])) is not None
+                )
+
+            if starts_clue:
+                entries.append(ClueEntry(clue_no, [line]))
+            elif entries:
+                entries[-1].lines.append(line)
+
+            # Lines before the first clue, such as the "Across" heading, are skipped
+
+        for entry in entries:
+            ClueLayoutParser.read_entry(entry)
+
+        return entries
+
+    @staticmethod
+    def lines_from_words(words):
+        """
+        Groups words into the lines OCR found them on
+        :param words: list of OcrWord in reading order
+        :return: list of OcrLine from the top of the page down
+        """
+
+        lines = {}
+
+        for word in words:
+            lines.setdefault((word.block, word.paragraph, word.line), []).append(word)
+
+        return sorted((OcrLine(sorted(line_words, key=lambda word: word.left)) for line_words in lines.values()),
+                      key=lambda line: line.top)
+
+    @staticmethod
+    def read_entry(entry: ClueEntry):
+        """
+        Reads the text and answer length of a clue from its lines, setting its error if it can't be read
+        :param entry: the clue to read
+        """
+
+        text = " ".join(ClueLayoutParser.__line_text(line) for line in entry.lines)
+
+        # Drop the clue number, which may have been read as part of the first word
+        clue_no_match = _CLUE_NO.match(text)
+        text = text[clue_no_match.end():].lstrip() if clue_no_match else text
+
+        enumeration_match = _ENUMERATION.search(text)
+
+        if enumeration_match is None:
+            entry.text, entry.answer_len = None, None
+            entry.error = f"Couldn't detect the answer length from the image for {entry.clue_no} {text}"
+            return
+
+        if _MISSED_CLUE.search(text, 0, enumeration_match.start()) is not None:
+            entry.text, entry.answer_len = None, None
+            entry.error = f"Found more than one clue in the image for {entry.clue_no} {text}"
+            return
+
+        entry.text = text[:enumeration_match.start()].strip()
+        entry.answer_len = [int(length) for length in _ENUMERATION_SEPARATOR.split(enumeration_match.group(1))]
+        entry.error = None
+
+    @staticmethod
+    def __number_column(lines):
+        """
+        Finds where the clue numbers are aligned on the page
+        :return: the left edge of the clue numbers, and how far from it a number can start
+        """
+
+        numbered_lefts = [line.left for line in lines if _CLUE_NO.match(line.words[0].text)]
+        word_height = median(word.height for line in lines for word in line.words)
+
+        if not numbered_lefts:
+            return 0, word_height
+
+        return median(numbered_lefts), word_height
+
+    @staticmethod
+    def __line_text(line: OcrLine):
+        # Vertical bars are usually a misread "I"
+        return " ".join(word.text for word in line.words).replace('|', 'I')
+
+
+class UnreadableCluesError(ValueError):
+    """
+    Raised when some clues on a page couldn't be read. The clues that were read are kept, so a caller
+    can still use them
+    """
+
+    def __init__(self, direction: str, entries: list, clues: list):
+        """
+        :param direction: "across" or "down"
+        :param entries: list of the ClueEntry that couldn't be read, with their errors set
+        :param clues: list of (clue number, clue text, answer length) tuples of the clues that were read
+        """
+
+        self.direction = direction
+        self.entries = entries
+        self.clues = clues
+
+    def __str__(self):
+        return f"Couldn't read {len(self.entries)} {self.direction} clue(s): " + \
+               "; ".join(entry.error for entry in self.entries)
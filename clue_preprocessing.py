@@ -0,0 +1,193 @@
+import cv2.cv2 as cv2
+import numpy as np
+
+
+class CluePreprocessor:
+    """
+    Prepares an image of clues for OCR. The image is converted to grayscale, then optionally
+    straightened, cropped to the text, shrunk so the characters are the size Tesseract reads
+    best, and binarised. Smaller, cleaner images are read faster and with fewer mistakes.
+    """
+
+    # x-height in pixels of the text Tesseract reads most reliably (10pt text at 300 DPI)
+    TARGET_X_HEIGHT = 20
+
+    # Text already within this factor of the target x-height is left at its size
+    RESCALE_TOLERANCE = 1.25
+
+    # Longest side in pixels of the copy of the image the skew is measured on
+    SKEW_MAX_SIDE = 400
+
+    # Skew angles in degrees smaller than this are left alone, as rotating blurs the text
+    SKEW_MIN_ANGLE = 0.2
+
+    def __init__(self, binarize: bool = True, deskew: bool = True, crop: bool = True, rescale: bool = True,
+                 upscale: bool = False, max_skew: float = 10, crop_margin: int = 10,
+                 target_x_height: int = TARGET_X_HEIGHT):
+        """
+        :param binarize: whether to turn the image into black text on a white background
+        :param deskew: whether to rotate the text so its lines are horizontal
+        :param crop: whether to crop the image to the text, removing rules and borders
+        :param rescale: whether to resize the image so its lowercase letters are target_x_height pixels high
+        :param upscale: whether rescaling may also enlarge small text. Off by default, as enlarging multiplies
+                        the pixels Tesseract has to read, while shrinking oversized text only removes them
+        :param max_skew: largest skew angle in degrees that is corrected
+        :param crop_margin: pixels of background kept around the text when cropping
+        :param target_x_height: x-height in pixels that the text is rescaled to
+        """
+
+        self.binarize = binarize
+        self.deskew = deskew
+        self.crop = crop
+        self.rescale = rescale
+        self.upscale = upscale
+        self.max_skew = max_skew
+        self.crop_margin = crop_margin
+        self.target_x_height = target_x_height
+
+    def __call__(self, img):
+        return self.preprocess(img)
+
+    def preprocess(self, img):
+        """
+        Runs the enabled steps on an image
+        :param img: image object from cv2.imread(), or a grayscale image
+        :return: grayscale image with dark text on a light background
+        """
+
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        # Mask of the ink, used to measure the text
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        # Light text on a dark background
+        if cv2.countNonZero(ink) > ink.size // 2:
+            gray = cv2.bitwise_not(gray)
+            ink = cv2.bitwise_not(ink)
+
+        if self.deskew:
+            angle = self.__skew_angle(ink, self.max_skew)
+            if abs(angle) >= CluePreprocessor.SKEW_MIN_ANGLE:
+                gray = self.__rotate(gray, angle, 255, cv2.INTER_CUBIC)
+                ink = self.__rotate(ink, angle, 0, cv2.INTER_NEAREST)
+
+        if self.crop or self.rescale:
+
+            boxes = self.__character_boxes(ink)
+
+            if len(boxes) > 0:
+
+                if self.crop:
+                    gray = self.__crop_to(gray, boxes, self.crop_margin)
+
+                # Most characters are lowercase letters without ascenders, so their median height is the x-height
+                if self.rescale:
+                    gray = self.__rescale(gray, float(np.median(boxes[:, 3])), self.target_x_height, self.upscale)
+
+        if self.binarize:
+            _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+        return gray
+
+    @staticmethod
+    def __skew_angle(ink, max_skew: float):
+        """
+        Measures the angle of the lines of text. Projected at the right angle, the ink is concentrated
+        in the lines with little in between, so the angle is the one whose row histogram varies most
+        :param ink: binary image, with the ink set
+        :param max_skew: largest angle in degrees to consider
+        :return: the angle in degrees to rotate the image by to make the lines horizontal
+        """
+
+        # Measure on a small copy, which keeps the lines apart while cutting the number of points
+        scale = min(1.0, CluePreprocessor.SKEW_MAX_SIDE / max(ink.shape))
+        if scale < 1:
+            ink = cv2.resize(ink, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        ys, xs = np.nonzero(ink)
+        if len(ys) == 0:
+            return 0.0
+
+        xs = xs - ink.shape[1] / 2
+        ys = ys - ink.shape[0] / 2
+
+        def sharpness(angle):
+            radians = np.deg2rad(angle)
+            projected = ys * np.cos(radians) - xs * np.sin(radians)
+            histogram = np.bincount(np.round(projected - projected.min()).astype(np.intp))
+            return float(np.dot(histogram, histogram))
+
+        # Search in whole degrees, then in tenths around the best angle
+        best = max(np.arange(-max_skew, max_skew + 1), key=sharpness)
+        best = max(np.arange(best - 1, best + 1.01, 0.1), key=sharpness)
+
+        return float(np.clip(best, -max_skew, max_skew))
+
+    @staticmethod
+    def __rotate(img, angle: float, background: int, interpolation: int):
+        """
+        Rotates an image about its centre, growing it so that no corner is cut off
+        """
+
+        height, width = img.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        new_width = int(round(height * sin + width * cos))
+        new_height = int(round(height * cos + width * sin))
+
+        matrix[0, 2] += (new_width - width) / 2
+        matrix[1, 2] += (new_height - height) / 2
+
+        return cv2.warpAffine(img, matrix, (new_width, new_height), flags=interpolation,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=background)
+
+    @staticmethod
+    def __character_boxes(ink):
+        """
+        Finds the pieces of ink that look like characters, ignoring specks of noise and long thin
+        shapes such as rules, underlines and borders
+        :param ink: binary image, with the ink set
+        :return: 2D NumPy array of (x, y, width, height) rows
+        """
+
+        _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+        # The first component is the background
+        _, _, w, h, area = stats[1:].T
+
+        is_character = ((area >= 4) & (w < 8 * h) & (h < 8 * w) &
+                        (h < ink.shape[0] // 4) & (w < ink.shape[1] // 4))
+
+        return stats[1:][is_character, :4]
+
+    @staticmethod
+    def __crop_to(img, boxes, margin: int):
+        """
+        Crops an image to the bounding rectangle of a set of boxes, plus a margin
+        """
+
+        left = max(0, int(boxes[:, 0].min()) - margin)
+        top = max(0, int(boxes[:, 1].min()) - margin)
+        right = min(img.shape[1], int((boxes[:, 0] + boxes[:, 2]).max()) + margin)
+        bottom = min(img.shape[0], int((boxes[:, 1] + boxes[:, 3]).max()) + margin)
+
+        return img[top:bottom, left:right]
+
+    @staticmethod
+    def __rescale(img, x_height: float, target_x_height: int, upscale: bool):
+        """
+        Resizes an image so that its x-height is close to the target, only shrinking it unless upscale is set
+        """
+
+        scale = target_x_height / x_height
+
+        if 1 / CluePreprocessor.RESCALE_TOLERANCE <= scale <= CluePreprocessor.RESCALE_TOLERANCE:
+            return img
+
+        if scale > 1 and not upscale:
+            return img
+
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+
+        return cv2.resize(img, None, fx=scale, fy=scale, interpolation=interpolation)
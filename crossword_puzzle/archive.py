@@ -0,0 +1,157 @@
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .crossword_puzzle import CrosswordPuzzle
+
+# Archive header: magic number, number of puzzles and where the offset index starts
+_MAGIC = b"XWPARCH\x01"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class PuzzleArchiveWriter:
+    """
+    Writes puzzles one after another to an archive file, followed by an index of where each one starts.
+    Use as a context manager, or call close() to write the index once every puzzle has been added.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the archive to create, replacing any existing file once complete
+        """
+
+        self._path = path
+        self._temp_path = f"{path}.tmp"
+        self._file = open(self._temp_path, 'wb')
+        self._file.write(_HEADER.pack(_MAGIC, 0, 0))
+
+        # Where each puzzle starts in the file
+        self._offsets = []
+
+    def add(self, crossword_puzzle: CrosswordPuzzle):
+        """
+        Adds a puzzle to the end of the archive
+        :param crossword_puzzle: the puzzle to add
+        :return: index of the puzzle in the archive
+        """
+        return self.add_bytes(crossword_puzzle.to_bytes())
+
+    def add_bytes(self, data: bytes):
+        """
+        Adds a puzzle already converted with CrosswordPuzzle.to_bytes() to the end of the archive
+        :param data: the converted puzzle
+        :return: index of the puzzle in the archive
+        """
+
+        self._offsets.append(self._file.tell())
+        self._file.write(data)
+
+        return len(self._offsets) - 1
+
+    def close(self):
+        """
+        Writes the index and moves the archive into place
+        """
+
+        if self._file.closed:
+            return
+
+        index_offset = self._file.tell()
+        self._offsets.append(index_offset)
+
+        # Offsets of every puzzle plus the end of the last one, so puzzle i spans offsets[i] to offsets[i + 1]
+        self._file.write(np.array(self._offsets, dtype='<u8').tobytes())
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(_MAGIC, len(self._offsets) - 1, index_offset))
+        self._file.close()
+
+        os.replace(self._temp_path, self._path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't leave a partial archive behind
+            self._file.close()
+            os.remove(self._temp_path)
+
+
+class PuzzleArchive:
+    """
+    Read access to an archive written by PuzzleArchiveWriter. The file is memory-mapped, so opening it
+    only reads the header, and getting a puzzle only reads that puzzle's bytes.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the archive. Raises ValueError if it isn't an archive, or is truncated or corrupt
+        """
+
+        with open(path, 'rb') as f:
+            # An empty file can't be mapped
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"{path} is not a puzzle archive")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, index_offset = _HEADER.unpack_from(self._mmap, 0)
+
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a puzzle archive")
+
+        if index_offset < _HEADER.size or index_offset + 8 * (count + 1) > len(self._mmap):
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated: its index is missing")
+
+        self._offsets = np.frombuffer(self._mmap, dtype='<u8', count=count + 1, offset=index_offset)
+
+        # Puzzles lie one after another between the header and the index
+        if (self._offsets[0] < _HEADER.size or self._offsets[-1] != index_offset or
+                np.any(self._offsets[1:] < self._offsets[:-1])):
+            self.close()
+            raise ValueError(f"{path} is corrupt: its index doesn't match the puzzles")
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int):
+        """
+        Builds a puzzle from the archive
+        :param index: position of the puzzle in the archive
+        :return: CrosswordPuzzle
+        """
+        return CrosswordPuzzle.from_bytes(self.get_bytes(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def get_bytes(self, index: int):
+        """
+        Gets the binary form of a puzzle without building it
+        :param index: position of the puzzle in the archive
+        :return: memoryview of the puzzle's bytes in the archive
+        """
+
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"Puzzle {index} is out of range for an archive of {len(self)} puzzles")
+
+        index %= len(self)
+
+        return memoryview(self._mmap)[int(self._offsets[index]):int(self._offsets[index + 1])]
+
+    def close(self):
+        # The index is a view into the mapping, so it has to go first
+        self._offsets = None
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,548 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from .crossword_puzzle import CrosswordPuzzle
+from .utils import is_cell_character
+
+# Python integers are used as bitsets over a word list (bit i set if word i is allowed)
+_popcount = int.bit_count if hasattr(int, "bit_count") else lambda bits: bin(bits).count("1")
+
+
+class AutofillStats:
+
+    def __init__(self):
+        self.solved = False
+        self.budget_exhausted = False
+        self.slots = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.restarts = 0
+        self.revisions = 0
+        self.elapsed = 0.0
+
+    def __str__(self):
+        outcome = "solved" if self.solved else "budget exhausted" if self.budget_exhausted else "no solution"
+        return f"Autofill {outcome}: {self.slots} slots, {self.nodes} nodes, {self.backtracks} backtracks, " \
+               f"{self.restarts} restarts, {self.revisions} revisions in {self.elapsed:.3f}s"
+
+
+class WordDomains:
+    """
+    A word list grouped by length, with a bitset for every (length, position, letter) of the words
+    that have that letter at that position
+    """
+
+    def __init__(self, words):
+        """
+        :param words: iterable of words, in order of preference. Spaces and punctuation are ignored
+                      (so "TOP HAT" fills a 6 letter entry), as are words that can't be filled into a grid
+        """
+
+        by_length = {}
+
+        for word in words:
+            word = "".join(char for char in word.upper() if char.isalpha())
+            if word and all(is_cell_character(char) for char in word):
+                by_length.setdefault(len(word), {})[word] = None
+
+        self._words = {length: list(unique_words) for length, unique_words in by_length.items()}
+        self._letters = {length: np.frombuffer("".join(words).encode('latin-1'), dtype=np.uint8).reshape(-1, length)
+                         for length, words in self._words.items()}
+        self._letter_masks = {length: self.__build_masks(letters) for length, letters in self._letters.items()}
+
+    def words(self, length: int):
+        """
+        Gets the words of a length
+        :return: list of words, where a word's index is its bit in the bitsets
+        """
+        return self._words.get(length, [])
+
+    def letters(self, length: int):
+        """
+        Gets the letters of the words of a length
+        :return: 2D NumPy array of character codes, a row per word
+        """
+        return self._letters[length]
+
+    def all_words(self, length: int):
+        """
+        Gets the bitset of every word of a length
+        """
+        return (1 << len(self.words(length))) - 1
+
+    def letter_mask(self, length: int, position: int, letter: str):
+        """
+        Gets the bitset of the words of a length with a letter at a position
+        """
+        return self._letter_masks[length][position].get(letter, 0) if length in self._letter_masks else 0
+
+    def letter_masks(self, length: int, position: int):
+        """
+        Gets the map of letters to the bitset of the words of a length with that letter at a position
+        """
+        return self._letter_masks[length][position]
+
+    @staticmethod
+    def __build_masks(letters):
+        """
+        Builds the bitsets of one length of words
+        :param letters: 2D NumPy array of character codes, a row per word
+        :return: list, per position, of maps of letters to bitsets
+        """
+
+        masks = []
+
+        for position in range(letters.shape[1]):
+            column = letters[:, position]
+            position_masks = {}
+            for code in np.unique(column).tolist():
+                bits = np.packbits(column == code, bitorder='little')
+                position_masks[chr(code)] = int.from_bytes(bits.tobytes(), 'little')
+            masks.append(position_masks)
+
+        return masks
+
+
+class CrosswordAutofill:
+    """
+    Fills every unfilled entry of a verified puzzle with words from a word list, using arc consistency
+    over the crossings and a most-constrained-entry-first backtracking search. Domains are kept as
+    bitsets and changes to them are recorded on a trail, so backtracking undoes them without copying.
+
+    While an entry still has many possible words, the search picks the letter of one of its cells
+    rather than a whole word: trying 26 letters and ruling out each one that fails narrows down both
+    entries through the cell, where trying thousands of words one at a time would learn little from each.
+    """
+
+    # Number of backtracks before the first restart, and how much that grows after each restart
+    RESTART_BACKTRACKS = 100
+    RESTART_GROWTH = 1.5
+
+    # Most possible words an entry can have for the search to try them one by one, rather than a letter at a time
+    WORD_BRANCH_MAX = 30
+
+    def __init__(self, crossword_puzzle: CrosswordPuzzle, words, allow_duplicates: bool = False):
+        """
+        :param crossword_puzzle: a puzzle on which verify_and_sync() has been called
+        :param words: a WordDomains, or an iterable of words in order of preference
+        :param allow_duplicates: whether the same word may be used for more than one entry
+        """
+
+        self._crossword_puzzle = crossword_puzzle
+        self._allow_duplicates = allow_duplicates
+        self._domains_source = words if isinstance(words, WordDomains) else WordDomains(words)
+
+        # The entries being filled, their lengths and their crossings with other entries being filled:
+        # a list per entry of (position in the entry, crossing entry, position in the crossing entry)
+        self._slots = []
+        self._lengths = []
+        self._crossings = []
+
+        # Current bitset of allowed words per entry, and the trail of (entry, previous bitset) changes
+        self._domains = []
+        self._trail = []
+
+        # How often each entry has been involved in a dead end, to steer the search towards it
+        self._weights = []
+
+    def fill(self, time_limit: float = None, node_limit: int = None):
+        """
+        Fills the grid. The puzzle is only modified if a complete fill is found.
+        :param time_limit: maximum number of seconds to search for
+        :param node_limit: maximum number of words to try
+        :return: AutofillStats describing the search
+        """
+
+        stats = AutofillStats()
+        start = time.perf_counter()
+
+        self._slots, self._lengths, self._crossings = [], [], []
+        self._domains, self._trail = [], []
+        self._weights = []
+        deadline = None if time_limit is None else start + time_limit
+
+        if self.__build_problem(stats):
+            assignment = self.__search(stats, deadline, node_limit)
+            if assignment is not None:
+                self.__write_fill(assignment)
+                stats.solved = True
+
+        stats.elapsed = time.perf_counter() - start
+
+        return stats
+
+    def __build_problem(self, stats: AutofillStats):
+        """
+        Sets up the entries to fill, their initial domains and their crossings
+        :return: False if some entry has no possible word
+        """
+
+        crossword_puzzle = self._crossword_puzzle
+        slot_ids = {}
+        filled_words = set()
+
+        for clue_no, is_across in crossword_puzzle.get_entries():
+
+            cells = crossword_puzzle.get_clue_cells(clue_no, is_across)
+            values = [crossword_puzzle.get_cell(row, col) for row, col in cells]
+
+            # Fully filled entries are left alone, but their letters still constrain the crossing entries
+            if all(value != '1' for value in values):
+                filled_words.add("".join(values))
+                continue
+
+            length = len(cells)
+            domain = self._domains_source.all_words(length)
+
+            for position, value in enumerate(values):
+                if value != '1':
+                    domain &= self._domains_source.letter_mask(length, position, value)
+
+            slot_ids[(clue_no, is_across)] = len(self._slots)
+            self._slots.append((clue_no, is_across, cells))
+            self._lengths.append(length)
+            self._domains.append(domain)
+            self._weights.append(1)
+
+        # Words already in the grid can't be used again
+        if not self._allow_duplicates:
+            for word in filled_words:
+                word_mask = self.__word_mask(word)
+                self._domains = [domain & ~word_mask if length == len(word) else domain
+                                 for domain, length in zip(self._domains, self._lengths)]
+
+        if any(domain == 0 for domain in self._domains):
+            return False
+
+        stats.slots = len(self._slots)
+
+        for slot, (clue_no, is_across, cells) in enumerate(self._slots):
+            crossings = []
+            for position, (row, col) in enumerate(cells):
+                across, down = crossword_puzzle.get_crossing_clues(row, col)
+                crossing = down if is_across else across
+                if crossing is not None and (crossing[0], not is_across) in slot_ids:
+                    crossings.append((position, slot_ids[(crossing[0], not is_across)], crossing[1]))
+            self._crossings.append(crossings)
+
+        # Entries crossing many others are the most constraining, so they start out weighted by their crossings
+        self._weights = [max(1, len(crossings)) for crossings in self._crossings]
+
+        return self.__propagate(range(len(self._slots)), stats)
+
+    def __word_mask(self, word: str):
+        """
+        Gets the bitset of a word, which is empty if the word isn't in the word list
+        """
+        mask = self._domains_source.all_words(len(word))
+        for position, letter in enumerate(word):
+            mask &= self._domains_source.letter_mask(len(word), position, letter)
+        return mask
+
+    def __search(self, stats: AutofillStats, deadline: float, node_limit: int):
+        """
+        Runs the backtracking search. The search restarts from scratch after an increasing number of
+        backtracks, keeping the dead end counts so it tackles the troublesome entries earlier.
+        :return: list of the word index assigned to each entry, or None if no fill was found
+        """
+
+        assigned = [None] * len(self._slots)
+        used_words = set()
+        root_trail_length = len(self._trail)
+
+        # Each frame is a choice being tried: [entry, position of the cell whose letter is chosen (None when
+        # choosing a word), candidate words or letters in the order to try them, index of the next candidate,
+        # trail length before trying]
+        stack = []
+
+        restart_backtracks = self.RESTART_BACKTRACKS
+        backtracks_since_restart = 0
+
+        while True:
+
+            if backtracks_since_restart > restart_backtracks:
+                self.__undo(root_trail_length)
+                assigned = [None] * len(self._slots)
+                used_words.clear()
+                stack.clear()
+                restart_backtracks = int(restart_backtracks * self.RESTART_GROWTH)
+                backtracks_since_restart = 0
+                stats.restarts += 1
+
+            slot = self.__select_slot(assigned)
+
+            if slot is None:
+                return assigned
+
+            stack.append(self.__branch(slot))
+
+            # Try candidates for the newest choice, backtracking to older ones when they run out
+            while stack:
+
+                frame = stack[-1]
+                slot, position, candidates, next_candidate, trail_length = frame
+
+                self.__undo(trail_length)
+                if position is None and assigned[slot] is not None:
+                    used_words.discard((self._lengths[slot], assigned[slot]))
+                    assigned[slot] = None
+
+                choice = None
+                domain = self._domains[slot]
+                while next_candidate < len(candidates):
+                    candidate = candidates[next_candidate]
+                    next_candidate += 1
+                    if position is not None:
+                        if domain & self._domains_source.letter_mask(self._lengths[slot], position, candidate):
+                            choice = candidate
+                            break
+                    elif domain >> candidate & 1 and \
+                            (self._allow_duplicates or (self._lengths[slot], candidate) not in used_words):
+                        choice = candidate
+                        break
+                frame[3] = next_candidate
+
+                if choice is None:
+                    stack.pop()
+                    stats.backtracks += 1
+                    backtracks_since_restart += 1
+                    if backtracks_since_restart > restart_backtracks and stack:
+                        break
+                    continue
+
+                stats.nodes += 1
+                if (node_limit is not None and stats.nodes > node_limit) or \
+                        (deadline is not None and time.perf_counter() > deadline):
+                    self.__undo(0)
+                    stats.budget_exhausted = True
+                    return None
+
+                if position is None:
+                    assigned[slot] = choice
+                    used_words.add((self._lengths[slot], choice))
+                    if self.__assign(slot, choice, assigned, stats):
+                        break
+                    assigned[slot] = None
+                    used_words.discard((self._lengths[slot], choice))
+                    remaining = domain & ~(1 << choice)
+                else:
+                    if self.__assign_letter(slot, position, choice, stats):
+                        break
+                    remaining = domain & ~self._domains_source.letter_mask(self._lengths[slot], position, choice)
+
+                # The choice failed, so rule it out and propagate that before trying the next one
+                self.__undo(trail_length)
+                self.__set_domain(slot, remaining)
+                frame[4] = len(self._trail)
+                if remaining == 0 or not self.__propagate([slot], stats):
+                    frame[3] = len(candidates)
+
+            else:
+                return None
+
+    def __branch(self, slot: int):
+        """
+        Decides how to split the search on an entry: over its possible words if there are few enough,
+        otherwise over the possible letters of one of its cells
+        :return: a new search frame
+        """
+
+        domain = self._domains[slot]
+        length = self._lengths[slot]
+
+        if _popcount(domain) <= self.WORD_BRANCH_MAX:
+            return [slot, None, self.__order_candidates(slot), 0, len(self._trail)]
+
+        crossing_at = {position: (other, other_position) for position, other, other_position in self._crossings[slot]}
+
+        # Choose the cell with the fewest possible letters, preferring cells shared with another entry, and
+        # try its letters in order of how many words of both entries agree with them
+        best = None
+
+        for position in range(length):
+
+            other, other_position = crossing_at.get(position, (None, None))
+            letters = []
+
+            for letter, mask in self._domains_source.letter_masks(length, position).items():
+                support = _popcount(domain & mask)
+                if support and other is not None:
+                    support *= _popcount(self._domains[other] & self._domains_source.letter_mask(
+                        self._lengths[other], other_position, letter))
+                if support:
+                    letters.append((support, letter))
+
+            if len(letters) < 2:
+                continue
+
+            key = (other is None, len(letters), _popcount(self._domains[other]) if other is not None else 0)
+            if best is None or key < best[0]:
+                best = (key, position, letters)
+
+        if best is None:
+            return [slot, None, self.__order_candidates(slot), 0, len(self._trail)]
+
+        _, position, letters = best
+        letters.sort(key=lambda item: -item[0])
+
+        return [slot, position, [letter for _, letter in letters], 0, len(self._trail)]
+
+    def __assign_letter(self, slot: int, position: int, letter: str, stats: AutofillStats):
+        """
+        Restricts an entry, and the entry crossing it at a position, to the words with a letter in that cell
+        :return: False if some entry is left with no possible word
+        """
+
+        cell_entries = [(slot, position)] + [(other, other_position)
+                                             for crossing_position, other, other_position in self._crossings[slot]
+                                             if crossing_position == position]
+
+        for entry, entry_position in cell_entries:
+            self.__set_domain(entry, self._domains[entry] &
+                              self._domains_source.letter_mask(self._lengths[entry], entry_position, letter))
+            if self._domains[entry] == 0:
+                self._weights[entry] += 1
+                return False
+
+        return self.__propagate([entry for entry, _ in cell_entries], stats)
+
+    def __select_slot(self, assigned):
+        """
+        Picks the most constrained unassigned entry: the one with the fewest possible words
+        relative to how often it has been involved in dead ends
+        :return: the entry, or None if every entry is assigned
+        """
+
+        best_slot = None
+        best_score = None
+
+        for slot, domain in enumerate(self._domains):
+            if assigned[slot] is None:
+                count = _popcount(domain)
+                if count <= 1:
+                    return slot
+                score = count / self._weights[slot]
+                if best_score is None or score < best_score:
+                    best_slot, best_score = slot, score
+
+        return best_slot
+
+    def __order_candidates(self, slot: int):
+        """
+        Orders the possible words of an entry so the ones leaving the most options to the crossing
+        entries come first, scoring each word by the product of how many crossing words agree with
+        each of its letters. Ties keep the word list's order of preference.
+        :return: list of word indices
+        """
+
+        length = self._lengths[slot]
+        domain = self._domains[slot]
+
+        # Bitset to word indices
+        bits = np.frombuffer(domain.to_bytes((domain.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        candidates = np.flatnonzero(np.unpackbits(bits, bitorder='little'))
+
+        letters = self._domains_source.letters(length)[candidates]
+        scores = np.zeros(len(candidates))
+
+        for position, other, other_position in self._crossings[slot]:
+            other_domain = self._domains[other]
+            log_support = np.full(256, -np.inf)
+            for letter, mask in self._domains_source.letter_masks(self._lengths[other], other_position).items():
+                support = _popcount(other_domain & mask)
+                if support:
+                    log_support[ord(letter)] = np.log(support)
+            scores += log_support[letters[:, position]]
+
+        return candidates[np.argsort(-scores, kind='stable')].tolist()
+
+    def __assign(self, slot: int, word: int, assigned, stats: AutofillStats):
+        """
+        Restricts an entry to a single word, removes that word from the other entries of the same
+        length, and propagates the consequences
+        :return: False if some entry is left with no possible word
+        """
+
+        self.__set_domain(slot, 1 << word)
+
+        length = self._lengths[slot]
+        word_bit = 1 << word
+        changed = [slot]
+
+        if not self._allow_duplicates:
+            for other, other_length in enumerate(self._lengths):
+                if other != slot and other_length == length and assigned[other] is None \
+                        and self._domains[other] & word_bit:
+                    self.__set_domain(other, self._domains[other] & ~word_bit)
+                    if self._domains[other] == 0:
+                        self._weights[other] += 1
+                        return False
+                    changed.append(other)
+
+        return self.__propagate(changed, stats)
+
+    def __propagate(self, changed_slots, stats: AutofillStats):
+        """
+        Makes the crossings arc consistent, starting from the entries whose domains changed
+        :return: False if some entry is left with no possible word
+        """
+
+        # First in, first out: an entry waits while other changes to it pile up, so it is revised fewer times
+        queue = deque(changed_slots)
+        queued = set(queue)
+
+        while queue:
+
+            slot = queue.popleft()
+            queued.discard(slot)
+
+            domain = self._domains[slot]
+            length = self._lengths[slot]
+
+            for position, other, other_position in self._crossings[slot]:
+
+                stats.revisions += 1
+
+                # Letters this entry still allows in the shared cell, and the crossing words that agree
+                other_masks = self._domains_source.letter_masks(self._lengths[other], other_position)
+                supported = 0
+                for letter, mask in self._domains_source.letter_masks(length, position).items():
+                    if domain & mask and letter in other_masks:
+                        supported |= other_masks[letter]
+
+                other_domain = self._domains[other]
+                new_domain = other_domain & supported
+
+                if new_domain != other_domain:
+                    if new_domain == 0:
+                        self._weights[slot] += 1
+                        self._weights[other] += 1
+                        return False
+                    self.__set_domain(other, new_domain)
+                    if other not in queued:
+                        queue.append(other)
+                        queued.add(other)
+
+        return True
+
+    def __set_domain(self, slot: int, domain: int):
+        self._trail.append((slot, self._domains[slot]))
+        self._domains[slot] = domain
+
+    def __undo(self, trail_length: int):
+        """
+        Restores the domains to how they were when the trail had a given length
+        """
+        while len(self._trail) > trail_length:
+            slot, domain = self._trail.pop()
+            self._domains[slot] = domain
+
+    def __write_fill(self, assignment):
+        """
+        Writes the words found into the puzzle as a single batch, so one undo() reverts the whole fill
+        """
+        self._crossword_puzzle.solve_clues([(clue_no, is_across, self._domains_source.words(length)[word])
+                                            for (clue_no, is_across, cells), length, word
+                                            in zip(self._slots, self._lengths, assignment)])
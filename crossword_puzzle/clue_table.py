@@ -0,0 +1,154 @@
+from array import array
+
+import numpy as np
+
+from .utils import Clue
+
+
+class ClueTable:
+    """
+    The clues of many puzzles stored column by column, for analysing a corpus of clues. Each column is a
+    NumPy array with an element per clue, so clues can be filtered and aggregated with array operations
+    instead of visiting millions of Clue objects:
+
+    - puzzle_ids: index of the clue's puzzle, in the order the puzzles were added
+    - clue_nos, is_across: the clue's number and direction
+    - rows, cols: where the answer starts in the grid, -1 if the puzzle wasn't verified
+    - answer_lengths: total length of the answer
+    - enumeration_offsets, word_lengths: the lengths of the words in clue i's answer are
+      word_lengths[enumeration_offsets[i]:enumeration_offsets[i + 1]]
+    - text_ids: index of the clue's text in texts, a list holding each distinct clue text once,
+      so np.bincount(text_ids) counts how often each text is used
+    """
+
+    def __init__(self, puzzle_ids, clue_nos, is_across, rows, cols, answer_lengths, enumeration_offsets,
+                 word_lengths, text_ids, texts: list):
+        """
+        Use from_puzzles() to create a table
+        """
+
+        self.puzzle_ids = puzzle_ids
+        self.clue_nos = clue_nos
+        self.is_across = is_across
+        self.rows = rows
+        self.cols = cols
+        self.answer_lengths = answer_lengths
+        self.enumeration_offsets = enumeration_offsets
+        self.word_lengths = word_lengths
+        self.text_ids = text_ids
+        self.texts = texts
+
+    @classmethod
+    def from_puzzles(cls, puzzles):
+        """
+        Builds a table of the clues of several puzzles, reading them one at a time
+        :param puzzles: iterable of CrosswordPuzzle, e.g. a PuzzleArchive
+        :return: the ClueTable
+        """
+
+        # Columns are built up in compact arrays, so no Python objects are kept per clue while reading
+        puzzle_ids, clue_nos, is_across = array('I'), array('I'), array('b')
+        rows, cols, answer_lengths = array('h'), array('h'), array('H')
+        enumeration_offsets, word_lengths, text_ids = array('q', [0]), array('H'), array('I')
+
+        texts = []
+        text_id_map = {}
+
+        for puzzle_id, crossword_puzzle in enumerate(puzzles):
+            for clue_no, clue_is_across, clue in crossword_puzzle.get_clues():
+
+                text_id = text_id_map.get(clue.clue_text)
+                if text_id is None:
+                    text_id = text_id_map[clue.clue_text] = len(texts)
+                    texts.append(clue.clue_text)
+
+                puzzle_ids.append(puzzle_id)
+                clue_nos.append(clue_no)
+                is_across.append(clue_is_across)
+                rows.append(clue.pos[0])
+                cols.append(clue.pos[1])
+                answer_lengths.append(sum(clue.answer_len))
+                word_lengths.extend(clue.answer_len)
+                enumeration_offsets.append(len(word_lengths))
+                text_ids.append(text_id)
+
+        return cls(
+            puzzle_ids=np.array(puzzle_ids, dtype=np.uint32),
+            clue_nos=np.array(clue_nos, dtype=np.uint32),
+            is_across=np.array(is_across, dtype=bool),
+            rows=np.array(rows, dtype=np.int16),
+            cols=np.array(cols, dtype=np.int16),
+            answer_lengths=np.array(answer_lengths, dtype=np.uint16),
+            enumeration_offsets=np.array(enumeration_offsets, dtype=np.int64),
+            word_lengths=np.array(word_lengths, dtype=np.uint16),
+            text_ids=np.array(text_ids, dtype=np.uint32),
+            texts=texts
+        )
+
+    def __len__(self):
+        return len(self.clue_nos)
+
+    def text(self, index: int):
+        """
+        Gets the text of a clue
+        :param index: position of the clue in the table
+        :return: the clue text
+        """
+        return self.texts[self.text_ids[index]]
+
+    def answer_len(self, index: int):
+        """
+        Gets the lengths of the words in a clue's answer
+        :param index: position of the clue in the table
+        :return: list of word lengths, as in Clue.answer_len
+        """
+        return self.word_lengths[self.enumeration_offsets[index]:self.enumeration_offsets[index + 1]].tolist()
+
+    def clue(self, index: int):
+        """
+        Builds a Clue from a row of the table
+        :param index: position of the clue in the table
+        :return: the Clue
+        """
+        return Clue(self.text(index), self.answer_len(index), (int(self.rows[index]), int(self.cols[index])))
+
+    def select(self, selection):
+        """
+        Takes a subset of the clues, e.g. table.select(table.answer_lengths == 7)
+        :param selection: boolean mask with an element per clue, or array of the positions of the clues to take
+        :return: new ClueTable of the selected clues, sharing this table's texts
+        """
+
+        selection = np.asarray(selection)
+        indices = np.flatnonzero(selection) if selection.dtype == bool else selection
+
+        starts = self.enumeration_offsets[indices]
+        counts = self.enumeration_offsets[indices + 1] - starts
+
+        enumeration_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=enumeration_offsets[1:])
+
+        # Position in word_lengths of every word of the selected clues, in order
+        word_positions = np.repeat(starts - enumeration_offsets[:-1], counts) + np.arange(enumeration_offsets[-1])
+
+        return ClueTable(
+            puzzle_ids=self.puzzle_ids[indices],
+            clue_nos=self.clue_nos[indices],
+            is_across=self.is_across[indices],
+            rows=self.rows[indices],
+            cols=self.cols[indices],
+            answer_lengths=self.answer_lengths[indices],
+            enumeration_offsets=enumeration_offsets,
+            word_lengths=self.word_lengths[word_positions],
+            text_ids=self.text_ids[indices],
+            texts=self.texts
+        )
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the columns, not counting the texts
+        """
+        return sum(column.nbytes for column in (self.puzzle_ids, self.clue_nos, self.is_across, self.rows, self.cols,
+                                                self.answer_lengths, self.enumeration_offsets, self.word_lengths,
+                                                self.text_ids))
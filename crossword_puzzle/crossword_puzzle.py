@@ -1,7 +1,27 @@
-from .utils import Grid, Clue, ClueMetadata
+from .utils import Grid, Clue, is_cell_character, BLACK_CELL, WHITE_CELL
+from .slots import SlotLayout
 from .exceptions import *
 
 from collections import OrderedDict
+import struct
+
+import numpy as np
+
+# Binary format: magic number and version, then the number of rows and columns
+_BINARY_MAGIC = b"XWP\x01"
+_BINARY_HEADER = struct.Struct("<4sHH")
+
+# Each clue in the binary format: clue number, length of the clue text and number of words in the answer
+_BINARY_CLUE = struct.Struct("<IHB")
+
+# The largest clue text (in UTF-8 bytes), number of words and word length the clue fields can hold
+_BINARY_MAX_TEXT_SIZE = 0xFFFF
+_BINARY_MAX_WORD_COUNT = 0xFF
+_BINARY_MAX_WORD_LEN = 0xFFFF
+
+# Which of the codes stored for filled cells are letters, as a grid stores them
+_BINARY_LETTER_CODES = np.array([code > WHITE_CELL and is_cell_character(chr(code)) and ord(chr(code).upper()) == code
+                                 for code in range(256)])
 
 
 class CrosswordPuzzle:
@@ -11,6 +31,22 @@ class CrosswordPuzzle:
         self._clues_across_map: OrderedDict[int, Clue] = OrderedDict()
         self._clues_down_map: OrderedDict[int, Clue] = OrderedDict()
 
+        # Slots found when the grid was last verified, and the rows and columns changed since then
+        self._slot_layout: SlotLayout = None
+        self._dirty_rows: set[int] = set()
+        self._dirty_cols: set[int] = set()
+
+        # Clues that must be checked at the next verification: those numbered from _unverified_from
+        # (None if there aren't any) to _unverified_until (None for all of them), and those added since
+        self._unverified_from: int = 1
+        self._unverified_until: int = None
+        self._unverified_clues: set[tuple[int, bool]] = set()
+
+        # Changes to the letters in the grid that can be undone and redone, each as arrays of
+        # the rows, columns, previous codes and new codes of the cells that changed
+        self._undo_journal: list = []
+        self._redo_journal: list = []
+
     def print_data(self):
         """
         Pretty prints the data stored in this class
@@ -23,6 +59,140 @@ class CrosswordPuzzle:
         print("\nDOWN:\n")
         print('\n'.join([f"{pos}. {clue}" for pos, clue in self._clues_down_map.items()]))
 
+    def to_dict(self):
+        """
+        Converts the puzzle into the structure accepted by CrosswordJsonProcessor
+        :return: dictionary with the "grid", "across" and "down" data
+        """
+        return {
+            "grid": [['1' if code else '0' for code in row] for row in self._grid.array.tolist()],
+            "across": {str(clue_no): {"clue": clue.clue_text, "length": list(clue.answer_len)}
+                       for clue_no, clue in self._clues_across_map.items()},
+            "down": {str(clue_no): {"clue": clue.clue_text, "length": list(clue.answer_len)}
+                     for clue_no, clue in self._clues_down_map.items()}
+        }
+
+    def to_bytes(self):
+        """
+        Converts the puzzle into a compact binary form: a header with the grid's dimensions, the grid
+        structure packed one bit per cell, the letters filled in so far (a bit per cell marking the
+        filled cells, then their letters in reading order), and a length-prefixed table of the clues.
+        Raises ValueError if a clue is too long to be stored
+        :return: bytes accepted by from_bytes()
+        """
+
+        cells = self._grid.array
+        filled = cells > WHITE_CELL
+
+        parts = [
+            _BINARY_HEADER.pack(_BINARY_MAGIC, *cells.shape),
+            np.packbits(cells != BLACK_CELL).tobytes(),
+            np.packbits(filled).tobytes(),
+            cells[filled].tobytes()
+        ]
+
+        for clues_map in (self._clues_across_map, self._clues_down_map):
+            parts.append(struct.pack("<I", len(clues_map)))
+            for clue_no, clue in clues_map.items():
+                text = clue.clue_text.encode('utf-8')
+                self.__check_binary_clue(clue_no, clues_map is self._clues_across_map, text, clue.answer_len)
+                parts.append(_BINARY_CLUE.pack(clue_no, len(text), len(clue.answer_len)))
+                parts.append(text)
+                parts.append(struct.pack(f"<{len(clue.answer_len)}H", *clue.answer_len))
+
+        return b"".join(parts)
+
+    @staticmethod
+    def __check_binary_size(data, offset: int, size: int):
+        """
+        Checks that the data holds the size bytes from offset onwards, raising ValueError if it's truncated
+        """
+        if offset + size > len(data):
+            raise ValueError(f"Binary crossword puzzle is truncated: needed {offset + size} bytes, got {len(data)}")
+
+    @staticmethod
+    def __check_binary_clue(clue_no: int, is_across: bool, text: bytes, answer_len: list):
+        """
+        Checks that a clue fits in the fields of the binary format, raising ValueError naming the clue if it doesn't
+        """
+
+        clue_name = f"{clue_no} {'ACROSS' if is_across else 'DOWN'}"
+
+        if len(text) > _BINARY_MAX_TEXT_SIZE:
+            raise ValueError(f"Text of {clue_name} is {len(text)} bytes, "
+                             f"more than the {_BINARY_MAX_TEXT_SIZE} a binary puzzle can hold")
+        if len(answer_len) > _BINARY_MAX_WORD_COUNT:
+            raise ValueError(f"Answer of {clue_name} has {len(answer_len)} words, "
+                             f"more than the {_BINARY_MAX_WORD_COUNT} a binary puzzle can hold")
+        if any(word_len < 0 or word_len > _BINARY_MAX_WORD_LEN for word_len in answer_len):
+            raise ValueError(f"Answer of {clue_name} has a word length outside 0-{_BINARY_MAX_WORD_LEN}, "
+                             f"which a binary puzzle can't hold: {answer_len}")
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Builds a puzzle from the binary form created by to_bytes(), verifying that the clues align
+        with the structure of the grid. Raises ValueError if the data is truncated or corrupt
+        :param data: bytes, or any other buffer such as a memory-mapped region
+        :return: a fully built CrosswordPuzzle object
+        """
+
+        data = memoryview(data).cast('B')
+
+        cls.__check_binary_size(data, 0, _BINARY_HEADER.size)
+        magic, rows, cols = _BINARY_HEADER.unpack_from(data, 0)
+        if magic != _BINARY_MAGIC:
+            raise ValueError("Not a binary crossword puzzle")
+
+        offset = _BINARY_HEADER.size
+        cell_count = rows * cols
+        mask_size = (cell_count + 7) // 8
+
+        cls.__check_binary_size(data, offset, 2 * mask_size)
+        white = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=mask_size, offset=offset),
+                              count=cell_count).reshape(rows, cols)
+        offset += mask_size
+        filled = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=mask_size, offset=offset),
+                               count=cell_count).reshape(rows, cols).astype(bool)
+        offset += mask_size
+        filled_count = int(np.count_nonzero(filled))
+        cls.__check_binary_size(data, offset, filled_count)
+        letters = np.frombuffer(data, dtype=np.uint8, count=filled_count, offset=offset)
+        offset += filled_count
+
+        if np.any(filled & ~white.astype(bool)):
+            raise ValueError("Binary crossword puzzle has letters in black cells")
+
+        # Other codes would change the structure of the grid (0 and 1 are black and empty cells) or aren't letters
+        if not np.all(_BINARY_LETTER_CODES[letters]):
+            raise ValueError("Binary crossword puzzle has filled cells that aren't letters")
+
+        crossword_puzzle = cls()
+        crossword_puzzle.load_grid(white)
+        crossword_puzzle._grid.set_region(*np.nonzero(filled), letters)
+
+        for is_across in (True, False):
+            cls.__check_binary_size(data, offset, 4)
+            clue_count, = struct.unpack_from("<I", data, offset)
+            offset += 4
+            for _ in range(clue_count):
+                cls.__check_binary_size(data, offset, _BINARY_CLUE.size)
+                clue_no, text_size, word_count = _BINARY_CLUE.unpack_from(data, offset)
+                offset += _BINARY_CLUE.size
+                cls.__check_binary_size(data, offset, text_size + 2 * word_count)
+                try:
+                    clue_text = bytes(data[offset:offset + text_size]).decode('utf-8')
+                except UnicodeDecodeError:
+                    raise ValueError(f"Binary crossword puzzle has a clue text that isn't UTF-8 at byte {offset}")
+                offset += text_size
+                answer_len = list(struct.unpack_from(f"<{word_count}H", data, offset))
+                offset += 2 * word_count
+                crossword_puzzle.add_clue(clue_no, is_across, clue_text, answer_len)
+
+        crossword_puzzle.verify_and_sync()
+
+        return crossword_puzzle
+
     def set_grid(self, rows: int, cols: int):
         """
         Sets up the grid for the crossword clue
@@ -30,6 +200,15 @@ class CrosswordPuzzle:
         :param cols: number of cols in the grid
         """
         self._grid.create_grid(rows, cols)
+        self.__reset_slot_layout()
+
+    def load_grid(self, cells):
+        """
+        Sets up the grid and its structure from a 2D matrix in one call
+        :param cells: 2D matrix (nested lists or a NumPy array) where truthy values are white cells
+        """
+        self._grid.load_grid(cells)
+        self.__reset_slot_layout()
 
     def add_clue(self, clue_no: int, is_across: bool, clue_text: str, answer_len: list[int]):
         """
@@ -48,6 +227,7 @@ class CrosswordPuzzle:
             raise ClueAlreadyExistsError(clue_no, is_across)
 
         clues_map[clue_no] = new_clue
+        self._unverified_clues.add((clue_no, is_across))
 
     def remove_clue(self, clue_no: int, is_across: bool):
         """
@@ -70,53 +250,239 @@ class CrosswordPuzzle:
         :param is_across: True if across clue, False if down clue
         :param answer: answer
         """
+        self.solve_clues([(clue_no, is_across, answer)])
+
+    def solve_clues(self, answers):
+        """
+        Fills in a grid with the answers to several clues at once. Every answer is checked against
+        the grid and against the other answers before anything is written, so either all of them
+        are filled in or the grid is left as it was. The change can be reverted with undo().
+        An entry of a verified grid can be answered before it has a clue.
+        :param answers: iterable of (clue number, True if across clue, answer)
+        """
+
+        rows, cols, codes, owners, offsets = [], [], [], [], []
+        answers = [(clue_no, is_across, answer.upper()) for clue_no, is_across, answer in answers]
+
+        for i, (clue_no, is_across, answer) in enumerate(answers):
+
+            clue_map = self._clues_across_map if is_across else self._clues_down_map
+
+            if clue_no in clue_map:
+                cells = self.__clue_cells(clue_no, is_across, clue_map[clue_no])
+            else:
+                cells = self.__entry_cells(clue_no, is_across)
+                if cells is None:
+                    raise ClueDoesNotExistError(clue_no, is_across)
+
+            if len(answer) != len(cells):
+                raise AnswerDoesNotFitError(answer, len(cells), len(answer))
+
+            for offset, (char, (row, col)) in enumerate(zip(answer, cells)):
+                # Verify that the input is a single character
+                if not is_cell_character(char):
+                    raise AnswerFormatError(char, row, col)
+                rows.append(row)
+                cols.append(col)
+                codes.append(ord(char))
+                owners.append(i)
+                offsets.append(offset)
+
+        if not codes:
+            return
+
+        rows = np.array(rows, dtype=np.intp)
+        cols = np.array(cols, dtype=np.intp)
+        codes = np.array(codes, dtype=np.uint8)
+        owners = np.array(owners, dtype=np.intp)
+
+        current_codes = self._grid.get_region(rows, cols)
+
+        # Cells that aren't meant to have a character - programmer error
+        black = np.flatnonzero(current_codes == BLACK_CELL)
+        if len(black):
+            raise BlackCellModificationError(int(rows[black[0]]), int(cols[black[0]]))
+
+        # Characters already in the grid that an answer won't work with
+        clashes = np.flatnonzero((current_codes != WHITE_CELL) & (current_codes != codes))
+        if len(clashes):
+            clue_no, is_across, answer = answers[owners[clashes[0]]]
+            raise AnswerHasConflictingCharacter(clue_no, is_across, answer, offsets[clashes[0]])
+
+        # Answers in the batch that disagree on a cell they share
+        cell_ids = rows * self._grid.length_cols() + cols
+        order = np.argsort(cell_ids, kind='stable')
+        disagreements = np.flatnonzero((cell_ids[order][1:] == cell_ids[order][:-1]) &
+                                       (codes[order][1:] != codes[order][:-1]))
+        if len(disagreements):
+            first, second = order[disagreements[0]], order[disagreements[0] + 1]
+            clue_no, is_across, _ = answers[owners[first]]
+            other_clue_no, other_is_across, _ = answers[owners[second]]
+            raise AnswersConflictError(clue_no, is_across, other_clue_no, other_is_across,
+                                       int(rows[first]), int(cols[first]))
+
+        # Only record and write the cells that actually change, and nothing at all if every answer is already in
+        changed = current_codes != codes
+        if not changed.any():
+            return
+
+        _, unique = np.unique(cell_ids[changed], return_index=True)
+
+        self.__apply_delta(rows[changed][unique], cols[changed][unique], current_codes[changed][unique],
+                           codes[changed][unique])
+
+    def undo(self):
+        """
+        Reverts the most recent change to the letters in the grid
+        :return: True if a change was reverted, False if there was nothing to undo
+        """
+
+        if not self._undo_journal:
+            return False
+
+        rows, cols, old_codes, new_codes = self._undo_journal.pop()
+        self._grid.set_region(rows, cols, old_codes)
+        self._redo_journal.append((rows, cols, old_codes, new_codes))
+
+        return True
+
+    def redo(self):
+        """
+        Re-applies the most recently undone change to the letters in the grid
+        :return: True if a change was re-applied, False if there was nothing to redo
+        """
 
-        answer = answer.upper()
+        if not self._redo_journal:
+            return False
+
+        rows, cols, old_codes, new_codes = self._redo_journal.pop()
+        self._grid.set_region(rows, cols, new_codes)
+        self._undo_journal.append((rows, cols, old_codes, new_codes))
+
+        return True
+
+    def get_clue(self, clue_no: int, is_across: bool):
+        """
+        Gets a clue of the crossword puzzle
+        :param clue_no: clue number
+        :param is_across: True if across clue, False if down clue
+        :return: the Clue
+        """
 
         clue_map = self._clues_across_map if is_across else self._clues_down_map
 
         if clue_no not in clue_map:
             raise ClueDoesNotExistError(clue_no, is_across)
 
-        answer_len = len(answer)
-        expected_answer_len = sum(clue_map[clue_no].answer_len)
+        return clue_map[clue_no]
+
+    def get_clues(self):
+        """
+        Lists every clue of the crossword puzzle
+        :return: list of (clue number, is_across, Clue) in the order the clues were added, across before down
+        """
+
+        return [(clue_no, True, clue) for clue_no, clue in self._clues_across_map.items()] + \
+               [(clue_no, False, clue) for clue_no, clue in self._clues_down_map.items()]
+
+    def get_answer_pattern(self, clue_no: int, is_across: bool):
+        """
+        Gets the letters already in the grid for an entry
+        :param clue_no: clue number
+        :param is_across: True if across clue, False if down clue
+        :return: string with the letter of each cell of the entry in answer order, '?' for empty cells
+        """
+
+        return "".join('?' if value == '1' else value
+                       for value in (self.get_cell(row, col) for row, col in self.get_clue_cells(clue_no, is_across)))
+
+    def get_clue_cells(self, clue_no: int, is_across: bool):
+        """
+        Gets the cells that the answer to a clue occupies
+        :param clue_no: clue number
+        :param is_across: True if across clue, False if down clue
+        :return: list of (row, col) positions in answer order
+        """
+
+        cells = self.__verified_slot_layout().crossing_index.clue_cells(clue_no, is_across)
+
+        if cells is None:
+            raise ClueDoesNotExistError(clue_no, is_across)
+
+        return cells
 
-        if answer_len != expected_answer_len:
-            raise AnswerDoesNotFitError(answer, expected_answer_len, len(answer))
+    def get_crossing_clues(self, row: int, col: int):
+        """
+        Gets the across and down entries passing through a cell
+        :param row: row in the crossword
+        :param col: column in the crossword
+        :return: (clue number, offset into the answer) for the across entry and for the down entry,
+                 each None if no entry passes through the cell
+        """
 
-        clue_pos_row, clue_pos_col = clue_map[clue_no].pos
+        return self.__verified_slot_layout().crossing_index.clues_at(row, col)
 
-        for i, char in enumerate(answer):
+    def get_entries(self):
+        """
+        Lists every entry in the grid (a run of two or more white cells), whether or not it has a clue
+        :return: list of (clue number, is_across) in clue number order, across before down
+        """
 
-            current_row = clue_pos_row
-            current_col = clue_pos_col
+        slot_layout = self.__verified_slot_layout()
 
-            if is_across:
-                current_col += i
-            else:
-                current_row += i
+        return [(clue_no, True) for clue_no in slot_layout.across_metadata] + \
+               [(clue_no, False) for clue_no in slot_layout.down_metadata]
 
-            try:
+    def get_cell(self, row: int, col: int):
+        """
+        Gets the value of a cell in the grid
+        :param row: row in the crossword
+        :param col: column in the crossword
+        :return: '0' for a black cell, '1' for an empty white cell, or the letter filled in
+        """
+        return self._grid.get_grid_cell(row, col)
 
-                self.fill_cell(current_row, current_col, char)
+    def __verified_slot_layout(self):
+        """
+        Gets the slots of the grid, which are only valid if its structure hasn't changed since it was last verified
+        """
 
-            except InputClashesWithExistingEntryError:
+        if self._slot_layout is None or self._dirty_rows or self._dirty_cols:
+            raise PuzzleNotVerifiedError()
 
-                # Revert the answer that was being inputted
-                for j in range(i):
+        return self._slot_layout
 
-                    current_row = clue_pos_row
-                    current_col = clue_pos_col
+    def __entry_cells(self, clue_no: int, is_across: bool):
+        """
+        Gets the cells of an entry from the crossing index
+        :return: list of (row, col) positions in answer order, or None if the grid hasn't been verified
+                 since it last changed or has no such entry
+        """
 
-                    if is_across:
-                        current_col += j
-                    else:
-                        current_row += j
+        if self._slot_layout is None or self._dirty_rows or self._dirty_cols:
+            return None
 
-                    self.clear_cell(current_row, current_col)
+        return self._slot_layout.crossing_index.clue_cells(clue_no, is_across)
 
-                # Relay that the answer didn't work
-                raise AnswerHasConflictingCharacter(clue_no, is_across, answer, i)
+    def __clue_cells(self, clue_no: int, is_across: bool, clue: Clue):
+        """
+        Gets the cells of a clue from the crossing index, or from its position if the grid
+        hasn't been verified since it last changed
+        """
+
+        length = sum(clue.answer_len)
+
+        if self._slot_layout is not None and not (self._dirty_rows or self._dirty_cols):
+            cells = self._slot_layout.crossing_index.clue_cells(clue_no, is_across)
+            if cells is not None and len(cells) == length:
+                return cells
+
+        row, col = clue.pos
+
+        if is_across:
+            return [(row, col + i) for i in range(length)]
+        else:
+            return [(row + i, col) for i in range(length)]
 
     def fill_cell(self, row: int, col: int, char: str):
         """
@@ -127,7 +493,7 @@ class CrosswordPuzzle:
         """
 
         # Verify that the input is a single character
-        if not (len(char) == 1 and char.isalpha()):
+        if not is_cell_character(char):
             raise AnswerFormatError(char, row, col)
 
         char = char.upper()
@@ -136,7 +502,7 @@ class CrosswordPuzzle:
 
         if current_cell_value == '1':
             # Cell is available: fill it in
-            self._grid.fill_grid_cell(row, col, char)
+            self.__apply_delta(row, col, WHITE_CELL, ord(char))
         elif current_cell_value == '0':
             # Cell isn't meant to have a character - programmer error
             raise BlackCellModificationError(row, col)
@@ -159,7 +525,9 @@ class CrosswordPuzzle:
             # Cell isn't meant to have a character - programmer error
             raise BlackCellModificationError(row, col)
 
-        self._grid.clear_grid_cell(row, col)
+        if current_cell_value != '1':
+            # Only the letter is removed: the cell stays white, so the grid structure is unchanged
+            self.__apply_delta(row, col, ord(current_cell_value), WHITE_CELL)
 
     def turn_cell_white(self, row: int, col: int):
         """
@@ -167,6 +535,13 @@ class CrosswordPuzzle:
         :param row: row in the crossword
         :param col: column in the crossword
         """
+        if self._grid.array[row, col] == BLACK_CELL:
+            self.__mark_dirty(row, col)
+        elif self._grid.array[row, col] != WHITE_CELL:
+            # Erasing the letter outside the journal means earlier changes can't be undone reliably
+            self._undo_journal.clear()
+            self._redo_journal.clear()
+
         self._grid.set_grid_cell(row, col)
 
     def turn_cell_black(self, row: int, col: int):
@@ -175,138 +550,104 @@ class CrosswordPuzzle:
         :param row: row in the crossword
         :param col: column in the crossword
         """
+        if self._grid.array[row, col] != BLACK_CELL:
+            self.__mark_dirty(row, col)
+
         self._grid.clear_grid_cell(row, col)
 
     def verify_and_sync(self):
         """
         Verifies that the grid structure matches the clues stored inside the puzzle.
         If successful, updates the clues to store information on where they are in the grid.
+        After the first call, only the slots affected by cells turning black or white since the
+        previous call are re-derived, and only the clues they may have renumbered are checked again.
         """
 
-        across_clues_metadata, down_clues_metadata = self.__get_metadata_all()
-
-        self.__verify_clues(self._clues_across_map, across_clues_metadata, is_across=True)
-        self.__verify_clues(self._clues_down_map, down_clues_metadata, is_across=False)
-
-    def __get_metadata_all(self):
-        """
-        Uses the grid to fill out the across/down maps with Clue objects with their
-        corresponding metadata (position and length)
-        :return: metadata for across and down clues
-        """
-
-        across_metadata = self.__get_metadata_set(is_across=True)
-        down_metadata = self.__get_metadata_set(is_across=False)
+        assert self._grid.array is not None
 
-        # Create and enumerate the clues
+        if self._slot_layout is None:
+            self._slot_layout = SlotLayout(self._grid.array)
+        elif self._dirty_rows or self._dirty_cols:
+            previous_count = self._slot_layout.count
+            first_changed_no = self._slot_layout.update(self._grid.array, self._dirty_rows, self._dirty_cols)
 
-        clue_no = 1
-        enumerated_across_metadata = {}
-        enumerated_down_metadata = {}
+            # Clues from the first renumbered slot up to the last number before or after the change may be affected
+            if first_changed_no is not None:
+                if self._unverified_from is None:
+                    self._unverified_from, self._unverified_until = first_changed_no, 0
+                else:
+                    self._unverified_from = min(self._unverified_from, first_changed_no)
+                if self._unverified_until is not None:
+                    self._unverified_until = max(self._unverified_until, previous_count, self._slot_layout.count)
 
-        while across_metadata or down_metadata:
+        self._dirty_rows.clear()
+        self._dirty_cols.clear()
 
-            # Assign the rest of the clue numbers
-            if not across_metadata:
-                while down_metadata:
-                    enumerated_down_metadata[clue_no] = down_metadata.pop(0)
-                    clue_no += 1
-            elif not down_metadata:
-                while across_metadata:
-                    enumerated_across_metadata[clue_no] = across_metadata.pop(0)
-                    clue_no += 1
-            # Compare the positions of the across and down clues
-            elif across_metadata[0] < down_metadata[0]:
-                enumerated_across_metadata[clue_no] = across_metadata.pop(0)
-                clue_no += 1
-            elif across_metadata[0] > down_metadata[0]:
-                enumerated_down_metadata[clue_no] = down_metadata.pop(0)
-                clue_no += 1
-            else:
-                enumerated_across_metadata[clue_no] = across_metadata.pop(0)
-                enumerated_down_metadata[clue_no] = down_metadata.pop(0)
-                clue_no += 1
+        self.__verify_clues(self._clues_across_map, self._slot_layout.across_metadata, is_across=True)
+        self.__verify_clues(self._clues_down_map, self._slot_layout.down_metadata, is_across=False)
 
-        return enumerated_across_metadata, enumerated_down_metadata
+        self._unverified_from = None
+        self._unverified_until = None
+        self._unverified_clues.clear()
 
-    def __get_metadata_set(self, is_across: bool):
+    def __apply_delta(self, rows, cols, old_codes, new_codes):
         """
-        Generates a list of ClueMetadata based on the layout of a grid
-        :param is_across: indicate metadata generation for either Across or Down clues
-        :return: list of ClueMetadata
+        Writes new letters into cells, recording the change so it can be undone
+        :param rows: row, or array of rows, of the cells to change
+        :param cols: column, or array of columns, of the cells to change
+        :param old_codes: current code, or array of codes, of the cells
+        :param new_codes: code, or array of codes, to write into the cells
         """
+        self._grid.set_region(rows, cols, new_codes)
+        self._undo_journal.append((rows, cols, old_codes, new_codes))
+        self._redo_journal.clear()
 
-        metadata_set = []
-
-        if is_across:
-            row_length = self._grid.length_cols()
-            grid_data = self._grid.data
-        else:
-            row_length = self._grid.length_rows()
-            grid_data = map(list, zip(*self._grid.data))
-
-        for i, row in enumerate(grid_data):
-
-            # Two pointers
-            p1 = p2 = 0
-
-            while p1 < row_length:
-                if p1 == p2:
-                    # Searching for a new word
-                    if row[p1] != '0':
-                        # 1st pointer is on a white cell
-                        p2 += 1
-                    else:
-                        # 1st pointer is on a black cell
-                        p1 += 1
-                        p2 += 1
-                else:
-                    if p2 == row_length:
-                        # End of row
-                        word_length = p2 - p1
-                        if word_length > 1:
-                            # We've got a word, store the information
-                            position = (i, p1)
-                            metadata_set.append(ClueMetadata(position, word_length))
-                        # 1st pointer set to 2nd (ending loop)
-                        p1 = p2
-                    else:
-                        # Check if we have a white cell
-                        if row[p2] != '0':
-                            # White cell found
-                            p2 += 1
-                        else:
-                            # End of row
-                            word_length = p2 - p1
-                            if word_length > 1:
-                                # We've got a word, store the information
-                                position = (i, p1)
-                                metadata_set.append(ClueMetadata(position, word_length))
-
-                            # 1st pointer set to 2nd
-                            p1 = p2
-
-        # Down clues will have their position flipped which must be corrected
-        # i.e. position = (p1, i) instead of (i, p1)
-        if not is_across:
-            for metadata in metadata_set:
-                metadata.pos = tuple(reversed(metadata.pos))
-
-        # Sort metadata by position
-        metadata_set.sort()
-
-        return metadata_set
+    def __mark_dirty(self, row: int, col: int):
+        """
+        Records that a cell has turned black or white, so its row and column need re-deriving.
+        Letters changed before then can no longer be undone.
+        """
+        self._dirty_rows.add(row)
+        self._dirty_cols.add(col)
+        self._undo_journal.clear()
+        self._redo_journal.clear()
 
-    @staticmethod
-    def __verify_clues(clues_map, clues_metadata, is_across):
+    def __reset_slot_layout(self):
+        """
+        Forgets the slots found so far, so the next verification starts from scratch
         """
-        Checks if a map of enumerated Clues matches a map of enumerated ClueMetadata,
-        and updates the Clues' positions if successful
+        self._undo_journal.clear()
+        self._redo_journal.clear()
+        self._slot_layout = None
+        self._dirty_rows.clear()
+        self._dirty_cols.clear()
+        self._unverified_from = 1
+        self._unverified_until = None
+
+    def __verify_clues(self, clues_map, clues_metadata, is_across):
+        """
+        Checks if the unverified Clues in a map of enumerated Clues match a map of enumerated
+        ClueMetadata, and updates the Clues' positions if successful
         :param clues_map: map of clue numbers to clues
         :param clues_metadata: map of clue numbers to clue metadata
         """
 
-        for clue_no, clue in clues_map.items():
+        added_numbers = [clue_no for clue_no, clue_is_across in self._unverified_clues
+                         if clue_is_across == is_across and clue_no in clues_map]
+
+        if self._unverified_from is None:
+            unverified_numbers = added_numbers
+        elif self._unverified_until is None:
+            unverified_numbers = [clue_no for clue_no in clues_map if clue_no >= self._unverified_from]
+            unverified_numbers += [clue_no for clue_no in added_numbers if clue_no < self._unverified_from]
+        else:
+            unverified_range = range(self._unverified_from, self._unverified_until + 1)
+            unverified_numbers = [clue_no for clue_no in unverified_range if clue_no in clues_map]
+            unverified_numbers += [clue_no for clue_no in added_numbers if clue_no not in unverified_range]
+
+        for clue_no in unverified_numbers:
+
+            clue = clues_map[clue_no]
 
             # Check if the grid expects a clue
             if clue_no not in clues_metadata:
@@ -36,6 +36,12 @@ class BlackCellModificationError(PuzzleDevelopmentError):
         return f"Attempted to modify a black cell. Row: {self.row} Col: {self.col}"
 
 
+class PuzzleNotVerifiedError(PuzzleDevelopmentError):
+
+    def __str__(self):
+        return "The grid has changed since it was last verified. Call verify_and_sync() first"
+
+
 class GridVerificationError(CrosswordPuzzleError):
     pass
 
@@ -111,3 +117,18 @@ class AnswerHasConflictingCharacter(AnswerInputError):
     def __str__(self):
         return f"Answer of {self.answer_text} does not fit for {self.clue_no} {self.clue_type}. " \
                f"Conflict with the existing grid at character {self.conflict_pos}"
+
+
+class AnswersConflictError(AnswerInputError):
+
+    def __init__(self, clue_no: int, is_across: bool, other_clue_no: int, other_is_across: bool, row: int, col: int):
+        self.clue_no = clue_no
+        self.clue_type = "ACROSS" if is_across else "DOWN"
+        self.other_clue_no = other_clue_no
+        self.other_clue_type = "ACROSS" if other_is_across else "DOWN"
+        self.row = row
+        self.col = col
+
+    def __str__(self):
+        return f"Answers for {self.clue_no} {self.clue_type} and {self.other_clue_no} {self.other_clue_type} " \
+               f"disagree on the cell at Row: {self.row} Col: {self.col}"
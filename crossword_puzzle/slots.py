@@ -0,0 +1,332 @@
+import numpy as np
+
+from .utils import ClueMetadata, BLACK_CELL
+
+
+def find_slots(cells):
+    """
+    Finds and numbers every across and down slot (a run of two or more white cells) in a grid.
+    Runs are extracted for all rows and columns at once, and the clue numbers are assigned in a
+    single pass over the cells in reading order.
+    :param cells: 2D NumPy array of cell codes from Grid.array
+    :return: maps of clue numbers to ClueMetadata for the across and down slots
+    """
+
+    slot_layout = SlotLayout(cells)
+
+    return slot_layout.across_metadata, slot_layout.down_metadata
+
+
+def find_runs(white, min_length: int = 2):
+    """
+    Finds the runs of white cells along every row of a grid
+    :param white: 2D boolean NumPy array, True for white cells
+    :param min_length: shortest run to include
+    :return: arrays of the row, starting column and length of each run, in reading order
+    """
+
+    rows, cols = white.shape
+
+    # Pad each row with black cells, so every run has a start and an end within the row
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = white
+    edges = np.diff(padded, axis=1)
+
+    # Runs start where black turns to white and end where white turns to black. Both lists
+    # are in reading order, so the n-th start belongs to the n-th end
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+
+    lengths = end_cols - start_cols
+    is_slot = lengths >= min_length
+
+    return start_rows[is_slot], start_cols[is_slot], lengths[is_slot]
+
+
+def slot_lengths(white):
+    """
+    Finds the length of the slot starting at each cell along the rows of a grid
+    :param white: 2D boolean NumPy array, True for white cells
+    :return: 2D NumPy array of the same shape, 0 where no slot starts
+    """
+
+    lengths = np.zeros(white.shape, dtype=np.int32)
+    rows, cols, run_lengths = find_runs(white)
+    lengths[rows, cols] = run_lengths
+
+    return lengths
+
+
+class SlotLayout:
+    """
+    The numbered across and down slots of a grid. After cells turn black or white, it can be
+    updated by re-deriving only the rows and columns that changed.
+    """
+
+    def __init__(self, cells):
+        """
+        :param cells: 2D NumPy array of cell codes from Grid.array
+        """
+
+        white = cells != BLACK_CELL
+
+        self.shape = white.shape
+
+        # Length of the across/down slot starting at each cell (0 if none), and the clue number of each cell
+        self._across_lengths = slot_lengths(white)
+        self._down_lengths = np.ascontiguousarray(slot_lengths(white.T).T)
+        self._numbers = np.zeros(self.shape, dtype=np.int32)
+        self._count = 0
+
+        self.across_metadata = {}
+        self.down_metadata = {}
+        self.crossing_index = CrossingIndex(self.shape)
+
+        self.__renumber_from(0)
+
+    @property
+    def count(self):
+        """
+        The number of numbered cells, i.e. the highest clue number
+        """
+        return self._count
+
+    def update(self, cells, dirty_rows, dirty_cols):
+        """
+        Re-derives the slots after cells have turned black or white, renumbering the clues
+        from the first slot that changed onward
+        :param cells: 2D NumPy array of cell codes from Grid.array, with the same shape as before
+        :param dirty_rows: indices of the rows containing cells that changed
+        :param dirty_cols: indices of the columns containing cells that changed
+        :return: the first clue number that may have changed, or None if no slot changed
+        """
+
+        cols = self.shape[1]
+        first_changed = None
+
+        # Across slots can only change in dirty rows, and down slots in dirty columns
+        for is_across, indices in ((True, dirty_rows), (False, dirty_cols)):
+
+            if not indices:
+                continue
+
+            lengths = self._across_lengths if is_across else self._down_lengths.T
+            lines = cells if is_across else cells.T
+
+            indices = np.fromiter(indices, dtype=np.intp, count=len(indices))
+            new_lengths = slot_lengths(lines[indices] != BLACK_CELL)
+            changed_lines, changed_positions = np.nonzero(new_lengths != lengths[indices])
+
+            if len(changed_lines) == 0:
+                continue
+
+            lengths[indices] = new_lengths
+
+            # Find the first change in reading order
+            if is_across:
+                changed = indices[changed_lines] * cols + changed_positions
+            else:
+                changed = changed_positions * cols + indices[changed_lines]
+
+            first = int(changed.min())
+            first_changed = first if first_changed is None else min(first_changed, first)
+
+        if first_changed is None:
+            return None
+
+        return self.__renumber_from(first_changed)
+
+    def __renumber_from(self, first_cell: int):
+        """
+        Renumbers the slots starting at or after a cell
+        :param first_cell: index of the cell in reading order
+        :return: the first clue number that was reassigned
+        """
+
+        cols = self.shape[1]
+        numbers = self._numbers.reshape(-1)
+        across_lengths = self._across_lengths.reshape(-1)
+        down_lengths = self._down_lengths.reshape(-1)
+
+        # Numbers before the first changed cell stay the same, so carry on from the last of them
+        previously_numbered = np.flatnonzero(numbers[first_cell:])
+        first_number = int(numbers[first_cell + previously_numbered[0]]) if len(previously_numbered) \
+            else self._count + 1
+
+        # Number every cell that starts a slot, in reading order
+        numbered = np.flatnonzero((across_lengths[first_cell:] > 0) | (down_lengths[first_cell:] > 0)) + first_cell
+        numbers[first_cell:] = 0
+        numbers[numbered] = np.arange(first_number, first_number + len(numbered))
+        self._count = first_number + len(numbered) - 1
+
+        # Rebuild the metadata of the renumbered slots
+        new_across_metadata = {}
+        new_down_metadata = {}
+
+        for lengths, metadata, new_metadata in ((across_lengths, self.across_metadata, new_across_metadata),
+                                                (down_lengths, self.down_metadata, new_down_metadata)):
+
+            _remove_from(metadata, first_number)
+
+            starts = numbered[lengths[numbered] > 0]
+            start_rows, start_cols = np.divmod(starts, cols)
+
+            for clue_no, row, col, length in zip(numbers[starts].tolist(), start_rows.tolist(),
+                                                 start_cols.tolist(), lengths[starts].tolist()):
+                new_metadata[clue_no] = ClueMetadata((row, col), length)
+
+            metadata.update(new_metadata)
+
+        self.crossing_index.replace_from(first_number, new_across_metadata, new_down_metadata)
+
+        return first_number
+
+
+class CrossingIndex:
+    """
+    Precomputed lookups between the cells of a grid and the slots passing through them
+    """
+
+    def __init__(self, shape: tuple[int, int]):
+        """
+        :param shape: number of rows and columns in the grid
+        """
+
+        # For each direction, the clue number (0 if none) and offset within that clue of every cell
+        self._numbers = {}
+        self._offsets = {}
+
+        # For each direction, the rows and columns of the cells of every slot one after another in
+        # clue number order, and where each slot's cells start and end. A cell belongs to at most one
+        # slot per direction, so room for every cell in the grid is reserved up front
+        self._cells = {}
+        self._cell_counts = {}
+        self._slot_bounds = {}
+
+        for is_across in (True, False):
+            self._numbers[is_across] = np.zeros(shape, dtype=np.int32)
+            self._offsets[is_across] = np.zeros(shape, dtype=np.int32)
+            self._cells[is_across] = np.zeros((2, shape[0] * shape[1]), dtype=np.int32)
+            self._cell_counts[is_across] = 0
+            self._slot_bounds[is_across] = {}
+
+    def replace_from(self, first_number: int, across_metadata: dict, down_metadata: dict):
+        """
+        Replaces the slots numbered from first_number onward
+        :param first_number: the first clue number being replaced
+        :param across_metadata: map of clue numbers to ClueMetadata for the new across slots
+        :param down_metadata: map of clue numbers to ClueMetadata for the new down slots
+        """
+
+        for is_across, metadata in ((True, across_metadata), (False, down_metadata)):
+
+            numbers = self._numbers[is_across]
+            offsets = self._offsets[is_across]
+            slot_bounds = self._slot_bounds[is_across]
+            cells = self._cells[is_across]
+            cell_count = self._cell_counts[is_across]
+
+            # Slots are stored in clue number order, so the replaced slots are at the end
+            removed_bounds = _remove_from(slot_bounds, first_number)
+            kept_cells = removed_bounds[-1][0] if removed_bounds else cell_count
+
+            removed_rows, removed_cols = cells[:, kept_cells:cell_count]
+            numbers[removed_rows, removed_cols] = 0
+            offsets[removed_rows, removed_cols] = 0
+
+            rows, cols, slot_offsets, slot_numbers, slot_starts, slot_ends = _expand_slots(metadata, is_across)
+            numbers[rows, cols] = slot_numbers
+            offsets[rows, cols] = slot_offsets
+
+            cell_count = kept_cells + len(rows)
+            cells[0, kept_cells:cell_count] = rows
+            cells[1, kept_cells:cell_count] = cols
+            self._cell_counts[is_across] = cell_count
+
+            slot_bounds.update(zip(metadata.keys(), zip((slot_starts + kept_cells).tolist(),
+                                                        (slot_ends + kept_cells).tolist())))
+
+    def clues_at(self, row: int, col: int):
+        """
+        Gets the slots passing through a cell
+        :param row: row in the crossword
+        :param col: column in the crossword
+        :return: (clue number, offset) of the across slot and of the down slot, each None if there isn't one
+        """
+
+        crossing = []
+
+        for is_across in (True, False):
+            clue_no = int(self._numbers[is_across][row, col])
+            crossing.append((clue_no, int(self._offsets[is_across][row, col])) if clue_no else None)
+
+        return tuple(crossing)
+
+    def clue_cells(self, clue_no: int, is_across: bool):
+        """
+        Gets the cells of a slot
+        :param clue_no: clue number
+        :param is_across: across or down clue
+        :return: list of (row, col) positions in answer order, or None if the grid has no such slot
+        """
+
+        if clue_no not in self._slot_bounds[is_across]:
+            return None
+
+        start, end = self._slot_bounds[is_across][clue_no]
+        rows, cols = self._cells[is_across][:, start:end].tolist()
+
+        return list(zip(rows, cols))
+
+    def clue_numbers(self, is_across: bool):
+        """
+        The clue number of the slot passing through each cell in one direction (0 if there isn't one)
+        :param is_across: across or down slots
+        :return: 2D NumPy array
+        """
+        return self._numbers[is_across]
+
+
+def _remove_from(numbered_map: dict, first_number: int):
+    """
+    Removes the entries numbered from first_number onward from a map ordered by clue number
+    :return: list of the removed values, from the last to the first
+    """
+
+    removed_numbers = []
+
+    for clue_no in reversed(numbered_map):
+        if clue_no < first_number:
+            break
+        removed_numbers.append(clue_no)
+
+    return [numbered_map.pop(clue_no) for clue_no in removed_numbers]
+
+
+def _expand_slots(metadata: dict, is_across: bool):
+    """
+    Lists every cell covered by a set of slots, in slot order
+    :return: arrays of the row, column, offset within the slot and clue number of each cell,
+             and arrays of the index of each slot's first cell and the index after its last cell
+    """
+
+    count = len(metadata)
+    numbers = np.fromiter(metadata.keys(), dtype=np.int32, count=count)
+    rows = np.fromiter((clue_metadata.pos[0] for clue_metadata in metadata.values()), dtype=np.intp, count=count)
+    cols = np.fromiter((clue_metadata.pos[1] for clue_metadata in metadata.values()), dtype=np.intp, count=count)
+    lengths = np.fromiter((clue_metadata.length for clue_metadata in metadata.values()), dtype=np.intp, count=count)
+
+    # Offset of each cell within its slot: its overall index minus the index of its slot's first cell
+    slot_ends = np.cumsum(lengths)
+    slot_starts = slot_ends - lengths
+    offsets = np.arange(lengths.sum()) - np.repeat(slot_starts, lengths)
+
+    cell_rows = np.repeat(rows, lengths)
+    cell_cols = np.repeat(cols, lengths)
+
+    if is_across:
+        cell_cols += offsets
+    else:
+        cell_rows += offsets
+
+    return cell_rows, cell_cols, offsets, np.repeat(numbers, lengths), slot_starts, slot_ends
@@ -1,10 +1,30 @@
+import numpy as np
+
+# Cells are stored as one byte each: 0 for a black cell, 1 for an empty white cell,
+# and the character code of the letter for a filled cell
+BLACK_CELL = 0
+WHITE_CELL = 1
+
+# Lookup table from a cell's code to the value it represents
+_CELL_VALUES = ['0', '1'] + [chr(code) for code in range(2, 256)]
+
+
+def is_cell_character(char: str):
+    """
+    Checks whether a character can be filled into a cell
+    :param char: the character
+    :return: True if it's a single letter that can be stored in the grid
+    """
+    return len(char) == 1 and char.isalpha() and len(char.upper()) == 1 and ord(char.upper()) < 256
+
+
 class Grid:
 
     def __init__(self):
         self._data = None
 
     def __str__(self):
-        return "\n".join(map(" ".join, self._data))
+        return "\n".join(map(" ".join, self.data))
 
     def create_grid(self, rows: int, cols: int):
         """
@@ -12,12 +32,45 @@ class Grid:
         :param rows: number of rows in the grid
         :param cols: number of columns in the grid
         """
-        self._data = [['0'] * cols for _ in range(rows)]
+        self._data = np.zeros((rows, cols), dtype=np.uint8)
+
+    def load_grid(self, cells):
+        """
+        Replaces the whole grid with the structure given by a 2D matrix in one call
+        :param cells: 2D matrix (nested lists or a NumPy array) where truthy values are white cells
+        """
+        self._data = np.asarray(cells).astype(bool).astype(np.uint8)
+
+    def copy(self):
+        """
+        Creates an independent copy of the grid
+        :return: the new Grid
+        """
+        grid = Grid()
+        grid._data = None if self._data is None else self._data.copy()
+        return grid
 
     @property
     def data(self):
+        """
+        The grid as a 2D list of '0' (black cell), '1' (white cell) or a letter
+        """
+        return [[_CELL_VALUES[code] for code in row] for row in self._data.tolist()]
+
+    @property
+    def array(self):
+        """
+        The grid as a 2D NumPy array of cell codes (BLACK_CELL, WHITE_CELL or a character code)
+        """
         return self._data
 
+    @property
+    def transposed(self):
+        """
+        A view of the grid's array with rows and columns swapped, without copying it
+        """
+        return self._data.T
+
     def get_grid_cell(self, row: int, col: int):
         """
         Gets the value in a cell in the crossword grid
@@ -25,7 +78,7 @@ class Grid:
         :param col: column number in the grid
         :return: the value stored in the cell
         """
-        return self._data[row][col]
+        return _CELL_VALUES[self._data[row, col]]
 
     def set_grid_cell(self, row: int, col: int):
         """
@@ -33,7 +86,7 @@ class Grid:
         :param row: row number in the grid
         :param col: column number in the grid
         """
-        self._data[row][col] = '1'
+        self._data[row, col] = WHITE_CELL
 
     def clear_grid_cell(self, row: int, col: int):
         """
@@ -41,7 +94,7 @@ class Grid:
         :param row: row number in the grid
         :param col: column number in the grid
         """
-        self._data[row][col] = '0'
+        self._data[row, col] = BLACK_CELL
 
     def fill_grid_cell(self, row: int, col: int, value: str):
         """
@@ -50,8 +103,43 @@ class Grid:
         :param col: column number in the grid
         :param value: a single character to be placed in the cell
         """
-        assert len(value) == 1 and value.isalpha()
-        self._data[row][col] = value.upper()
+        assert is_cell_character(value)
+        self._data[row, col] = ord(value.upper())
+
+    def get_region(self, rows, cols):
+        """
+        Gets the codes of a block of cells
+        :param rows: row index, slice or array of row indices
+        :param cols: column index, slice or array of column indices
+        :return: NumPy array of cell codes (a view when slices are used)
+        """
+        return self._data[rows, cols]
+
+    def set_region(self, rows, cols, codes):
+        """
+        Sets the codes of a block of cells in one operation
+        :param rows: row index, slice or array of row indices
+        :param cols: column index, slice or array of column indices
+        :param codes: cell code, or array of cell codes matching the shape of the region
+        """
+        self._data[rows, cols] = codes
+
+    def get_row(self, row: int):
+        """
+        Gets the values of a whole row
+        :param row: row number in the grid
+        :return: list of '0', '1' or letters
+        """
+        return [_CELL_VALUES[code] for code in self._data[row].tolist()]
+
+    def set_row(self, row: int, values):
+        """
+        Sets the values of a whole row
+        :param row: row number in the grid
+        :param values: sequence of '0', '1' or letters, one per column
+        """
+        self._data[row] = [BLACK_CELL if value == '0' else WHITE_CELL if value == '1' else ord(value.upper())
+                           for value in values]
 
     def length_rows(self):
         """
@@ -59,7 +147,7 @@ class Grid:
         :return: Number of rows in the grid
         """
         assert self._data is not None
-        return len(self._data)
+        return self._data.shape[0]
 
     def length_cols(self):
         """
@@ -67,11 +155,14 @@ class Grid:
         :return: Number of columns in the grid
         """
         assert self._data is not None
-        return len(self._data[0])
+        return self._data.shape[1]
 
 
 class Clue:
 
+    # Puzzles hold many clues, and a corpus of puzzles millions, so clues don't carry a __dict__
+    __slots__ = ('clue_text', 'answer_len', 'pos')
+
     def __init__(self, clue_text: str, answer_len: list[int], pos: tuple[int, int]):
         self.clue_text = clue_text
         self.answer_len = answer_len
@@ -86,6 +177,8 @@ class Clue:
 
 class ClueMetadata:
 
+    __slots__ = ('pos', 'length')
+
     def __init__(self, pos: tuple[int, int], length: int):
         self.pos = pos
         self.length = length
@@ -0,0 +1,315 @@
+import json
+import os
+
+import numpy as np
+
+# Identifies word index files, followed by the format version
+_MAGIC = b"CWINDEX\x00"
+_VERSION = 1
+
+# Arrays in the file start on multiples of this many bytes
+_ALIGNMENT = 64
+
+# Characters matching any letter in a pattern
+_WILDCARDS = "?._1"
+
+
+class WordIndex:
+    """
+    A word list indexed for pattern queries. For every answer length it keeps, per position and letter,
+    a bitset of the words with that letter at that position, so a query is a handful of bitwise ANDs.
+    Words of each length are grouped by enumeration (how the answer splits into words, e.g. (3, 4)
+    for "TOP SPOT"), so restricting a query to an enumeration is a slice of the bitsets.
+
+    Indexes can be saved to a single file, which is memory-mapped when loaded: nothing is read or
+    decoded up front, and the pages needed are only read from disk when queries touch them.
+    """
+
+    def __init__(self, arrays: dict, header: dict):
+        """
+        Use from_words() or load() to create an index
+        :param arrays: map of names to NumPy arrays, described in from_words()
+        :param header: map of lengths (as strings) to the enumerations of the words of that length
+        """
+
+        self._arrays = arrays
+        self._enumerations = {}
+
+        for length, enumerations in header.items():
+            # Enumeration -> (index of its first word, index after its last word)
+            self._enumerations[int(length)] = {tuple(enumeration): (start, end)
+                                               for enumeration, start, end in enumerations}
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Builds an index from a word list
+        :param words: iterable of words, in order of preference. Words are split into an enumeration on
+                      spaces and hyphens, other punctuation is ignored, and words that can't be filled
+                      into a grid are skipped
+        :return: WordIndex
+        """
+
+        by_length = {}
+
+        for word in words:
+
+            parts = word.upper().replace('-', ' ').split()
+            if not all(part.isalpha() for part in parts):
+                parts = ["".join(char for char in part if char.isalpha()) for part in parts]
+                parts = [part for part in parts if part]
+
+            letters = "".join(parts)
+
+            # Grid cells hold single byte letters
+            try:
+                letters.encode('latin-1')
+            except UnicodeEncodeError:
+                continue
+
+            if letters:
+                by_length.setdefault(len(letters), {}).setdefault(" ".join(parts), tuple(map(len, parts)))
+
+        arrays = {}
+        header = {}
+
+        for length, entries in by_length.items():
+
+            # Group the words by enumeration, keeping each word's rank in the original order
+            ranks = sorted(range(len(entries)), key=list(entries.values()).__getitem__)
+            texts = list(entries.keys())
+            enumerations = list(entries.values())
+
+            text_data = [texts[rank].encode('latin-1') for rank in ranks]
+            letters = np.frombuffer(b"".join(text.replace(b" ", b"") for text in text_data),
+                                    dtype=np.uint8).reshape(-1, length)
+
+            arrays[f"ranks_{length}"] = np.array(ranks, dtype=np.int32)
+            arrays[f"text_{length}"] = np.frombuffer(b"".join(text_data), dtype=np.uint8)
+            arrays[f"text_ends_{length}"] = np.cumsum([len(text) for text in text_data], dtype=np.int64)
+            arrays[f"letter_ids_{length}"], arrays[f"masks_{length}"] = cls.__build_masks(letters)
+
+            groups = []
+            for index, rank in enumerate(ranks):
+                if groups and groups[-1][0] == enumerations[rank]:
+                    groups[-1][2] = index + 1
+                else:
+                    groups.append([enumerations[rank], index, index + 1])
+            header[str(length)] = groups
+
+        return cls(arrays, header)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Opens an index saved with save(), memory-mapping its arrays
+        :param path: path of the index file
+        :return: WordIndex
+        """
+
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+
+        if bytes(data[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{path} is not a word index")
+
+        version, header_size = np.frombuffer(bytes(data[len(_MAGIC):len(_MAGIC) + 16]), dtype='<u8').tolist()
+        if version != _VERSION:
+            raise ValueError(f"{path} has unsupported word index version {version}")
+
+        header_start = len(_MAGIC) + 16
+        header = json.loads(bytes(data[header_start:header_start + header_size]).decode('utf-8'))
+
+        # Plain arrays over the mapping, as slicing np.memmap objects is comparatively slow
+        arrays = {name: np.ndarray(shape, dtype=dtype, buffer=data, offset=offset)
+                  for name, (offset, dtype, shape) in header["arrays"].items()}
+
+        return cls(arrays, header["enumerations"])
+
+    def save(self, path: str):
+        """
+        Saves the index to a file that load() can memory-map
+        :param path: path of the index file
+        """
+
+        enumerations = {str(length): [[list(enumeration), start, end]
+                                      for enumeration, (start, end) in groups.items()]
+                        for length, groups in self._enumerations.items()}
+
+        # Work out where each array goes, which depends on the size of the header listing them
+        header_data = b""
+
+        while True:
+            layout = {}
+            offset = self.__align(len(_MAGIC) + 16 + len(header_data))
+            for name, array in self._arrays.items():
+                layout[name] = [offset, array.dtype.str, list(array.shape)]
+                offset = self.__align(offset + array.nbytes)
+            new_header_data = json.dumps({"arrays": layout, "enumerations": enumerations}).encode('utf-8')
+            fits = len(new_header_data) == len(header_data)
+            header_data = new_header_data
+            if fits:
+                break
+
+        temp_path = f"{path}.tmp"
+
+        with open(temp_path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(np.array([_VERSION, len(header_data)], dtype='<u8').tobytes())
+            f.write(header_data)
+            for name, array in self._arrays.items():
+                f.write(b"\x00" * (layout[name][0] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+
+        os.replace(temp_path, path)
+
+    def lengths(self):
+        """
+        Lists the answer lengths with at least one word
+        """
+        return sorted(self._enumerations)
+
+    def match(self, pattern: str, enumeration=None, limit: int = None):
+        """
+        Finds the words matching a pattern
+        :param pattern: letters and wildcards ('?', '.', '_' or '1' for an empty cell), e.g. "A?P??".
+                        Spaces and hyphens are ignored, so "A?? ?P??" matches the same words as "A???P??"
+        :param enumeration: list of word lengths the answer must split into, e.g. [3, 4], or None for any
+        :param limit: maximum number of words to return
+        :return: list of the matching words in order of preference, with their enumeration shown by spaces
+        """
+
+        length, indices = self.__match_indices(pattern, enumeration)
+
+        if length is None:
+            return []
+
+        indices = self.__by_preference(length, indices, limit)
+
+        text = self._arrays[f"text_{length}"].data
+        text_ends = self._arrays[f"text_ends_{length}"]
+
+        ends = text_ends[indices].tolist()
+        starts = np.where(indices > 0, text_ends[indices - 1], 0).tolist()
+
+        return [text[start:end].tobytes().decode('latin-1') for start, end in zip(starts, ends)]
+
+    def count(self, pattern: str, enumeration=None):
+        """
+        Counts the words matching a pattern
+        :param pattern: see match()
+        :param enumeration: see match()
+        :return: number of matching words
+        """
+
+        length, indices = self.__match_indices(pattern, enumeration)
+
+        return 0 if length is None else len(indices)
+
+    def suggest(self, crossword_puzzle, clue_no: int, is_across: bool, limit: int = None):
+        """
+        Suggests answers to a clue of a verified puzzle that fit its enumeration and the letters already in the grid
+        :param crossword_puzzle: CrosswordPuzzle on which verify_and_sync() has been called
+        :param clue_no: clue number
+        :param is_across: True if across clue, False if down clue
+        :param limit: maximum number of answers to return
+        :return: list of answers in order of preference
+        """
+
+        clue = crossword_puzzle.get_clue(clue_no, is_across)
+        pattern = crossword_puzzle.get_answer_pattern(clue_no, is_across)
+
+        return self.match(pattern, clue.answer_len, limit)
+
+    def __match_indices(self, pattern: str, enumeration):
+        """
+        Finds the words matching a pattern
+        :return: the pattern's length and a NumPy array of the indices of the matching words within that
+                 length, or (None, None) if the index has no words of that length and enumeration
+        """
+
+        pattern = (pattern or "").replace(' ', '').replace('-', '').upper()
+
+        if enumeration is not None:
+            enumeration = tuple(enumeration)
+            if not pattern:
+                pattern = '?' * sum(enumeration)
+            elif len(pattern) != sum(enumeration):
+                raise ValueError(f"Pattern {pattern} doesn't have the {sum(enumeration)} letters of {enumeration}")
+
+        length = len(pattern)
+
+        if length not in self._enumerations:
+            return None, None
+
+        # Restrict the words to those of the enumeration, which are consecutive
+        start, end = 0, int(self._arrays[f"ranks_{length}"].shape[0])
+        if enumeration is not None:
+            if enumeration not in self._enumerations[length]:
+                return None, None
+            start, end = self._enumerations[length][enumeration]
+
+        letter_ids = self._arrays[f"letter_ids_{length}"]
+        masks = self._arrays[f"masks_{length}"]
+
+        # Only the bytes of the bitsets covering the words in range are needed
+        first_byte, last_byte = start // 8, (end + 7) // 8
+        bits = None
+
+        for position, char in enumerate(pattern):
+
+            if char in _WILDCARDS:
+                continue
+
+            letter_id = letter_ids[ord(char)] if ord(char) < 256 else -1
+            if letter_id < 0:
+                return length, np.zeros(0, dtype=np.intp)
+
+            mask = masks[position, letter_id, first_byte:last_byte]
+            bits = np.array(mask) if bits is None else np.bitwise_and(bits, mask, out=bits)
+
+        if bits is None:
+            return length, np.arange(start, end)
+
+        # Only unpack the bytes with a match in them, as matches tend to be few
+        nonzero_bytes = np.flatnonzero(bits)
+        byte_indices, bit_indices = np.nonzero(np.unpackbits(bits[nonzero_bytes, None], axis=1, bitorder='little'))
+        indices = (nonzero_bytes[byte_indices] + first_byte) * 8 + bit_indices
+
+        return length, indices[(indices >= start) & (indices < end)]
+
+    def __by_preference(self, length: int, indices, limit: int):
+        """
+        Puts matching words back in the order of the original word list
+        """
+
+        ranks = self._arrays[f"ranks_{length}"][indices]
+        order = np.argsort(ranks, kind='stable')
+
+        return indices[order[:limit] if limit is not None else order]
+
+    @staticmethod
+    def __build_masks(letters):
+        """
+        Builds the bitsets of one length of words
+        :param letters: 2D NumPy array of character codes, a row per word
+        :return: lookup table from character codes to letter ids (-1 if a letter is never used), and a 3D
+                 array of packed bitsets indexed by position and letter id
+        """
+
+        codes = np.unique(letters)
+        letter_ids = np.full(256, -1, dtype=np.int16)
+        letter_ids[codes] = np.arange(len(codes))
+
+        positions = letters.shape[1]
+        masks = np.zeros((positions, len(codes), (len(letters) + 7) // 8), dtype=np.uint8)
+
+        for position in range(positions):
+            column = letter_ids[letters[:, position]]
+            for letter_id in np.unique(column).tolist():
+                masks[position, letter_id] = np.packbits(column == letter_id, bitorder='little')
+
+        return letter_ids, masks
+
+    @staticmethod
+    def __align(offset: int):
+        return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
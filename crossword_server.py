@@ -0,0 +1,577 @@
+#!/usr/bin/python
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from email import policy
+from email.parser import BytesParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from instrumentation import CallbackSink, Instrumentation, InstrumentationEvent, PrometheusSink
+
+# Tesseract executable and OCR cache directory used by the worker processes, set when each one starts
+_worker_tesseract_path = None
+_worker_ocr_cache_dir = None
+
+# Placed on the queue to stop the dispatcher
+_STOP = object()
+
+
+class CrosswordServer:
+    """
+    HTTP service digitising puzzles on a pool of long-lived worker processes, which keep their OCR
+    engines loaded between requests. Requests wait in a bounded queue, and are turned away with
+    503 Service Unavailable when it's full. Puzzles sent as JSON are cheap, so several are sent to
+    a worker together to save on the cost of passing each one between processes.
+
+    Endpoints:
+        POST /puzzles/images  multipart form with "grid", "clues_across" and "clues_down" image files,
+                              and optional "rows" and "cols" fields
+        POST /puzzles/json    puzzle JSON, as accepted by CrosswordJsonProcessor
+        GET  /health          status of the service and its queue
+        GET  /metrics         request counts, queue depth and pipeline stage timings in the Prometheus text format
+    """
+
+    # Times a batch is run when its worker process dies. The pool is replaced each time, and a batch that
+    # still kills a worker is failed, as it's most likely the cause
+    BATCH_ATTEMPTS = 2
+
+    # Seconds after a worker process dies during which /health reports the service as degraded
+    DEGRADED_SECONDS = 60
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8080, workers: int = None,
+                 tesseract_path: str = 'tesseract', max_queue: int = 64, max_batch: int = 16,
+                 batch_delay: float = 0.005, request_timeout: float = 120, max_body_bytes: int = 32 * 1024 * 1024,
+                 ocr_cache_dir: str = None):
+        """
+        :param host: address to listen on
+        :param port: port to listen on (0 to pick a free one)
+        :param workers: number of worker processes (defaults to the number of CPUs)
+        :param tesseract_path: path to the Tesseract executable, used if tesserocr isn't installed
+        :param max_queue: most requests waiting for a worker before new ones are turned away
+        :param max_batch: most JSON puzzles sent to a worker together
+        :param batch_delay: seconds to wait for more JSON puzzles to fill a batch
+        :param request_timeout: seconds a request may take before 504 Gateway Timeout is returned
+        :param max_body_bytes: largest request body accepted
+        :param ocr_cache_dir: directory the workers cache OCR results in, so images already read aren't read again
+        """
+
+        self._workers = workers or os.cpu_count() or 1
+        self._tesseract_path = tesseract_path
+        self._ocr_cache_dir = ocr_cache_dir
+        self._pool = self.__create_pool()
+
+        # Worker processes that died, breaking the pool, and when the last one did
+        self._worker_failures = 0
+        self._last_worker_failure = None
+
+        self._max_batch = max_batch
+        self._batch_delay = batch_delay
+        self.request_timeout = request_timeout
+        self.max_body_bytes = max_body_bytes
+
+        # Requests waiting to be sent to a worker, and the number of batches the workers are busy with,
+        # which is capped so that waiting requests stay in the bounded queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._busy_workers = threading.BoundedSemaphore(self._workers)
+
+        # Set when shutting down, after which requests are answered with an error instead of being queued
+        # and the pool is no longer replaced. The lock also guards replacing the pool
+        self._closed = False
+        self._closed_lock = threading.Lock()
+        self._serving = False
+
+        self.metrics = PrometheusSink()
+        self.started = time.time()
+
+        self._http_server = _HttpServer((host, port), _RequestHandler)
+        self._http_server.app = self
+
+        self._dispatcher = threading.Thread(target=self.__dispatch, name="crossword-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def address(self):
+        """
+        Host and port the server is listening on
+        """
+        return self._http_server.server_address
+
+    @property
+    def queue_depth(self):
+        """
+        Number of requests waiting for a worker
+        """
+        return self._queue.qsize()
+
+    def serve_forever(self):
+        self._serving = True
+        self._http_server.serve_forever()
+
+    def shutdown(self):
+        """
+        Stops accepting requests, finishing the ones already sent to the workers. Requests still waiting
+        in the queue are answered with 503 Service Unavailable
+        """
+
+        # Stopping the HTTP server waits for serve_forever() to return, which never happens if it wasn't called
+        if self._serving:
+            self._http_server.shutdown()
+        self._http_server.server_close()
+
+        with self._closed_lock:
+            self._closed = True
+
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(_ServerClosedError())
+
+        self._queue.put(_STOP)
+        self._dispatcher.join()
+
+        with self._closed_lock:
+            pool = self._pool
+        pool.shutdown()
+
+    def submit(self, kind: str, payload):
+        """
+        Queues a puzzle for the workers
+        :param kind: "images" or "json"
+        :param payload: arguments of the worker for that kind of puzzle
+        :return: Future of the worker's result, or None if the queue is full. Cancelling the Future before
+                 a worker takes the puzzle stops it from being run
+        """
+
+        job = _Job(kind, payload)
+
+        with self._closed_lock:
+
+            if self._closed:
+                job.future.set_exception(_ServerClosedError())
+                return job.future
+
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                return None
+
+        return job.future
+
+    def __dispatch(self):
+        """
+        Sends queued requests to the workers, one worker per batch, until shut down
+        """
+
+        # A request taken from the queue that couldn't join the last batch
+        pending = None
+
+        while True:
+
+            job = pending if pending is not None else self._queue.get()
+            pending = None
+
+            if job is _STOP:
+                return
+
+            # The request timed out while it was waiting
+            if not job.future.set_running_or_notify_cancel():
+                continue
+
+            batch = [job]
+
+            # Images take seconds each, so they're sent on their own. JSON puzzles are batched
+            # with the other JSON puzzles that arrive shortly after
+            if job.kind == "json":
+                deadline = time.monotonic() + self._batch_delay
+                while len(batch) < self._max_batch:
+                    try:
+                        job = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if job is _STOP or job.kind != "json":
+                        pending = job
+                        break
+                    if job.future.set_running_or_notify_cancel():
+                        batch.append(job)
+
+            self.__submit_batch(batch)
+
+    def __create_pool(self):
+        return ProcessPoolExecutor(max_workers=self._workers, initializer=_init_worker,
+                                   initargs=(self._tesseract_path, self._ocr_cache_dir))
+
+    def __submit_batch(self, batch):
+
+        self._busy_workers.acquire()
+        self.__run_batch(batch, 1)
+
+    def __run_batch(self, batch, attempt: int):
+        """
+        Sends a batch to the pool. The batch holds one of the busy workers until it completes
+        :param batch: list of _Job
+        :param attempt: number of times the batch has been sent, including this one
+        """
+
+        pool = self._pool
+
+        try:
+            future = pool.submit(_process_batch, [(job.kind, job.payload) for job in batch])
+        except BrokenProcessPool as e:
+            self.__batch_broke_pool(batch, attempt, pool, e)
+            return
+        except Exception as e:
+            self.__fail_batch(batch, e)
+            return
+
+        future.add_done_callback(lambda done: self.__complete_batch(batch, attempt, pool, done))
+
+    def __complete_batch(self, batch, attempt: int, pool: ProcessPoolExecutor, done: Future):
+        """
+        Passes the results of a batch back to the requests waiting for them
+        """
+
+        try:
+            results = done.result()
+        except BrokenProcessPool as e:
+            self.__batch_broke_pool(batch, attempt, pool, e)
+            return
+        except Exception as e:
+            self.__fail_batch(batch, e)
+            return
+
+        self._busy_workers.release()
+
+        for job, (result, events) in zip(batch, results):
+            for event in events:
+                self.metrics.record(event)
+            job.future.set_result(result)
+
+    def __batch_broke_pool(self, batch, attempt: int, pool: ProcessPoolExecutor, error: BrokenProcessPool):
+        """
+        Handles a batch whose pool broke because a worker process died, which fails every batch the pool was
+        running. The pool is replaced, and the batch is run again unless it has had all its attempts
+        """
+
+        with self._closed_lock:
+            # Only the first of the batches that see the pool break replaces it
+            replace = self._pool is pool and not self._closed
+            if replace:
+                self._pool = self.__create_pool()
+                self._worker_failures += 1
+                self._last_worker_failure = time.time()
+
+        if replace:
+            self.metrics.record(InstrumentationEvent("count", "worker_failures", 1, ()))
+            pool.shutdown(wait=False)
+
+        if attempt < CrosswordServer.BATCH_ATTEMPTS and self._pool is not pool:
+            self.__run_batch(batch, attempt + 1)
+        else:
+            self.__fail_batch(batch, error)
+
+    def __fail_batch(self, batch, error: Exception):
+
+        self._busy_workers.release()
+
+        for job in batch:
+            job.future.set_exception(error)
+
+    def render_metrics(self):
+        """
+        Exports the service's metrics in the Prometheus text format
+        """
+
+        return (self.metrics.render() +
+                "# TYPE crossword_queue_depth gauge\n"
+                f"crossword_queue_depth {self.queue_depth}\n"
+                "# TYPE crossword_workers gauge\n"
+                f"crossword_workers {self._workers}\n")
+
+    def health(self):
+        """
+        Status of the service: "degraded" for a while after a worker process dies, otherwise "ok"
+        """
+
+        last_failure = self._last_worker_failure
+        degraded = last_failure is not None and time.time() - last_failure < CrosswordServer.DEGRADED_SECONDS
+
+        return {"status": "degraded" if degraded else "ok", "workers": self._workers,
+                "queue_depth": self.queue_depth, "max_queue": self._queue.maxsize,
+                "worker_failures": self._worker_failures, "uptime": time.time() - self.started}
+
+
+class _HttpServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    # Let bursts of connections wait to be accepted rather than being refused, as the queue limits the load
+    request_queue_size = 128
+
+
+class _ServerClosedError(Exception):
+
+    def __str__(self):
+        return "The server is shutting down"
+
+
+class _Job:
+    """
+    A request waiting for a worker, and where its result goes
+    """
+
+    def __init__(self, kind: str, payload):
+        self.kind = kind
+        self.payload = payload
+        self.future = Future()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+
+        path = urlsplit(self.path).path
+        app = self.server.app
+
+        if path == "/health":
+            self.__send_json(HTTPStatus.OK, app.health())
+        elif path == "/metrics":
+            self.__send(HTTPStatus.OK, app.render_metrics().encode(), "text/plain; version=0.0.4")
+        else:
+            self.__send_json(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint {path}"})
+
+    def do_POST(self):
+
+        path = urlsplit(self.path).path
+
+        if path not in ("/puzzles/images", "/puzzles/json"):
+            self.__send_json(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint {path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+
+        # Without a valid length the body can't be told apart from the next request on the connection
+        if length < 0:
+            self.close_connection = True
+            self.__send_json(HTTPStatus.BAD_REQUEST, {"error": "Expected Content-Length to be a non-negative integer"})
+            return
+
+        if length > self.server.app.max_body_bytes:
+            self.close_connection = True
+            self.__send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                             {"error": f"Request body is larger than {self.server.app.max_body_bytes} bytes"})
+            return
+
+        body = self.rfile.read(length)
+
+        try:
+            if path == "/puzzles/json":
+                kind, payload = "json", body.decode("utf-8")
+            else:
+                kind, payload = "images", self.__image_payload(body)
+        except ValueError as e:
+            self.__send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+
+        self.__run(kind, payload)
+
+    def __run(self, kind: str, payload):
+        """
+        Queues a puzzle and responds with the worker's result
+        """
+
+        app = self.server.app
+        future = app.submit(kind, payload)
+
+        if future is None:
+            self.__send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many requests waiting, try again later"},
+                             {"Retry-After": "1"})
+            return
+
+        try:
+            result = future.result(timeout=app.request_timeout)
+        except FutureTimeoutError:
+            # Nobody is waiting for the result any more, so don't run the puzzle if it's still queued
+            future.cancel()
+            self.__send_json(HTTPStatus.GATEWAY_TIMEOUT, {"error": "Timed out waiting for the puzzle"})
+            return
+        except _ServerClosedError as e:
+            self.__send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+            return
+        except Exception as e:
+            self.__send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        status = HTTPStatus.OK if result["status"] == "ok" else \
+            HTTPStatus.UNPROCESSABLE_ENTITY if result["error"]["client_error"] else HTTPStatus.INTERNAL_SERVER_ERROR
+
+        self.__send_json(status, result)
+
+    def __image_payload(self, body: bytes):
+        """
+        Extracts the images and dimensions from a multipart form
+        :return: (grid image, across clues image, down clues image, rows, cols), with the images as bytes
+        """
+
+        content_type = self.headers.get("Content-Type", "")
+
+        if not content_type.startswith("multipart/form-data"):
+            raise ValueError("Expected a multipart/form-data request")
+
+        message = BytesParser(policy=policy.HTTP).parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+        )
+
+        fields = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name is not None:
+                fields[name] = part.get_payload(decode=True)
+
+        missing = [name for name in ("grid", "clues_across", "clues_down") if not fields.get(name)]
+        if missing:
+            raise ValueError(f"Missing image(s): {', '.join(missing)}")
+
+        dimensions = []
+        for name in ("rows", "cols"):
+            value = fields.get(name)
+            if value is not None and not value.strip().isdigit():
+                raise ValueError(f"Expected {name} to be a positive integer")
+            dimensions.append(int(value) if value is not None else None)
+
+        return (fields["grid"], fields["clues_across"], fields["clues_down"], *dimensions)
+
+    def __send_json(self, status: HTTPStatus, data, headers: dict = None):
+        self.__send(status, json.dumps(data).encode(), "application/json", headers)
+
+    def __send(self, status: HTTPStatus, body: bytes, content_type: str, headers: dict = None):
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+        self.server.app.metrics.record(InstrumentationEvent(
+            "count", "http_requests", 1, (("path", urlsplit(self.path).path), ("status", str(int(status))))
+        ))
+
+    def log_message(self, format, *args):
+        # Requests are counted in the metrics instead of being printed
+        pass
+
+
+def _init_worker(tesseract_path: str, ocr_cache_dir: str):
+    """
+    Sets up a worker process, loading the OCR engines once rather than for every request
+    """
+
+    global _worker_tesseract_path, _worker_ocr_cache_dir
+    _worker_tesseract_path = tesseract_path
+    _worker_ocr_cache_dir = ocr_cache_dir
+
+    from ocr_backends import OcrError, get_shared_ocr_backend
+
+    try:
+        get_shared_ocr_backend(tesseract_path, ocr_cache_dir).version
+    except OcrError:
+        # Only image requests need OCR, and they report the error themselves
+        pass
+
+
+def _process_batch(jobs):
+    """
+    Digitises a batch of puzzles inside a worker process
+    :param jobs: list of (kind, payload) tuples
+    :return: list of (result dictionary, list of InstrumentationEvent) tuples, in the same order
+    """
+    return [_process_job(kind, payload) for kind, payload in jobs]
+
+
+def _process_job(kind: str, payload):
+
+    # Heavy imports are left to the workers, which load them once
+    from crossword_puzzle.exceptions import CrosswordPuzzleError
+    from image_to_crossword import CrosswordImageProcessor
+    from json_to_crossword import CrosswordJsonProcessor, InvalidJsonCrosswordDataError
+
+    events = []
+    instrumentation = Instrumentation(CallbackSink(events.append), verbose=False)
+
+    try:
+        if kind == "json":
+            with instrumentation.stage("json"):
+                crossword_puzzle = CrosswordJsonProcessor.crossword_from_json(payload)
+        else:
+            grid_bytes, across_bytes, down_bytes, rows, cols = payload
+            crossword_puzzle = CrosswordImageProcessor.crossword_from_images(
+                tesseract_path=_worker_tesseract_path,
+                grid_img=CrosswordImageProcessor.read_image(grid_bytes, instrumentation),
+                across_clues_img=CrosswordImageProcessor.read_image(across_bytes, instrumentation),
+                down_clues_img=CrosswordImageProcessor.read_image(down_bytes, instrumentation),
+                rows=rows,
+                cols=cols,
+                instrumentation=instrumentation,
+                ocr_cache_dir=_worker_ocr_cache_dir
+            )
+    except (ValueError, InvalidJsonCrosswordDataError, CrosswordPuzzleError) as e:
+        # Problems with what was sent, rather than with the service
+        return _error_result(e, True), events
+    except Exception as e:
+        return _error_result(e, False), events
+
+    return {"status": "ok", "crossword": crossword_puzzle.to_dict()}, events
+
+
+def _error_result(error: Exception, client_error: bool):
+    return {"status": "error",
+            "error": {"type": type(error).__name__, "message": str(error), "client_error": client_error}}
+
+
+def main(argv):
+
+    parser = argparse.ArgumentParser(description="Serve crossword digitisation over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--tesseract", default="tesseract", help="path to the Tesseract executable")
+    parser.add_argument("--max-queue", type=int, default=64, help="most requests waiting before returning 503")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a request times out")
+    parser.add_argument("--ocr-cache", default=None, metavar="DIR",
+                        help="directory to cache OCR results in, so images already read aren't read again")
+    args = parser.parse_args(argv)
+
+    server = CrosswordServer(host=args.host, port=args.port, workers=args.workers, tesseract_path=args.tesseract,
+                             max_queue=args.max_queue, request_timeout=args.timeout, ocr_cache_dir=args.ocr_cache)
+
+    host, port = server.address
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,179 +1,502 @@
 import cv2.cv2 as cv2
-import pytesseract
+import numpy as np
 
+from clue_layout import ClueLayoutParser, UnreadableCluesError
+from clue_preprocessing import CluePreprocessor
 from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+from crossword_puzzle.exceptions import CrosswordPuzzleError
+from instrumentation import Instrumentation
+from ocr_backends import OcrBackend, get_shared_ocr_backend, parse_tsv
 
-import re
+from concurrent.futures import ThreadPoolExecutor
 
 
 class CrosswordImageProcessor:
 
+    # Longest side, in pixels, of the coarsest copy of an image searched for the grid
+    LOCATE_MAX_SIDE = 512
+
+    # Smallest fraction of the searched image that an outline must cover to be considered as the grid
+    LOCATE_MIN_AREA = 0.01
+
+    # Smallest cell side, in pixels, and most cells per side considered when inferring the grid's dimensions
+    INFER_MIN_CELL_SIZE = 6
+    INFER_MAX_CELLS = 50
+
+    # How many times more edge pixels a cell boundary needs than the middle of a cell when inferring dimensions
+    INFER_MIN_CONTRAST = 4
+
+    # Clues with a word read with less confidence than this (from 0 to 100) are read again
+    REOCR_MIN_CONFIDENCE = 60
+
+    # Page segmentation mode and preprocessing (None to use the crop as it is) of each attempt to read a clue again
+    REOCR_ATTEMPTS = (
+        (6, None),
+        (4, None),
+        (6, CluePreprocessor(deskew=False, crop=False, upscale=True, target_x_height=32))
+    )
+
+    # Pixels of background added around a clue's crop when reading it again
+    REOCR_MARGIN = 10
+
     @staticmethod
-    def crossword_from_images(tesseract_path, grid_img, across_clues_img, down_clues_img, rows: int, cols: int):
+    def crossword_from_images(tesseract_path, grid_img, across_clues_img, down_clues_img, rows: int = None,
+                              cols: int = None, cell_size: int = 10, white_threshold: float = 0.5,
+                              ocr_backend: OcrBackend = None, clue_preprocessor: CluePreprocessor = None,
+                              instrumentation: Instrumentation = None, ocr_cache_dir: str = None):
         """
         Function that takes in a picture of a grid, across and down clues,
         and verifying that the clues match the grid
-        :param tesseract_path: path to the Tesseract executable
+        :param tesseract_path: path to the Tesseract executable, used when no ocr_backend is given
         :param grid_img: image of the grid from cv2.imread()
         :param across_clues_img: image of the across clues from cv2.imread()
         :param down_clues_img: image of the down clues from cv2.imread()
-        :param rows: number of rows in the grid
-        :param cols: number of columns in the grid
+        :param rows: number of rows in the grid (inferred from the grid image if not given)
+        :param cols: number of columns in the grid (inferred from the grid image if not given)
+        :param cell_size: side length in pixels that each cell is resized to before classification
+        :param white_threshold: fraction of white pixels above which a cell is treated as white
+        :param ocr_backend: backend used to read the clues (defaults to one shared by the process)
+        :param clue_preprocessor: preprocessing applied to the clue images before OCR (defaults to every step,
+                                  shrinking oversized text but not enlarging small text)
+        :param instrumentation: receives the time taken by each stage and counts of what was read, and
+                                controls whether progress is printed (defaults to printing, without measuring)
+        :param ocr_cache_dir: directory to cache OCR results in, so images already read aren't read again,
+                              used when no ocr_backend is given
+        """
+
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
+        if ocr_backend is None:
+            ocr_backend = get_shared_ocr_backend(tesseract_path, ocr_cache_dir)
+
+        if clue_preprocessor is None:
+            clue_preprocessor = CluePreprocessor()
+
+        # The grid detection and both OCR passes are independent, and Tesseract runs in its own
+        # process, so run the three stages concurrently and only join them to build the puzzle
+        with ThreadPoolExecutor(max_workers=3) as executor:
+
+            instrumentation.message("Uploading grid...")
+            grid_future = executor.submit(
+                CrosswordImageProcessor.grid_from_image,
+                img=grid_img,
+                rows=rows,
+                cols=cols,
+                cell_size=cell_size,
+                white_threshold=white_threshold,
+                instrumentation=instrumentation
+            )
+
+            instrumentation.message("Uploading across clues...")
+            across_future = executor.submit(
+                CrosswordImageProcessor.clues_from_image,
+                ocr_backend=ocr_backend,
+                img=across_clues_img,
+                is_across=True,
+                clue_preprocessor=clue_preprocessor,
+                instrumentation=instrumentation
+            )
+
+            instrumentation.message("Uploading down clues...")
+            down_future = executor.submit(
+                CrosswordImageProcessor.clues_from_image,
+                ocr_backend=ocr_backend,
+                img=down_clues_img,
+                is_across=False,
+                clue_preprocessor=clue_preprocessor,
+                instrumentation=instrumentation
+            )
+
+            return CrosswordImageProcessor.assemble_puzzle(grid_future.result(), across_future.result(),
+                                                           down_future.result(), instrumentation)
+
+    @staticmethod
+    def assemble_puzzle(grid_cells, across_clues, down_clues, instrumentation: Instrumentation = None):
+        """
+        Builds and verifies a puzzle from what was read from its images
+        :param grid_cells: boolean matrix of the grid, True where a cell is white, from grid_from_image()
+        :param across_clues: list of (clue number, clue text, answer length) tuples, from clues_from_image()
+        :param down_clues: list of (clue number, clue text, answer length) tuples, from clues_from_image()
+        :param instrumentation: receives the time taken to verify the puzzle
+        :return: the verified CrosswordPuzzle
         """
 
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
         crossword_puzzle = CrosswordPuzzle()
+        crossword_puzzle.load_grid(grid_cells)
+
+        for is_across, clues in ((True, across_clues), (False, down_clues)):
+            for clue_no, clue_text, answer_len in clues:
+                crossword_puzzle.add_clue(clue_no, is_across, clue_text, answer_len)
+
+        instrumentation.message("Verifying puzzle state...")
 
-        print("Uploading grid...")
-        CrosswordImageProcessor.__grid_from_image(
-            crossword_puzzle=crossword_puzzle,
-            img=grid_img,
-            rows=rows,
-            cols=cols
-        )
-
-        print("Uploading across clues...")
-        CrosswordImageProcessor.__clues_from_image(
-            tesseract_path=tesseract_path,
-            crossword_puzzle=crossword_puzzle,
-            img=across_clues_img,
-            is_across=True
-        )
-
-        print("Uploading down clues...")
-        CrosswordImageProcessor.__clues_from_image(
-            tesseract_path=tesseract_path,
-            crossword_puzzle=crossword_puzzle,
-            img=down_clues_img,
-            is_across=False
-        )
-
-        print("Verifying puzzle state...")
-        crossword_puzzle.verify_and_sync()
+        with instrumentation.stage("verify"):
+            try:
+                crossword_puzzle.verify_and_sync()
+            except CrosswordPuzzleError:
+                instrumentation.count("verification_failures")
+                raise
 
         return crossword_puzzle
 
     @staticmethod
-    def __grid_from_image(crossword_puzzle: CrosswordPuzzle, img, rows: int, cols: int):
+    def read_image(source, instrumentation: Instrumentation = None):
+        """
+        Decodes an image for the other methods
+        :param source: path of an image file, or the contents of one as bytes
+        :param instrumentation: receives the time taken to decode the image
+        :return: image object, as from cv2.imread()
+        """
+
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
+        with instrumentation.stage("decode"):
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                img = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+            else:
+                img = cv2.imread(source)
+
+        if img is None:
+            raise ValueError("Couldn't decode the image" if isinstance(source, (bytes, bytearray, memoryview))
+                             else f"Couldn't read the image at {source}")
+
+        return img
+
+    @staticmethod
+    def locate_grid(img):
+        """
+        Finds the crossword grid in an image: the largest outline with four corners. The outline is
+        searched for on a heavily downscaled copy of the image first, moving to finer levels of the
+        image pyramid only if it isn't found, and its corners are then refined at full resolution
+        within a small region around it
+        :param img: image object from cv2.imread()
+        :return: bounding rectangle (x, y, width, height) of the grid in the full-resolution image
+        """
+
+        height, width = img.shape[:2]
+
+        # Thresholding, so that dark pixels are white in the mask
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        _, thresh = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
+
+        # Build the image pyramid, halving the mask until its longest side fits the coarsest level.
+        # Any dark pixel leaves a trace after blurring, so re-thresholding at zero keeps thin grid lines
+        levels = [thresh]
+        while max(levels[-1].shape) >= 2 * CrosswordImageProcessor.LOCATE_MAX_SIDE:
+            _, level = cv2.threshold(cv2.pyrDown(levels[-1]), 0, 255, cv2.THRESH_BINARY)
+            levels.append(level)
+
+        # Search from the coarsest level down
+        for scale_exponent in reversed(range(len(levels))):
+            outline = CrosswordImageProcessor.__find_grid_outline(levels[scale_exponent])
+            if outline is not None:
+                break
+
+        scale = 2 ** scale_exponent
+
+        if outline is None:
+            raise ValueError("Couldn't locate the grid in the image")
+
+        x, y, w, h = cv2.boundingRect(outline)
+
+        if scale == 1:
+            return x, y, w, h
+
+        # Refine the outline at full resolution, only looking at the region it was found in
+        left, top = max(0, (x - 1) * scale), max(0, (y - 1) * scale)
+        right, bottom = min(width, (x + w + 1) * scale), min(height, (y + h + 1) * scale)
+
+        contours, _ = cv2.findContours(thresh[top:bottom, left:right], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        # The grid fills the region, so it's the largest outline in it
+        x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+
+        return left + x, top + y, w, h
+
+    @staticmethod
+    def classify_cells(img, grid_rect, rows: int, cols: int, cell_size: int = 10, white_threshold: float = 0.5):
         """
-        Take an image with a crossword grid and store it in the class
-        :param crossword_puzzle: the crossword puzzle being modified
+        Detects which cells of a located crossword grid are white
         :param img: image object from cv2.imread()
+        :param grid_rect: bounding rectangle (x, y, width, height) of the grid, from locate_grid()
         :param rows: number of rows in the grid
         :param cols: number of columns in the grid
+        :param cell_size: side length in pixels that each cell is resized to before classification
+        :param white_threshold: fraction of white pixels above which a cell is treated as white
+        :return: boolean matrix of shape (rows, cols), True where a cell is white
         """
 
-        # Set the grid dimensions
-        crossword_puzzle.set_grid(rows, cols)
+        # Extract the crossword region, threshold it and resize it to a standard size
+        x, y, w, h = grid_rect
+        gray = cv2.cvtColor(img[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        _, cross_rect = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+        cross_rect = cv2.resize(cross_rect, (cols * cell_size, rows * cell_size))
 
-        # Convert the image to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # View the region as a (rows, cols, cell_size, cell_size) block of cells and count
+        # the white pixels in every cell at once
+        cells = cross_rect.reshape(rows, cell_size, cols, cell_size).swapaxes(1, 2)
+        white_counts = np.count_nonzero(cells, axis=(2, 3))
 
-        # Thresholding
-        ret, thresh = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
-        thresh2 = cv2.bitwise_not(thresh)
+        # Treat a cell as empty if enough of its pixels are white
+        return white_counts > white_threshold * cell_size * cell_size
 
-        # Find contours in the image
-        contours, hierarchy = cv2.findContours(thresh, cv2.RETR_EXTERNAL, 1)
+    @staticmethod
+    def infer_dimensions(img, grid_rect):
+        """
+        Works out the number of rows and columns of a located crossword grid. Cell boundaries show up as
+        peaks in the number of dark/light transitions along each row and column of pixels, and the grid
+        fills its bounding rectangle, so a count of cells is plausible if every boundary it implies falls
+        on a peak while the middle of every cell doesn't. The largest plausible count is used, as every
+        divisor of the true count also has its boundaries on peaks.
+        :param img: image object from cv2.imread()
+        :param grid_rect: bounding rectangle (x, y, width, height) of the grid, from locate_grid()
+        :return: the number of rows and columns
+        """
 
-        max_area = -1
-        max_cnt = -1
+        x, y, w, h = grid_rect
+        gray = cv2.cvtColor(img[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        dark = (gray <= 127).view(np.int8)
 
-        # Locate the grid by finding the square with the largest area
-        for cnt in contours:
-            # Get the approximated contour
-            approx = cv2.approxPolyDP(cnt, 0.02 * cv2.arcLength(cnt, True), True)
-            if len(approx) == 4 and cv2.contourArea(cnt) > max_area:
-                # Found largest rectangle, store this information
-                max_area = cv2.contourArea(cnt)
-                max_cnt = cnt
-
-        # Extract the crossword region, and resize it to a standard size
-        x, y, w, h = cv2.boundingRect(max_cnt)
-        cross_rect = thresh2[y:y + h, x:x + w]
-        cross_rect = cv2.resize(cross_rect, (cols * 10, rows * 10))
-
-        # Iterate through each cell, treating it as empty if more than 50 pixels are white
-        for i in range(rows):
-            for j in range(cols):
-                box = cross_rect[i * 10:(i + 1) * 10, j * 10:(j + 1) * 10]
-                if cv2.countNonZero(box) > 50:
-                    crossword_puzzle.turn_cell_white(i, j)
+        # Fraction of the pixels in each column (and row) where the image changes between dark and light
+        col_edges = np.count_nonzero(np.diff(dark, axis=1), axis=0) / h
+        row_edges = np.count_nonzero(np.diff(dark, axis=0), axis=1) / w
+
+        rows = CrosswordImageProcessor.__count_cells(row_edges.tolist(), h)
+        cols = CrosswordImageProcessor.__count_cells(col_edges.tolist(), w)
+
+        if rows is None or cols is None:
+            raise ValueError("Couldn't infer the number of rows and columns from the grid image")
+
+        return rows, cols
 
     @staticmethod
-    def __clues_from_image(tesseract_path, crossword_puzzle: CrosswordPuzzle, img, is_across: bool):
+    def __count_cells(edges, length: int):
         """
-        Uploads a column of clues to the data structure using regexes and string manipulation
-        :param tesseract_path: path to the Tesseract executable
-        :param crossword_puzzle: the crossword puzzle being modified
+        Finds the number of cells along one side of a grid
+        :param edges: list of the transitions between dark and light at each pixel boundary along the side
+        :param length: length of the side in pixels
+        :return: the number of cells, or None if no count is plausible
+        """
+
+        best_count = None
+
+        for count in range(2, CrosswordImageProcessor.INFER_MAX_CELLS + 1):
+
+            pitch = length / count
+            if pitch < CrosswordImageProcessor.INFER_MIN_CELL_SIZE:
+                break
+
+            # Allow for lines a few pixels wide and slightly uneven spacing
+            tolerance = max(1, int(pitch * 0.1))
+
+            def peak_near(position):
+                index = round(position) - 1
+                return max(edges[max(0, index - tolerance):index + tolerance + 1])
+
+            # Interior noise such as clue numbers is ignored by comparing against the typical middle
+            middles = sorted(peak_near((i + 0.5) * pitch) for i in range(count))
+            min_boundary = CrosswordImageProcessor.INFER_MIN_CONTRAST * max(middles[count // 2], 0.01)
+
+            if all(peak_near(i * pitch) >= min_boundary for i in range(1, count)):
+                best_count = count
+
+        return best_count
+
+    @staticmethod
+    def grid_from_image(img, rows: int = None, cols: int = None, cell_size: int = 10, white_threshold: float = 0.5,
+                        instrumentation: Instrumentation = None):
+        """
+        Take an image with a crossword grid and detect which of its cells are white
         :param img: image object from cv2.imread()
-        :param is_across: True if the clues are from the across column, False otherwise
+        :param rows: number of rows in the grid, or None to infer it
+        :param cols: number of columns in the grid, or None to infer it
+        :param cell_size: side length in pixels that each cell is resized to before classification
+        :param white_threshold: fraction of white pixels above which a cell is treated as white
+        :param instrumentation: receives the time taken by each stage
+        :return: boolean matrix of shape (rows, cols), True where a cell is white
         """
 
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
+        with instrumentation.stage("locate_grid"):
+            grid_rect = CrosswordImageProcessor.locate_grid(img)
 
-        # TODO: IMAGE PREPROCESSING
+        if rows is None or cols is None:
+            with instrumentation.stage("infer_dimensions"):
+                inferred_rows, inferred_cols = CrosswordImageProcessor.infer_dimensions(img, grid_rect)
+            rows = inferred_rows if rows is None else rows
+            cols = inferred_cols if cols is None else cols
 
-        # Convert the image to a string
-        text = pytesseract.image_to_string(img, lang='eng', config=f'--psm 6')
+        with instrumentation.stage("classify_cells"):
+            return CrosswordImageProcessor.classify_cells(img, grid_rect, rows, cols, cell_size, white_threshold)
 
-        # TEXT POST PROCESSING
+    @staticmethod
+    def __reread_clue(img, entry, next_top: int, instrumentation: Instrumentation, direction: str):
+        """
+        Reads a clue again from a crop of the page, trying each of REOCR_ATTEMPTS until one reads it clearly.
+        Like clue_reader(), it yields the images to read and is sent back the OCR output
+        :param img: image the clue was read from
+        :param entry: ClueEntry that couldn't be read, or was read with low confidence
+        :param next_top: top of the next clue on the page, where the crop ends
+        :param instrumentation: receives the time taken by each attempt and counts of what was read
+        :param direction: "across" or "down", to label the measurements
+        :return: list of the ClueEntry read best, which is more than one if the crop turned out to hold
+                 clues whose numbers weren't recognised
+        """
 
-        # Remove Across/Down if needed
-        text = re.sub('^across' if is_across else '^down', '', text, flags=re.IGNORECASE)
+        margin = CrosswordImageProcessor.REOCR_MARGIN
 
-        # Change vertical bars to "I"
-        text = text.replace('|', 'I')
+        # Take the whole width, as the words OCR missed (often the answer length) have no box
+        top = max(0, entry.lines[0].top - margin // 2)
+        bottom = min(img.shape[0], max(next_top, entry.lines[-1].bottom + margin // 2))
+        crop = cv2.copyMakeBorder(img[top:bottom], margin, margin, margin, margin,
+                                  cv2.BORDER_CONSTANT, value=(255, 255, 255))
 
-        # Replace newlines with spaces
-        text = text.replace('\n', ' ')
+        best = [entry]
+        best_score = (entry.error is None, entry.confidence)
 
-        # EXTRACT THE CLUES
+        for psm, clue_preprocessor in CrosswordImageProcessor.REOCR_ATTEMPTS:
 
-        # Split text based on the answer length found at the end of a clue
-        split_text = re.split(r'(\([1-9][0-9]?(, ?[1-9][0-9]?)*\))', text)
+            with instrumentation.stage("ocr", direction=direction, scope="clue"):
+                attempt_img = crop if clue_preprocessor is None else clue_preprocessor.preprocess(crop)
+                words = parse_tsv((yield attempt_img, psm))
 
-        # The above regex uses two capture groups, and .split() returns both
-        # in the result (returning None if the 2nd capture group isn't invoked)
-        del split_text[2::3]
+            instrumentation.count("ocr_characters", sum(len(word.text) for word in words), direction=direction)
 
-        # Group each clue with its answer length (the element succeeding the clue in the list
-        split_text_iter = iter(split_text)
-        clue_length_tuples = list(zip(split_text_iter, split_text_iter))
+            candidates = ClueLayoutParser.parse(words)
 
-        # Process each clue
-        for clue, length in clue_length_tuples:
+            # The crop must start with the same clue
+            if not candidates or candidates[0].clue_no != entry.clue_no:
+                continue
 
-            # Search for the 2 digit number in the clue after removing extra whitespace
-            clue_no_search = re.match(r'([1-9][0-9]?)\.?(.*)', clue.lstrip().rstrip())
+            score = (all(candidate.error is None for candidate in candidates),
+                     min(candidate.confidence for candidate in candidates))
 
-            # Search for the actual value of the length
-            length_val_search = re.match(r'\((.*)\)', length)
+            if score > best_score:
+                best, best_score = candidates, score
 
-            # Check that matches were successful
-            if not clue_no_search:
+            if best_score[0] and best_score[1] >= CrosswordImageProcessor.REOCR_MIN_CONFIDENCE:
+                break
 
-                raise ValueError(f"Couldn't detect the clue number from the image for {clue}")
+        return best
 
-            elif not length_val_search:
+    @staticmethod
+    def __find_grid_outline(thresh):
+        """
+        Finds the largest outline with four corners in a thresholded image
+        :param thresh: binary image, with the dark pixels of the original image set
+        :return: the outline's contour, or None if there isn't one
+        """
 
-                raise ValueError(f"Couldn't detect the answer length from the image for {clue}")
+        # Find contours in the image
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
-            else:
+        # Only approximate contours large enough to be the grid, largest first
+        min_area = CrosswordImageProcessor.LOCATE_MIN_AREA * thresh.shape[0] * thresh.shape[1]
+        areas = [cv2.contourArea(cnt) for cnt in contours]
 
-                # Convert to relevant types and remove whitespace at start/end
-                clue_no = int(clue_no_search.group(1))
-                clue_text = clue_no_search.group(2).lstrip().rstrip()
+        for area, cnt in sorted(zip(areas, contours), key=lambda item: item[0], reverse=True):
 
-                length_val_match = length_val_search.group(1)
+            if area < min_area:
+                break
 
-                # Remove whitespace
-                length_val_match = length_val_match.replace(" ", "")
+            # Get the approximated contour
+            approx = cv2.approxPolyDP(cnt, 0.02 * cv2.arcLength(cnt, True), True)
+            if len(approx) == 4:
+                return cnt
 
-                if ',' in length_val_match:
-                    word_lengths = length_val_match.split(',')
-                    answer_len = list(map(int, word_lengths))
-                else:
-                    answer_len = [int(length_val_match)]
+        return None
 
-                # Store the clue in the respective grid's map
-                crossword_puzzle.add_clue(clue_no, is_across, clue_text, answer_len)
+    @staticmethod
+    def clues_from_image(ocr_backend: OcrBackend, img, is_across: bool, clue_preprocessor: CluePreprocessor = None,
+                         instrumentation: Instrumentation = None):
+        """
+        Reads a column of clues from an image, finding each clue from the layout of the words OCR reads
+        :param ocr_backend: backend used to read the image
+        :param img: image object from cv2.imread()
+        :param is_across: True if the clues are from the across column, False otherwise
+        :param clue_preprocessor: preprocessing applied to the image before OCR, or None to read it as it is
+        :param instrumentation: receives the time taken by each stage and counts of what was read
+        :return: list of (clue number, clue text, answer length) tuples. Raises UnreadableCluesError, holding the
+                 clues that were read, if any clue couldn't be read even from a crop of its own lines
+        """
+
+        reader = CrosswordImageProcessor.clue_reader(img, is_across, clue_preprocessor, instrumentation)
+
+        try:
+            ocr_img, psm = next(reader)
+            while True:
+                ocr_img, psm = reader.send(ocr_backend.image_to_data(ocr_img, lang='eng', psm=psm))
+        except StopIteration as stop:
+            return stop.value
+
+    @staticmethod
+    def clue_reader(img, is_across: bool, clue_preprocessor: CluePreprocessor = None,
+                    instrumentation: Instrumentation = None):
+        """
+        Reads a column of clues like clues_from_image(), leaving the OCR to the caller, so that it can be
+        run however suits the caller (e.g. without blocking an event loop)
+        :param img: image object from cv2.imread()
+        :param is_across: True if the clues are from the across column, False otherwise
+        :param clue_preprocessor: preprocessing applied to the image before OCR, or None to read it as it is
+        :param instrumentation: receives the time taken by each stage and counts of what was read
+        :return: generator yielding (image, page segmentation mode) for each image to read, to which the
+                 caller sends back the TSV output of OcrBackend.image_to_data() for it, and returning the
+                 list of (clue number, clue text, answer length) tuples, or raising UnreadableCluesError
+        """
+
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
+        direction = 'across' if is_across else 'down'
+
+        # IMAGE PREPROCESSING
+
+        if clue_preprocessor is not None:
+            with instrumentation.stage("preprocess", direction=direction):
+                img = clue_preprocessor.preprocess(img)
+
+        # Read the words on the page along with where they are
+        with instrumentation.stage("ocr", direction=direction, scope="page"):
+            words = parse_tsv((yield img, 6))
+
+        instrumentation.count("ocr_characters", sum(len(word.text) for word in words), direction=direction)
+
+        # EXTRACT THE CLUES
+
+        with instrumentation.stage("parse", direction=direction):
+            entries = ClueLayoutParser.parse(words)
+
+        # Where each clue ends on the page, taken before any are read again, as the entries replacing a clue
+        # that was read again have the coordinates of its crop
+        next_tops = [entry.lines[0].top for entry in entries[1:]] + [img.shape[0]]
+
+        # Read the clues that are unclear again on their own, rather than the whole page
+        for index in reversed(range(len(entries))):
+            entry = entries[index]
+            if entry.error is not None or entry.confidence < CrosswordImageProcessor.REOCR_MIN_CONFIDENCE:
+                next_top = next_tops[index]
+                entries[index:index + 1] = yield from CrosswordImageProcessor.__reread_clue(
+                    img, entry, next_top, instrumentation, direction
+                )
+
+        if not entries:
+            raise ValueError(f"Couldn't find any {direction} clues in the image")
+
+        clues = [(entry.clue_no, entry.text, entry.answer_len) for entry in entries if entry.error is None]
+        unreadable = [entry for entry in entries if entry.error is not None]
+
+        instrumentation.count("clues_parsed", len(clues), direction=direction)
+        instrumentation.count("clues_skipped", len(unreadable), direction=direction)
+
+        # A puzzle missing a clue would still verify, so fail, keeping the clues that were read on the error
+        if unreadable:
+            raise UnreadableCluesError(direction, unreadable, clues)
+
+        return clues
@@ -0,0 +1,197 @@
+import contextlib
+import logging
+import threading
+import time
+from collections import namedtuple
+
+# Something measured while digitising a puzzle: kind is "timing" (value in seconds) or "count",
+# and labels is a tuple of (name, value) pairs telling apart measurements of the same name
+InstrumentationEvent = namedtuple('InstrumentationEvent', ['kind', 'name', 'value', 'labels'])
+
+# Context manager that does nothing, shared by every stage when no sinks are attached
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class Instrumentation:
+    """
+    Times the stages of the pipeline and counts what they produce, passing each measurement to its sinks.
+    With no sinks attached, stage() and count() return straight away, so leaving the calls in costs
+    next to nothing. Progress messages are printed if verbose.
+
+    Stages can run on several threads at once, so sinks must be safe to call from any thread.
+    """
+
+    def __init__(self, *sinks, verbose: bool = True):
+        """
+        :param sinks: objects with a record(event) method, e.g. CallbackSink, LoggingSink or PrometheusSink
+        :param verbose: whether to print progress messages
+        """
+        self._sinks = sinks
+        self.verbose = verbose
+
+    @property
+    def enabled(self):
+        """
+        Whether any sinks are attached
+        """
+        return bool(self._sinks)
+
+    def stage(self, name: str, **labels):
+        """
+        Times a stage of the pipeline, recording its duration when the context exits (even on an error)
+        :param name: name of the stage, e.g. "ocr"
+        :param labels: details telling apart runs of the same stage, e.g. direction="across"
+        :return: context manager
+        """
+
+        if not self._sinks:
+            return _NULL_STAGE
+
+        return self.__timed_stage(name, labels)
+
+    def count(self, name: str, value: int = 1, **labels):
+        """
+        Adds to a count
+        :param name: name of the count, e.g. "clues_parsed"
+        :param value: amount to add
+        :param labels: details telling apart counts of the same name
+        """
+
+        if self._sinks:
+            self.__record(InstrumentationEvent("count", name, value, tuple(sorted(labels.items()))))
+
+    def message(self, text: str):
+        """
+        Reports progress to the user
+        """
+
+        if self.verbose:
+            print(text)
+
+    @contextlib.contextmanager
+    def __timed_stage(self, name: str, labels: dict):
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.__record(InstrumentationEvent("timing", name, time.perf_counter() - start,
+                                               tuple(sorted(labels.items()))))
+
+    def __record(self, event: InstrumentationEvent):
+        for sink in self._sinks:
+            sink.record(event)
+
+
+class CallbackSink:
+    """
+    Passes every measurement to a function
+    """
+
+    def __init__(self, callback):
+        """
+        :param callback: function taking an InstrumentationEvent, which may be called from several threads
+        """
+        self._callback = callback
+
+    def record(self, event: InstrumentationEvent):
+        self._callback(event)
+
+
+class LoggingSink:
+    """
+    Logs every measurement
+    """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG):
+        """
+        :param logger: logger to write to (defaults to the "crossword_digitiser" logger)
+        :param level: level to log the measurements at
+        """
+        self._logger = logger or logging.getLogger("crossword_digitiser")
+        self._level = level
+
+    def record(self, event: InstrumentationEvent):
+
+        if not self._logger.isEnabledFor(self._level):
+            return
+
+        labels = "".join(f" {name}={value}" for name, value in event.labels)
+
+        if event.kind == "timing":
+            self._logger.log(self._level, "stage %s took %.2f ms%s", event.name, event.value * 1e3, labels)
+        else:
+            self._logger.log(self._level, "count %s +%d%s", event.name, event.value, labels)
+
+
+class PrometheusSink:
+    """
+    Accumulates measurements for export in the Prometheus text format: each stage becomes a summary of
+    its total time and number of runs, and each count becomes a counter
+    """
+
+    def __init__(self, namespace: str = "crossword"):
+        """
+        :param namespace: prefix of the metric names
+        """
+
+        self._namespace = namespace
+        self._lock = threading.Lock()
+
+        # Map of (stage name, labels) to [total seconds, number of runs]
+        self._timings = {}
+
+        # Map of (count name, labels) to the total
+        self._counts = {}
+
+    def record(self, event: InstrumentationEvent):
+
+        with self._lock:
+            if event.kind == "timing":
+                timing = self._timings.setdefault((event.name, event.labels), [0.0, 0])
+                timing[0] += event.value
+                timing[1] += 1
+            else:
+                key = (event.name, event.labels)
+                self._counts[key] = self._counts.get(key, 0) + event.value
+
+    def render(self):
+        """
+        Exports the measurements so far
+        :return: the metrics in the Prometheus text exposition format
+        """
+
+        with self._lock:
+            timings = sorted(self._timings.items())
+            counts = sorted(self._counts.items())
+
+        stage_metric = f"{self._namespace}_stage_seconds"
+        lines = [f"# HELP {stage_metric} Time spent in each stage of the pipeline",
+                 f"# TYPE {stage_metric} summary"]
+
+        for (name, labels), (seconds, runs) in timings:
+            label_text = self.__labels((("stage", name),) + labels)
+            lines.append(f"{stage_metric}_sum{label_text} {seconds:.6f}")
+            lines.append(f"{stage_metric}_count{label_text} {runs}")
+
+        for name in sorted({name for (name, _), _ in counts}):
+            lines.append(f"# TYPE {self._namespace}_{name}_total counter")
+            for (count_name, labels), total in counts:
+                if count_name == name:
+                    lines.append(f"{self._namespace}_{name}_total{self.__labels(labels)} {total}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __labels(labels):
+        """
+        Formats labels for the Prometheus text format, escaping their values
+        """
+
+        if not labels:
+            return ""
+
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
@@ -1,6 +1,10 @@
 import json
+import os
+
+import numpy as np
 
 from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+from crossword_puzzle.exceptions import CrosswordPuzzleError
 
 
 class CrosswordJsonProcessor:
@@ -9,7 +13,7 @@ class CrosswordJsonProcessor:
     def crossword_from_json(json_string: str):
         """
         Takes in a JSON string containing data to build a Crossword Puzzle.
-        Verifies the state of the data before building the crossword, after which
+        Verifies the state of the data while building the crossword, after which
         it will verify that the clues align with the structure of the grid.
         :param json_string:
         :return: a fully built CrosswordPuzzle object
@@ -17,35 +21,60 @@ class CrosswordJsonProcessor:
 
         crossword_data = json.loads(json_string)
 
-        num_rows, num_cols = CrosswordJsonProcessor.__verify_json_structure(crossword_data)
+        return CrosswordJsonProcessor.__crossword_from_data(crossword_data)
 
-        crossword_puzzle = CrosswordPuzzle()
+    @staticmethod
+    def crosswords_from_jsonl(source):
+        """
+        Reads puzzles from JSON Lines data (one JSON puzzle per line), building each one as it is read,
+        so only one line is held in memory at a time however many puzzles there are.
+        Blank lines are skipped. A record that can't be turned into a puzzle doesn't stop the rest.
+        :param source: path of a JSONL file, or a file-like object (text or binary) to read lines from
+        :return: generator of (line number, CrosswordPuzzle, None) for each valid record, and
+                 (line number, None, exception) for each invalid one
+        """
 
-        crossword_puzzle.set_grid(num_rows, num_cols)
+        if isinstance(source, (str, bytes, os.PathLike)):
+            with open(source, encoding='utf-8') as f:
+                yield from CrosswordJsonProcessor.crosswords_from_jsonl(f)
+            return
 
-        # Extract the grid
-        grid = crossword_data["grid"]
+        for line_no, line in enumerate(source, start=1):
+
+            if not line.strip():
+                continue
+
+            try:
+                crossword_puzzle = CrosswordJsonProcessor.__crossword_from_data(json.loads(line))
+            except (ValueError, InvalidJsonCrosswordDataError, CrosswordPuzzleError) as e:
+                yield line_no, None, e
+            else:
+                yield line_no, crossword_puzzle, None
+
+    @staticmethod
+    def __crossword_from_data(crossword_data):
+        """
+        Verifies decoded JSON data and builds the puzzle from it in the same pass
+        :param crossword_data: the decoded JSON data
+        :return: a fully built CrosswordPuzzle object
+        """
 
-        for i, row in enumerate(grid):
-            for j, cell in enumerate(row):
-                if cell == "1":
-                    crossword_puzzle.turn_cell_white(i, j)
-                elif cell == "0":
-                    crossword_puzzle.turn_cell_black(i, j)
-                else:
-                    raise InvalidJsonCrosswordDataError(f"Invalid input in cell. Row: {i} Col: {j}")
+        if type(crossword_data) is not dict:
+            raise InvalidJsonCrosswordDataError("Expected a JSON object at the root level")
 
-        # Extract the across clues
-        across_clues = crossword_data["across"]
+        crossword_puzzle = CrosswordPuzzle()
+
+        # Extract the grid
+        crossword_puzzle.load_grid(CrosswordJsonProcessor.__grid_cells(crossword_data))
 
-        for clue_no, clue_data in across_clues.items():
-            crossword_puzzle.add_clue(int(clue_no), True, clue_data["clue"], clue_data["length"])
+        # Extract the across and down clues
+        for key, is_across in (("across", True), ("down", False)):
 
-        # Extract the down clues
-        down_clues = crossword_data["down"]
+            if key not in crossword_data:
+                raise InvalidJsonCrosswordDataError(f"{key.capitalize()} clues not found. "
+                                                    f"Expected \"{key}\" in root-level data")
 
-        for clue_no, clue_data in down_clues.items():
-            crossword_puzzle.add_clue(int(clue_no), False, clue_data["clue"], clue_data["length"])
+            CrosswordJsonProcessor.__add_clues(crossword_puzzle, crossword_data[key], is_across)
 
         # Verify the structure of the crossword puzzle
         crossword_puzzle.verify_and_sync()
@@ -53,15 +82,13 @@ class CrosswordJsonProcessor:
         return crossword_puzzle
 
     @staticmethod
-    def __verify_json_structure(data):
+    def __grid_cells(data):
         """
-        Takes in decoded JSON data and verifies that the structure is valid for the crossword solver
+        Verifies that the grid in decoded JSON data is valid for the crossword solver
         :param data: the decoded JSON data
-        :return: the number of rows and columns in the grid
+        :return: 2D boolean NumPy array, True for white cells
         """
 
-        # VERIFY THE GRID
-
         if "grid" not in data:
             raise InvalidJsonCrosswordDataError("Grid not found. Expected \"Grid\" in root-level data")
 
@@ -69,44 +96,25 @@ class CrosswordJsonProcessor:
         grid_error = InvalidJsonCrosswordDataError("Incorrect \"grid\" structure. Expected a 2D array of \"0s and \"1s")
 
         # Check that we have a populated list
-        if type(grid) is not list or len(grid) < 1 or len(grid[0]) < 1:
+        if type(grid) is not list or len(grid) < 1 or type(grid[0]) is not list or len(grid[0]) < 1:
             raise grid_error
 
         # Check that it's a 2D list containing 0s and 1s
-        num_rows = len(grid)
         num_cols = len(grid[0])
 
         for row in grid:
-            if (type(row) is not list) or (len(row) != num_cols) or any(cell not in ["0", "1"] for cell in row):
+            if (type(row) is not list) or (len(row) != num_cols) or any(cell != "0" and cell != "1" for cell in row):
                 raise grid_error
 
-        # VERIFY ACROSS/DOWN CLUES
-
-        if "across" not in data:
-            raise InvalidJsonCrosswordDataError("Across clues not found. Expected \"across\" in root-level data")
-
-        if "down" not in data:
-            raise InvalidJsonCrosswordDataError("Down clues not found. Expected \"down\" in root-level data")
-
-        across_clues = data["across"]
-        down_clues = data["down"]
-
-        CrosswordJsonProcessor.__verify_clue_structure(across_clues)
-        CrosswordJsonProcessor.__verify_clue_structure(down_clues)
-
-        # FINAL CHECKS
-
-        # Check that only the 3 fields exist
-        if type(data) is not dict and len(data) != 3:
-            raise InvalidJsonCrosswordDataError("Superfluous root-level data: expected \"across\", \"down\", \"grid\"")
-
-        return num_rows, num_cols
+        return np.array(grid) == "1"
 
     @staticmethod
-    def __verify_clue_structure(clues):
+    def __add_clues(crossword_puzzle: CrosswordPuzzle, clues, is_across: bool):
         """
-        Verifies that the JSON structures of the across/down clues are correct
+        Verifies that the JSON structures of the across/down clues are correct, adding each clue to the puzzle
+        :param crossword_puzzle: the puzzle to add the clues to
         :param clues: the mapping of clue numbers to clue data
+        :param is_across: across or down clues
         """
 
         clue_error = InvalidJsonCrosswordDataError(
@@ -114,6 +122,9 @@ class CrosswordJsonProcessor:
             "Expected array of JSON objects of $CLUE_NO: {\"clue\": $CLUE, \"length\": [$LENGTH]}"
         )
 
+        if type(clues) is not dict:
+            raise clue_error
+
         for clue_no, clue_data in clues.items():
 
             # Check that the clue_no is a positive integer
@@ -121,7 +132,7 @@ class CrosswordJsonProcessor:
                 raise InvalidJsonCrosswordDataError("Expected clue numbers to be positive integers")
 
             # Check that both "clue" and "length" is in the JSON object
-            if "clue" not in clue_data or "length" not in clue_data:
+            if type(clue_data) is not dict or "clue" not in clue_data or "length" not in clue_data:
                 raise clue_error
 
             # Check if "clue" contains a string
@@ -132,6 +143,8 @@ class CrosswordJsonProcessor:
             if type(clue_data["length"]) is not list or any(type(length) is not int for length in clue_data["length"]):
                 raise clue_error
 
+            crossword_puzzle.add_clue(int(clue_no), is_across, clue_data["clue"], clue_data["length"])
+
 
 class InvalidJsonCrosswordDataError(Exception):
 
@@ -1,56 +1,302 @@
 #!/usr/bin/python
 
+import argparse
+import contextlib
+import json
+import os
 import sys
-import cv2.cv2 as cv2
 
-from image_to_crossword import CrosswordImageProcessor
-from json_to_crossword import CrosswordJsonProcessor
+# Only the standard library is imported here. Each command imports what it needs when it runs, so the
+# commands working on JSON start without loading OpenCV or the OCR backends
 
+# Formats the export command reads and writes, by file extension
+_FORMATS = {".json": "json", ".jsonl": "jsonl", ".xwpa": "archive"}
 
-def main(argv):
 
-    grid_img = cv2.imread("test_images/8_grid.png")
-    across_img = cv2.imread("test_images/8_clues_across.png")
-    down_img = cv2.imread("test_images/8_clues_down.png")
-    image_puzzle = CrosswordImageProcessor.crossword_from_images(
-        tesseract_path=r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe",
-        grid_img=grid_img,
-        across_clues_img=across_img,
-        down_clues_img=down_img,
-        rows=9,
-        cols=7
+def from_images(args):
+    """
+    Digitises a puzzle from its images, writing it as JSON
+    """
+
+    from crossword_puzzle.exceptions import CrosswordPuzzleError
+    from image_to_crossword import CrosswordImageProcessor
+    from instrumentation import Instrumentation
+    from ocr_backends import OcrError
+
+    instrumentation = Instrumentation(verbose=not args.quiet)
+
+    try:
+        # Keep progress messages away from stdout, which may be carrying the puzzle
+        with contextlib.redirect_stdout(sys.stderr):
+            crossword_puzzle = CrosswordImageProcessor.crossword_from_images(
+                tesseract_path=args.tesseract,
+                grid_img=CrosswordImageProcessor.read_image(args.grid, instrumentation),
+                across_clues_img=CrosswordImageProcessor.read_image(args.across, instrumentation),
+                down_clues_img=CrosswordImageProcessor.read_image(args.down, instrumentation),
+                rows=args.rows,
+                cols=args.cols,
+                instrumentation=instrumentation,
+                ocr_cache_dir=args.ocr_cache
+            )
+    except (ValueError, OcrError, CrosswordPuzzleError) as e:
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+
+    with _open_output(args.output) as output:
+        json.dump(crossword_puzzle.to_dict(), output, indent=args.indent)
+        output.write("\n")
+
+    return 0
+
+
+def from_json(args):
+    """
+    Loads a puzzle from JSON and prints its grid and clues
+    """
+
+    from crossword_puzzle.exceptions import CrosswordPuzzleError
+    from json_to_crossword import CrosswordJsonProcessor, InvalidJsonCrosswordDataError
+
+    if args.file == "-":
+        json_string = sys.stdin.read()
+    else:
+        with open(args.file, encoding='utf-8') as f:
+            json_string = f.read()
+
+    try:
+        crossword_puzzle = CrosswordJsonProcessor.crossword_from_json(json_string)
+    except (ValueError, InvalidJsonCrosswordDataError, CrosswordPuzzleError) as e:
+        print(f"{args.file}: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+
+    crossword_puzzle.print_data()
+
+    return 0
+
+
+def verify(args):
+    """
+    Checks that every puzzle in JSON, JSON Lines or archive files is valid, reporting the ones that aren't
+    """
+
+    valid, invalid = 0, 0
+
+    for path in args.files:
+        for location, crossword_puzzle, error in _read_puzzles(path):
+
+            if error is None:
+                valid += 1
+                continue
+
+            invalid += 1
+            print(f"{location}: {type(error).__name__}: {error}")
+
+    if not args.quiet:
+        print(f"{valid} valid, {invalid} invalid", file=sys.stderr)
+
+    return 1 if invalid else 0
+
+
+def export(args):
+    """
+    Converts puzzles between JSON, JSON Lines and archive files. Invalid puzzles are reported and left out
+    """
+
+    output_format = args.format or _format_of(args.output)
+    failures = 0
+
+    def valid_puzzles():
+        nonlocal failures
+
+        for path in args.inputs:
+            for location, crossword_puzzle, error in _read_puzzles(path):
+                if error is None:
+                    yield crossword_puzzle
+                else:
+                    failures += 1
+                    print(f"{location}: {type(error).__name__}: {error}", file=sys.stderr)
+
+    if output_format == "archive":
+
+        from crossword_puzzle.archive import PuzzleArchiveWriter
+
+        with PuzzleArchiveWriter(args.output) as writer:
+            for crossword_puzzle in valid_puzzles():
+                writer.add(crossword_puzzle)
+
+    elif output_format == "jsonl":
+
+        with _open_output(args.output) as output:
+            for crossword_puzzle in valid_puzzles():
+                output.write(json.dumps(crossword_puzzle.to_dict()) + "\n")
+
+    else:
+
+        puzzles = list(valid_puzzles())
+
+        if len(puzzles) != 1:
+            print(f"A JSON file holds a single puzzle, but {len(puzzles)} were read. "
+                  f"Export to JSON Lines or an archive instead", file=sys.stderr)
+            return 1
+
+        with _open_output(args.output) as output:
+            json.dump(puzzles[0].to_dict(), output, indent=args.indent)
+            output.write("\n")
+
+    return 1 if failures else 0
+
+
+def batch(args):
+    """
+    Digitises every puzzle in a directory, writing JSON Lines results
+    """
+
+    from batch_to_crossword import CrosswordBatchProcessor
+    from instrumentation import Instrumentation
+
+    results = CrosswordBatchProcessor.crosswords_from_directory(
+        tesseract_path=args.tesseract,
+        directory=args.directory,
+        rows=args.rows,
+        cols=args.cols,
+        max_workers=args.workers,
+        instrumentation=Instrumentation(verbose=not args.quiet),
+        ocr_cache_dir=args.ocr_cache
     )
 
-    image_puzzle.print_data()
-
-    # test_data = """
-    # {
-    #     "grid": [
-    #         ["1", "1", "1", "1", "1", "1"],
-    #         ["0", "0", "1", "0", "0", "0"],
-    #         ["0", "0", "1", "0", "0", "0"],
-    #         ["0", "0", "1", "0", "0", "0"],
-    #         ["0", "0", "1", "0", "0", "0"],
-    #         ["0", "0", "0", "0", "0", "0"]
-    #     ],
-    #     "across": {
-    #         "1": {
-    #             "clue": "Example",
-    #             "length": [6]
-    #         }
-    #     },
-    #     "down": {
-    #         "2": {
-    #             "clue": "Example2",
-    #             "length": [1,1,1,1,1]
-    #         }
-    #     }
-    # }
-    # """
-    # json_puzzle = CrosswordJsonProcessor.crossword_from_json(test_data)
-    # json_puzzle.solve_clue(1, True, "Answer")
-    # json_puzzle.print_data()
+    with _open_output(args.output) as output:
+        failures = CrosswordBatchProcessor.write_jsonl(results, output)
+
+    return 1 if failures else 0
+
+
+def _read_puzzles(path: str):
+    """
+    Reads the puzzles in a JSON, JSON Lines or archive file, chosen by its extension
+    :return: generator of (location, CrosswordPuzzle, None) for each valid puzzle, and
+             (location, None, exception) for each invalid one, where location names the file and record
+    """
+
+    from crossword_puzzle.exceptions import CrosswordPuzzleError
+    from json_to_crossword import CrosswordJsonProcessor, InvalidJsonCrosswordDataError
+
+    input_format = _format_of(path)
+
+    if input_format == "jsonl":
+
+        for line_no, crossword_puzzle, error in CrosswordJsonProcessor.crosswords_from_jsonl(path):
+            yield f"{path}:{line_no}", crossword_puzzle, error
+
+    elif input_format == "archive":
+
+        from crossword_puzzle.archive import PuzzleArchive
+
+        try:
+            archive = PuzzleArchive(path)
+        except ValueError as e:
+            yield path, None, e
+            return
+
+        with archive:
+            for index in range(len(archive)):
+                try:
+                    yield f"{path}[{index}]", archive[index], None
+                except (ValueError, CrosswordPuzzleError) as e:
+                    yield f"{path}[{index}]", None, e
+
+    else:
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                crossword_puzzle = CrosswordJsonProcessor.crossword_from_json(f.read())
+        except (ValueError, InvalidJsonCrosswordDataError, CrosswordPuzzleError) as e:
+            yield path, None, e
+        else:
+            yield path, crossword_puzzle, None
+
+
+def _format_of(path: str):
+    """
+    Finds the format of a puzzle file from its extension, treating unknown extensions as JSON
+    """
+    return _FORMATS.get(os.path.splitext(path)[1].lower(), "json")
+
+
+def _open_output(path: str):
+    """
+    Opens a file to write to, or stdout (left open afterwards) if no path is given
+    """
+
+    if path is None or path == "-":
+        return contextlib.nullcontext(sys.stdout)
+
+    return open(path, "w", encoding='utf-8')
+
+
+def _build_parser():
+
+    parser = argparse.ArgumentParser(description="Digitise crossword puzzles and work with digitised ones")
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    command = commands.add_parser("from-images", help="digitise a puzzle from images of its grid and clues")
+    command.add_argument("grid", help="image of the grid")
+    command.add_argument("across", help="image of the across clues")
+    command.add_argument("down", help="image of the down clues")
+    command.add_argument("--rows", type=int, default=None, help="number of rows in the grid (inferred if not given)")
+    command.add_argument("--cols", type=int, default=None, help="number of columns in the grid (inferred if not given)")
+    command.add_argument("--tesseract", default="tesseract", help="path to the Tesseract executable")
+    command.add_argument("--ocr-cache", default=None, metavar="DIR",
+                         help="directory to cache OCR results in, so images already read aren't read again")
+    command.add_argument("--output", default=None, help="file to write the puzzle to as JSON (defaults to stdout)")
+    command.add_argument("--indent", type=int, default=None, help="indentation of the JSON written")
+    command.add_argument("--quiet", action="store_true", help="don't print progress messages")
+    command.set_defaults(run=from_images)
+
+    command = commands.add_parser("from-json", help="load a puzzle from JSON and print its grid and clues")
+    command.add_argument("file", help="JSON file of the puzzle, or - to read from stdin")
+    command.set_defaults(run=from_json)
+
+    command = commands.add_parser("verify", help="check the puzzles in JSON, JSON Lines (.jsonl) or archive "
+                                                 "(.xwpa) files, exiting with 1 if any are invalid")
+    command.add_argument("files", nargs="+", help="files of puzzles")
+    command.add_argument("--quiet", action="store_true", help="don't print the number of valid and invalid puzzles")
+    command.set_defaults(run=verify)
+
+    command = commands.add_parser("export", help="convert puzzles between JSON, JSON Lines (.jsonl) and "
+                                                 "archive (.xwpa) files")
+    command.add_argument("inputs", nargs="+", help="files of puzzles to read")
+    command.add_argument("--output", required=True, help="file to write, or - for stdout")
+    command.add_argument("--format", choices=sorted(set(_FORMATS.values())), default=None,
+                         help="format to write (inferred from the output's extension if not given)")
+    command.add_argument("--indent", type=int, default=None, help="indentation of the JSON written")
+    command.set_defaults(run=export)
+
+    command = commands.add_parser("batch", help="digitise every puzzle in a directory, writing JSON Lines results")
+    command.add_argument("directory", help="directory containing N_grid, N_clues_across and N_clues_down images")
+    command.add_argument("--tesseract", default="tesseract", help="path to the Tesseract executable")
+    command.add_argument("--rows", type=int, default=None, help="number of rows in the grids (inferred if not given)")
+    command.add_argument("--cols", type=int, default=None,
+                         help="number of columns in the grids (inferred if not given)")
+    command.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    command.add_argument("--ocr-cache", default=None, metavar="DIR",
+                         help="directory to cache OCR results in, so images already read aren't read again")
+    command.add_argument("--output", default=None, help="file to write the results to (defaults to stdout)")
+    command.add_argument("--quiet", action="store_true", help="don't print progress messages")
+    command.set_defaults(run=batch)
+
+    return parser
+
+
+def main(argv):
+
+    args = _build_parser().parse_args(argv)
+
+    try:
+        return args.run(args)
+    except OSError as e:
+        print(f"{args.command}: {e}", file=sys.stderr)
+        return 2
 
 
 if __name__ == '__main__':
-    main(sys.argv[1:])
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,313 @@
+import queue
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from contextlib import contextmanager
+
+import cv2.cv2 as cv2
+
+
+class OcrBackend(ABC):
+    """
+    Interface for OCR engines used to read the clue images.
+    Implementations must be safe to call from multiple threads at once.
+    """
+
+    @property
+    @abstractmethod
+    def version(self) -> str:
+        """
+        Identifies the engine and its version, e.g. "tesseract 5.3.0"
+        """
+
+    @abstractmethod
+    def image_to_string(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        """
+        Converts an image of text into a string
+        :param img: image object from cv2.imread()
+        :param lang: language of the text
+        :param psm: Tesseract page segmentation mode
+        :return: the text found in the image
+        """
+
+    @abstractmethod
+    def image_to_data(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        """
+        Reads an image of text, describing every word found
+        :param img: image object from cv2.imread()
+        :param lang: language of the text
+        :param psm: Tesseract page segmentation mode
+        :return: Tesseract's TSV output, with the position, bounding box and confidence of each word
+                 (see parse_tsv())
+        """
+
+    def close(self):
+        """
+        Releases any resources held by the backend
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TesseractSubprocessBackend(OcrBackend):
+    """
+    Runs a new Tesseract process for every image. Slower than a pool of engines as the
+    language data is reloaded for every call, but only needs the Tesseract executable.
+    """
+
+    def __init__(self, tesseract_path: str = 'tesseract'):
+        self._tesseract_path = tesseract_path
+        self._version = None
+        self._version_lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        with self._version_lock:
+            if self._version is None:
+                output = self.__run([self._tesseract_path, '--version'], b'')
+                self._version = output.decode().splitlines()[0].strip()
+        return self._version
+
+    def build_command(self, lang: str, psm: int, *configs: str):
+        """
+        Builds the command line that makes Tesseract read an image from stdin and write to stdout
+        :param lang: language of the text
+        :param psm: Tesseract page segmentation mode
+        :param configs: names of extra Tesseract config files (e.g. "tsv")
+        :return: list of arguments
+        """
+        return [self._tesseract_path, 'stdin', 'stdout', '-l', lang, '--psm', str(psm), *configs]
+
+    def image_to_string(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        output = self.__run(self.build_command(lang, psm), encode_image(img))
+        return output.decode()
+
+    def image_to_data(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        output = self.__run(self.build_command(lang, psm, 'tsv'), encode_image(img))
+        return output.decode()
+
+    def __run(self, command, input_bytes: bytes):
+        """
+        Runs Tesseract, passing the command's arguments explicitly rather than through global state
+        :return: the bytes written to stdout
+        """
+
+        try:
+            process = subprocess.run(command, input=input_bytes, capture_output=True)
+        except FileNotFoundError:
+            raise OcrError(f"Tesseract executable not found at {self._tesseract_path}")
+
+        if process.returncode != 0:
+            raise OcrError(f"Tesseract failed with exit code {process.returncode}: "
+                           f"{process.stderr.decode(errors='replace').strip()}")
+
+        return process.stdout
+
+
+class TesseractPoolBackend(OcrBackend):
+    """
+    Keeps a pool of long-lived Tesseract engines (through the optional tesserocr package) with
+    their language data already loaded. Each call borrows an engine, so up to `size` images are
+    read concurrently and further calls wait for an engine to be returned.
+    """
+
+    def __init__(self, size: int = 2, lang: str = 'eng', tessdata_path: str = None):
+        """
+        :param size: number of engines kept per language
+        :param lang: language to preload engines for
+        :param tessdata_path: directory containing the Tesseract language data
+        """
+
+        # Only import tesserocr here, as it's an optional dependency
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._size = size
+        self._tessdata_path = tessdata_path
+        self._pools = {}
+        self._engines = []
+        self._pools_lock = threading.Lock()
+
+        # Preload the default language so the first call doesn't pay for it. tesserocr raises RuntimeError
+        # if an engine can't be started, e.g. without the language data, so end any that were
+        try:
+            self.__get_pool(lang)
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def version(self) -> str:
+        return f"tesseract {self._tesserocr.tesseract_version().splitlines()[0].split()[-1]}"
+
+    def image_to_string(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        with self.__engine(lang) as engine:
+            engine.SetPageSegMode(psm)
+            self.__set_image(engine, img)
+            return engine.GetUTF8Text()
+
+    def image_to_data(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        with self.__engine(lang) as engine:
+            engine.SetPageSegMode(psm)
+            self.__set_image(engine, img)
+            return engine.GetTSVText(0)
+
+    def close(self):
+        with self._pools_lock:
+            for engine in self._engines:
+                engine.End()
+            self._engines.clear()
+            self._pools.clear()
+
+    def __get_pool(self, lang: str):
+        """
+        Gets the pool of engines for a language, creating the engines if needed
+        """
+
+        with self._pools_lock:
+
+            if lang not in self._pools:
+
+                pool = queue.Queue()
+
+                for _ in range(self._size):
+                    kwargs = {"lang": lang}
+                    if self._tessdata_path is not None:
+                        kwargs["path"] = self._tessdata_path
+                    engine = self._tesserocr.PyTessBaseAPI(**kwargs)
+                    self._engines.append(engine)
+                    pool.put(engine)
+
+                self._pools[lang] = pool
+
+            return self._pools[lang]
+
+    @contextmanager
+    def __engine(self, lang: str):
+        """
+        Borrows an engine from the pool for the duration of the context
+        """
+
+        pool = self.__get_pool(lang)
+        engine = pool.get()
+
+        try:
+            yield engine
+        finally:
+            pool.put(engine)
+
+    @staticmethod
+    def __set_image(engine, img):
+        """
+        Passes the pixels of an OpenCV image straight to an engine, without encoding them
+        """
+
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            channels = 3
+        else:
+            channels = 1
+
+        height, width = img.shape[:2]
+        engine.SetImageBytes(img.tobytes(), width, height, channels, width * channels)
+
+
+def encode_image(img) -> bytes:
+    """
+    Encodes an OpenCV image as a PNG, favouring speed over size
+    :param img: image object from cv2.imread()
+    :return: the PNG file contents
+    """
+
+    success, buffer = cv2.imencode('.png', img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+
+    if not success:
+        raise OcrError("Couldn't encode the image for Tesseract")
+
+    return buffer.tobytes()
+
+
+# A word read by Tesseract: where it is in the page's layout, its bounding box and its confidence (0 to 100)
+OcrWord = namedtuple('OcrWord', ['block', 'paragraph', 'line', 'left', 'top', 'width', 'height', 'confidence', 'text'])
+
+
+def parse_tsv(tsv: str):
+    """
+    Extracts the words from Tesseract's TSV output
+    :param tsv: output of OcrBackend.image_to_data()
+    :return: list of OcrWord in reading order
+    """
+
+    words = []
+
+    for row in tsv.splitlines():
+
+        fields = row.split('\t')
+
+        # Only rows of level 5 are words. The header and the rows for pages, blocks, paragraphs and lines are skipped
+        if len(fields) < 12 or fields[0] != '5' or not fields[11].strip():
+            continue
+
+        words.append(OcrWord(int(fields[2]), int(fields[3]), int(fields[4]), int(fields[6]), int(fields[7]),
+                             int(fields[8]), int(fields[9]), float(fields[10]), fields[11].strip()))
+
+    return words
+
+
+def create_ocr_backend(tesseract_path: str = 'tesseract', pool_size: int = 2, cache_dir: str = None) -> OcrBackend:
+    """
+    Creates the fastest backend available: a pool of engines if tesserocr is installed and its
+    engines start, otherwise a backend running the Tesseract executable for every image
+    :param tesseract_path: path to the Tesseract executable, used by the fallback
+    :param pool_size: number of engines in the pool
+    :param cache_dir: directory of an OcrCache to keep the results in, so images already read aren't read again
+    :return: an OcrBackend
+    """
+
+    try:
+        backend = TesseractPoolBackend(size=pool_size)
+    except (ImportError, RuntimeError):
+        backend = TesseractSubprocessBackend(tesseract_path)
+
+    if cache_dir is not None:
+        # Imported here, as the cache module builds on this one
+        from ocr_cache import CachedOcrBackend, OcrCache
+        backend = CachedOcrBackend(backend, OcrCache(cache_dir))
+
+    return backend
+
+
+_shared_backends = {}
+_shared_backends_lock = threading.Lock()
+
+
+def get_shared_ocr_backend(tesseract_path: str = 'tesseract', cache_dir: str = None) -> OcrBackend:
+    """
+    Gets a backend shared by the whole process, creating it on first use so that
+    its engines stay warm between puzzles
+    :param tesseract_path: path to the Tesseract executable, used by the fallback
+    :param cache_dir: directory of an OcrCache to keep the results in (see create_ocr_backend())
+    :return: an OcrBackend
+    """
+
+    key = (tesseract_path, cache_dir)
+
+    with _shared_backends_lock:
+        if key not in _shared_backends:
+            _shared_backends[key] = create_ocr_backend(tesseract_path, cache_dir=cache_dir)
+        return _shared_backends[key]
+
+
+class OcrError(Exception):
+
+    def __init__(self, msg: str):
+        self.msg = msg
+
+    def __str__(self):
+        return self.msg
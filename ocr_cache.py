@@ -0,0 +1,248 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from ocr_backends import OcrBackend
+
+
+class OcrCache:
+    """
+    Persistent cache of OCR results, stored as one file per result in a directory.
+    Entries are addressed by a hash of everything that affects the result, and the least
+    recently used entries are evicted once the cache grows beyond its size limit.
+    """
+
+    # Temporary files older than this, in seconds, were left by writes that were interrupted and are removed
+    STALE_TEMP_SECONDS = 3600
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        :param directory: directory to store the results in (created if it doesn't exist)
+        :param max_bytes: maximum total size of the stored results
+        """
+
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # Map of keys to entry sizes, ordered from least to most recently used
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.__load_entries()
+
+    @staticmethod
+    def make_key(img, method: str, lang: str, psm: int, engine_version: str) -> str:
+        """
+        Creates the key of an OCR result
+        :param img: image object from cv2.imread()
+        :param method: name of the backend method producing the result
+        :param lang: language of the text
+        :param psm: Tesseract page segmentation mode
+        :param engine_version: version of the OCR engine
+        :return: hexadecimal digest identifying the result
+        """
+
+        digest = hashlib.sha256()
+        digest.update(f"{method}|{lang}|{psm}|{engine_version}|{img.shape}|{img.dtype}|".encode())
+        digest.update(img.tobytes())
+
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Gets a result from the cache, marking it as recently used
+        :param key: key from make_key()
+        :return: the stored result, or None if it isn't in the cache
+        """
+
+        with self._lock:
+
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            # Read the bytes that were written, without translating newlines
+            try:
+                with open(self.__path(key), 'rb') as f:
+                    value = f.read().decode('utf-8')
+            except FileNotFoundError:
+                # Removed by something else - forget about it
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Record the use on disk so recency survives restarts
+        try:
+            os.utime(self.__path(key))
+        except OSError:
+            pass
+
+        return value
+
+    def put(self, key: str, value: str):
+        """
+        Stores a result in the cache, evicting the least recently used results if needed
+        :param key: key from make_key()
+        :param value: the result to store
+        """
+
+        data = value.encode('utf-8')
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            self.__remove_temp_file(temp_path)
+            raise
+
+        with self._lock:
+
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+
+            self.__evict()
+
+    def clear(self):
+        """
+        Removes every result from the cache
+        """
+
+        with self._lock:
+            for key in self._entries:
+                self.__remove_file(key)
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Gets the cache's counters
+        :return: dictionary of hits, misses, the number of entries and their total size in bytes
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes
+            }
+
+    def __load_entries(self):
+        """
+        Finds the results already on disk, ordering them by when they were last used, and removes the
+        temporary files of writes that never finished. Recent ones are left, as another process sharing
+        the directory may still be writing them
+        """
+
+        found = []
+        stale_before = time.time() - OcrCache.STALE_TEMP_SECONDS
+
+        for dir_path, _, file_names in os.walk(self._directory):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                if file_name.endswith('.txt'):
+                    stat = os.stat(path)
+                    found.append((stat.st_mtime, file_name[:-len('.txt')], stat.st_size))
+                elif file_name.endswith('.tmp') and os.stat(path).st_mtime < stale_before:
+                    self.__remove_temp_file(path)
+
+        found.sort()
+
+        for _, key, size in found:
+            self._entries[key] = size
+            self._total_bytes += size
+
+        self.__evict()
+
+    def __evict(self):
+        """
+        Removes the least recently used results until the cache fits in its size limit
+        """
+
+        while self._total_bytes > self._max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.__remove_file(key)
+
+    def __remove_file(self, key: str):
+        try:
+            os.remove(self.__path(key))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def __remove_temp_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def __path(self, key: str):
+        # Spread the files over subdirectories to keep directory listings small
+        return os.path.join(self._directory, key[:2], f"{key}.txt")
+
+
+class CachedOcrBackend(OcrBackend):
+    """
+    Wraps another backend, only running it for images that aren't already in the cache
+    """
+
+    def __init__(self, backend: OcrBackend, cache: OcrCache):
+        """
+        :param backend: backend used on a cache miss
+        :param cache: cache of results
+        """
+        self._backend = backend
+        self._cache = cache
+
+    @property
+    def version(self) -> str:
+        return self._backend.version
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def image_to_string(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        key = OcrCache.make_key(img, 'image_to_string', lang, psm, self._backend.version)
+
+        text = self._cache.get(key)
+
+        if text is None:
+            text = self._backend.image_to_string(img, lang=lang, psm=psm)
+            self._cache.put(key, text)
+
+        return text
+
+    def image_to_data(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        key = OcrCache.make_key(img, 'image_to_data', lang, psm, self._backend.version)
+
+        data = self._cache.get(key)
+
+        if data is None:
+            data = self._backend.image_to_data(img, lang=lang, psm=psm)
+            self._cache.put(key, data)
+
+        return data
+
+    def close(self):
+        self._backend.close()
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+from crossword_puzzle.exceptions import AnswerHasConflictingCharacter, AnswersConflictError, AnswerDoesNotFitError, \
+    ClueDoesNotExistError
+
+
+def open_puzzle():
+    """
+    Builds a verified 3x3 puzzle with no black cells: 1, 4 and 5 across and 1, 2 and 3 down
+    """
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(np.ones((3, 3), dtype=bool))
+
+    for clue_no, is_across in ((1, True), (4, True), (5, True), (1, False), (2, False), (3, False)):
+        crossword_puzzle.add_clue(clue_no, is_across, f"Clue {clue_no}", [3])
+
+    crossword_puzzle.verify_and_sync()
+
+    return crossword_puzzle
+
+
+def letters(crossword_puzzle):
+    return ["".join(crossword_puzzle.get_cell(row, col) for col in range(3)) for row in range(3)]
+
+
+def test_undo_and_redo_answers():
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.solve_clue(1, False, "COW")
+
+    assert letters(crossword_puzzle) == ["CAT", "O11", "W11"]
+
+    assert crossword_puzzle.undo()
+    assert letters(crossword_puzzle) == ["CAT", "111", "111"]
+    assert crossword_puzzle.undo()
+    assert letters(crossword_puzzle) == ["111", "111", "111"]
+    assert not crossword_puzzle.undo()
+
+    assert crossword_puzzle.redo()
+    assert crossword_puzzle.redo()
+    assert letters(crossword_puzzle) == ["CAT", "O11", "W11"]
+    assert not crossword_puzzle.redo()
+
+
+def test_answers_already_in_the_grid_are_not_journaled():
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.solve_clues([(1, True, "CAT")])
+    crossword_puzzle.fill_cell(0, 0, "C")
+
+    assert crossword_puzzle.undo()
+    assert letters(crossword_puzzle) == ["111", "111", "111"]
+    assert not crossword_puzzle.undo()
+
+
+def test_answers_already_in_the_grid_keep_the_redo_history():
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.solve_clue(4, True, "OAR")
+    crossword_puzzle.undo()
+
+    crossword_puzzle.solve_clue(1, True, "CAT")
+
+    assert crossword_puzzle.redo()
+    assert letters(crossword_puzzle) == ["CAT", "OAR", "111"]
+
+
+def test_new_change_clears_the_redo_history():
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.undo()
+    crossword_puzzle.fill_cell(2, 2, "x")
+
+    assert not crossword_puzzle.redo()
+    assert letters(crossword_puzzle) == ["111", "111", "11X"]
+
+
+def test_clear_cell_can_be_undone():
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.clear_cell(0, 1)
+
+    assert letters(crossword_puzzle) == ["C1T", "111", "111"]
+    assert crossword_puzzle.undo()
+    assert letters(crossword_puzzle) == ["CAT", "111", "111"]
+
+
+@pytest.mark.parametrize("answers, error", [
+    # Disagree with each other on the middle cell
+    ([(4, True, "OAR"), (2, False, "AND")], AnswersConflictError),
+    # Disagrees with the letter already in the grid
+    ([(4, True, "OAR"), (5, True, "WEB"), (3, False, "TRY")], AnswerHasConflictingCharacter),
+    # Too long, after a valid answer in the same batch
+    ([(4, True, "OAR"), (5, True, "WEBS")], AnswerDoesNotFitError),
+])
+def test_failed_batch_leaves_the_grid_untouched(answers, error):
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAX")
+
+    with pytest.raises(error):
+        crossword_puzzle.solve_clues(answers)
+
+    assert letters(crossword_puzzle) == ["CAX", "111", "111"]
+
+    # Only the first answer was journaled
+    assert crossword_puzzle.undo()
+    assert not crossword_puzzle.undo()
+
+
+def test_changing_the_grid_structure_clears_the_journal():
+
+    crossword_puzzle = open_puzzle()
+    crossword_puzzle.solve_clue(5, True, "WEB")
+    crossword_puzzle.turn_cell_black(0, 0)
+
+    assert not crossword_puzzle.undo()
+
+
+def test_entries_without_clues_can_be_answered_once_verified():
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(np.ones((3, 3), dtype=bool))
+
+    with pytest.raises(ClueDoesNotExistError):
+        crossword_puzzle.solve_clue(4, True, "OAR")
+
+    crossword_puzzle.verify_and_sync()
+    crossword_puzzle.solve_clues([(4, True, "OAR"), (3, False, "TRY")])
+
+    assert letters(crossword_puzzle) == ["11T", "OAR", "11Y"]
+
+    with pytest.raises(AnswerDoesNotFitError):
+        crossword_puzzle.solve_clue(5, True, "WEBS")
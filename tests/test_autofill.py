@@ -0,0 +1,99 @@
+import random
+import string
+
+import numpy as np
+
+from crossword_puzzle.autofill import CrosswordAutofill
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+
+
+def planted_puzzle(size: int, extra_words: int, seed: int = 0):
+    """
+    Builds an empty verified puzzle, and a word list holding the entries of a grid of random letters
+    among random words
+    :return: the puzzle, the word list and the grid of random letters
+    """
+
+    rng = random.Random(seed)
+    cells = np.array([[rng.random() >= 0.2 for _ in range(size)] for _ in range(size)])
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(cells)
+    crossword_puzzle.verify_and_sync()
+
+    letters = [[rng.choice(string.ascii_uppercase) for _ in range(size)] for _ in range(size)]
+    words = ["".join(letters[row][col] for row, col in crossword_puzzle.get_clue_cells(clue_no, is_across))
+             for clue_no, is_across in crossword_puzzle.get_entries()]
+    words += ["".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, size)))
+              for _ in range(extra_words)]
+    rng.shuffle(words)
+
+    return crossword_puzzle, words, letters
+
+
+def entry_words(crossword_puzzle):
+    return [crossword_puzzle.get_answer_pattern(clue_no, is_across)
+            for clue_no, is_across in crossword_puzzle.get_entries()]
+
+
+def test_fills_every_entry_with_a_listed_word():
+
+    for seed in range(5):
+        crossword_puzzle, words, _ = planted_puzzle(11, 2000, seed)
+
+        stats = CrosswordAutofill(crossword_puzzle, words, allow_duplicates=True).fill(time_limit=30)
+
+        assert stats.solved
+        assert set(entry_words(crossword_puzzle)) <= set(words)
+
+
+def test_keeps_letters_already_in_the_grid():
+
+    crossword_puzzle, words, letters = planted_puzzle(9, 500, seed=1)
+    clue_no, is_across = crossword_puzzle.get_entries()[0]
+    cells = crossword_puzzle.get_clue_cells(clue_no, is_across)
+    for row, col in cells:
+        crossword_puzzle.fill_cell(row, col, letters[row][col])
+
+    stats = CrosswordAutofill(crossword_puzzle, words, allow_duplicates=True).fill(time_limit=30)
+
+    assert stats.solved
+    assert crossword_puzzle.get_answer_pattern(clue_no, is_across) == "".join(letters[row][col] for row, col in cells)
+    assert set(entry_words(crossword_puzzle)) <= set(words)
+
+
+def test_leaves_the_grid_alone_without_a_fill():
+
+    crossword_puzzle, words, _ = planted_puzzle(9, 500, seed=2)
+    longest = max(len(word) for word in entry_words(crossword_puzzle))
+    words = [word for word in words if len(word) != longest]
+
+    stats = CrosswordAutofill(crossword_puzzle, words, allow_duplicates=True).fill(time_limit=30)
+
+    assert not stats.solved and not stats.budget_exhausted
+    assert set("".join(entry_words(crossword_puzzle))) == {"?"}
+
+
+def test_fill_is_undone_in_one_step():
+
+    crossword_puzzle, words, _ = planted_puzzle(9, 500, seed=3)
+
+    stats = CrosswordAutofill(crossword_puzzle, words, allow_duplicates=True).fill(time_limit=30)
+
+    assert stats.solved
+    crossword_puzzle.undo()
+    assert set("".join(entry_words(crossword_puzzle))) == {"?"}
+
+
+def test_does_not_repeat_a_word_already_in_the_grid():
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(np.ones((2, 2), dtype=bool))
+    crossword_puzzle.verify_and_sync()
+    crossword_puzzle.solve_clues([(1, True, "AB")])
+
+    # 3 across could be AB or CD, but AB is already 1 across
+    stats = CrosswordAutofill(crossword_puzzle, ["AB", "AA", "BB", "AC", "BD", "CD"]).fill(time_limit=30)
+
+    assert stats.solved
+    assert crossword_puzzle.get_answer_pattern(3, True) == "CD"
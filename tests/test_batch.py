@@ -0,0 +1,64 @@
+import os
+import time
+
+import batch_to_crossword
+from batch_to_crossword import CrosswordBatchProcessor
+
+
+def job(puzzle_name: str, behaviour: str):
+    """
+    Stands in for digitising a puzzle: "ok" succeeds, "fail" raises, "crash" ends the worker process
+    and "hang" never finishes
+    """
+
+    batch_to_crossword._report_start(puzzle_name)
+
+    if behaviour == "fail":
+        raise ValueError("Unreadable grid")
+    if behaviour == "crash":
+        os._exit(1)
+    if behaviour == "hang":
+        time.sleep(600)
+
+    return {"puzzle": puzzle_name, "status": "ok"}
+
+
+def run(behaviours: dict, **kwargs):
+    jobs = {puzzle_name: (puzzle_name, behaviour) for puzzle_name, behaviour in behaviours.items()}
+    results = list(CrosswordBatchProcessor.run_isolated(job, jobs, max_workers=2, **kwargs))
+
+    assert sorted(result["puzzle"] for result in results) == sorted(behaviours)
+
+    return {result["puzzle"]: result for result in results}
+
+
+def test_every_puzzle_gets_a_result():
+
+    results = run({"1": "ok", "2": "fail", "3": "ok"})
+
+    assert results["1"]["status"] == results["3"]["status"] == "ok"
+    assert results["2"]["error"]["type"] == "ValueError"
+
+
+def test_a_crashing_puzzle_only_fails_itself():
+
+    behaviours = {str(number): "ok" for number in range(8)}
+    behaviours["3"] = "crash"
+
+    results = run(behaviours)
+
+    assert results["3"]["error"]["type"] == "BrokenProcessPool"
+    assert all(result["status"] == "ok" for puzzle_name, result in results.items() if puzzle_name != "3")
+
+
+def test_a_hanging_puzzle_times_out():
+
+    behaviours = {str(number): "ok" for number in range(6)}
+    behaviours["2"] = "hang"
+
+    start = time.monotonic()
+    results = run(behaviours, timeout=1)
+
+    assert time.monotonic() - start < 30
+    assert results["2"]["error"]["type"] == "TimeoutError"
+    assert all(result["status"] == "ok" for puzzle_name, result in results.items() if puzzle_name != "2")
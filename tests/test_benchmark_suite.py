@@ -0,0 +1,21 @@
+from benchmarks.suite import compare
+
+
+def medians(**times):
+    return {name: {"median": median} for name, median in times.items()}
+
+
+def test_only_slowdowns_past_the_threshold_regress():
+
+    baseline = medians(parse=0.010, verify=0.020)
+    results = medians(parse=0.012, verify=0.030, solve=0.005)
+
+    assert compare(results, baseline, threshold=1.25) == ["verify"]
+
+
+def test_times_below_the_minimum_are_not_compared():
+
+    baseline = medians(tiny=0.0002, grows=0.0008, slow=0.010)
+    results = medians(tiny=0.0006, grows=0.0050, slow=0.020)
+
+    assert compare(results, baseline, threshold=1.25, min_time=0.001) == ["grows", "slow"]
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+import main
+from crossword_puzzle.archive import PuzzleArchive, PuzzleArchiveWriter
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+
+
+def ringed_puzzle():
+    """
+    Builds a verified 3x3 puzzle with a black centre cell: 1 and 3 across, 1 and 2 down
+    """
+
+    white = np.ones((3, 3), dtype=bool)
+    white[1, 1] = False
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(white)
+    crossword_puzzle.add_clue(1, True, "Feline", [3])
+    crossword_puzzle.add_clue(3, True, "Crème brûlée, e.g.", [1, 2])
+    crossword_puzzle.add_clue(1, False, "Bovine", [3])
+    crossword_puzzle.add_clue(2, False, "Gone by", [3])
+    crossword_puzzle.verify_and_sync()
+
+    return crossword_puzzle
+
+
+def test_round_trip():
+
+    crossword_puzzle = ringed_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    crossword_puzzle.solve_clue(1, False, "COW")
+
+    copy = CrosswordPuzzle.from_bytes(crossword_puzzle.to_bytes())
+
+    assert copy.to_dict() == crossword_puzzle.to_dict()
+    assert copy.get_cell(2, 0) == "W"
+
+
+@pytest.mark.parametrize("clue_text, answer_len, message", [
+    ("x" * 0x10000, [3], "65536 bytes"),
+    ("Long", [1] * 256, "256 words"),
+    ("Long", [0x10000], "word length"),
+], ids=["text", "word count", "word length"])
+def test_clues_too_long_to_store_are_named(clue_text, answer_len, message):
+
+    crossword_puzzle = ringed_puzzle()
+    crossword_puzzle.remove_clue(2, False)
+    crossword_puzzle.add_clue(2, False, clue_text, answer_len)
+
+    with pytest.raises(ValueError, match=f"2 DOWN.*{message}"):
+        crossword_puzzle.to_bytes()
+
+
+def test_letters_in_black_cells_are_rejected():
+
+    data = bytearray(ringed_puzzle().to_bytes())
+
+    # Mark the black centre cell as filled (the fifth bit of the filled-cell mask) and give it a letter
+    data[10] |= 0x80 >> 4
+    data[12:12] = b"X"
+
+    with pytest.raises(ValueError, match="black cells"):
+        CrosswordPuzzle.from_bytes(bytes(data))
+
+
+def test_truncated_data_is_rejected():
+
+    crossword_puzzle = ringed_puzzle()
+    crossword_puzzle.solve_clue(1, True, "CAT")
+    data = crossword_puzzle.to_bytes()
+
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            CrosswordPuzzle.from_bytes(data[:size])
+
+
+@pytest.mark.parametrize("code", [0, 1, ord("a"), ord("3"), 0xFF], ids=["black", "empty", "lowercase", "digit", "ÿ"])
+def test_filled_cells_must_hold_letters(code):
+
+    crossword_puzzle = ringed_puzzle()
+    crossword_puzzle.fill_cell(0, 0, "C")
+    data = bytearray(crossword_puzzle.to_bytes())
+
+    # The only filled cell's letter follows the header and the two cell masks
+    assert data[12] == ord("C")
+    data[12] = code
+
+    with pytest.raises(ValueError, match="aren't letters"):
+        CrosswordPuzzle.from_bytes(bytes(data))
+
+
+def test_corrupt_clue_text_is_rejected():
+
+    data = bytearray(ringed_puzzle().to_bytes())
+    data[data.index(b"Feline")] = 0xFF
+
+    with pytest.raises(ValueError, match="UTF-8"):
+        CrosswordPuzzle.from_bytes(bytes(data))
+
+
+def write_archive(path, puzzle_count: int = 2):
+
+    with PuzzleArchiveWriter(str(path)) as writer:
+        for _ in range(puzzle_count):
+            writer.add(ringed_puzzle())
+
+    return path.read_bytes()
+
+
+def test_archive_round_trip(tmp_path):
+
+    write_archive(tmp_path / "puzzles.xwpa")
+
+    with PuzzleArchive(str(tmp_path / "puzzles.xwpa")) as archive:
+        assert [puzzle.to_dict() for puzzle in archive] == [ringed_puzzle().to_dict()] * 2
+
+
+@pytest.mark.parametrize("damage, message", [
+    (lambda data: b"", "not a puzzle archive"),
+    (lambda data: data[:10], "not a puzzle archive"),
+    (lambda data: data[:-4], "truncated"),
+    (lambda data: data[:-16] + (10).to_bytes(8, "little") + data[-8:], "corrupt"),
+], ids=["empty", "short header", "truncated index", "corrupt index"])
+def test_damaged_archives_are_rejected(tmp_path, damage, message):
+
+    path = tmp_path / "puzzles.xwpa"
+    path.write_bytes(damage(write_archive(path)))
+
+    with pytest.raises(ValueError, match=message):
+        PuzzleArchive(str(path))
+
+
+def test_verify_reports_damaged_archives(tmp_path, capsys):
+
+    path = tmp_path / "puzzles.xwpa"
+    path.write_bytes(write_archive(path)[:10])
+
+    assert main.main(["verify", str(path)]) == 1
+    assert "not a puzzle archive" in capsys.readouterr().out
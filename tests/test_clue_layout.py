@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from clue_layout import ClueLayoutParser, UnreadableCluesError
+from image_to_crossword import CrosswordImageProcessor
+from ocr_backends import parse_tsv
+
+# Tesseract's TSV header, and the size in pixels of the characters and lines in tsv()
+_TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+_CHAR_WIDTH, _LINE_HEIGHT = 12, 30
+
+
+def tsv(lines, confidence: float = 95):
+    """
+    Builds the TSV output Tesseract would give for lines of text, with a character of indentation for each
+    leading space
+    """
+
+    rows = [_TSV_HEADER]
+
+    for line_no, line in enumerate(lines, 1):
+        left = 10 + _CHAR_WIDTH * (len(line) - len(line.lstrip()))
+        for word_no, text in enumerate(line.split(), 1):
+            width = _CHAR_WIDTH * len(text)
+            rows.append(f"5\t1\t1\t1\t{line_no}\t{word_no}\t{left}\t{_LINE_HEIGHT * line_no}\t{width}\t20\t"
+                        f"{confidence}\t{text}")
+            left += width + _CHAR_WIDTH
+
+    return "\n".join(rows)
+
+
+def parse(lines):
+    return [(entry.clue_no, entry.text, entry.answer_len) for entry in ClueLayoutParser.parse(parse_tsv(tsv(lines)))]
+
+
+def read_clues(page, rereads):
+    """
+    Runs CrosswordImageProcessor.clue_reader() on a blank page, answering the first OCR request with the page's
+    lines and each one after with the next lines from rereads
+    :return: the clues read, and the (image, page segmentation mode) pairs the reader asked to have read
+    """
+
+    reader = CrosswordImageProcessor.clue_reader(np.full((400, 600, 3), 255, dtype=np.uint8), True)
+    requests = [next(reader)]
+    answers = iter([page] + list(rereads))
+
+    try:
+        while True:
+            requests.append(reader.send(tsv(next(answers))))
+    except StopIteration as stop:
+        return stop.value, requests
+
+
+def test_clue_numbers_run_into_the_text_are_found():
+
+    assert parse(["Across", "1 Feline (3)", "12.Flower in bloom (4)", "13:Gone by (3)"]) == [
+        (1, "Feline", [3]),
+        (12, "Flower in bloom", [4]),
+        (13, "Gone by", [3])
+    ]
+
+
+def test_numbers_starting_a_continuation_line_stay_in_the_clue():
+
+    assert parse(["2 Long clue running", "   3D film (5)", "4 Short (2)"]) == [
+        (2, "Long clue running 3D film", [5]),
+        (4, "Short", [2])
+    ]
+
+
+def test_unreadable_clues_are_reported_with_the_clues_read():
+
+    page = ["1 Feline (3)", "2 Gone by", "3 Bovine (3)"]
+
+    with pytest.raises(UnreadableCluesError, match="1 across clue.*2 Gone by") as error:
+        read_clues(page, [["2 Gone by"]] * len(CrosswordImageProcessor.REOCR_ATTEMPTS))
+
+    assert [entry.clue_no for entry in error.value.entries] == [2]
+    assert error.value.clues == [(1, "Feline", [3]), (3, "Bovine", [3])]
+
+
+def test_unreadable_clue_is_read_again_from_its_crop():
+
+    clues, requests = read_clues(["1 Feline (3)", "2 Gone by", "3 Bovine (3)"], [["2 Gone by (3)"]])
+
+    assert clues == [(1, "Feline", [3]), (2, "Gone by", [3]), (3, "Bovine", [3])]
+
+    # The page, then the crop of clue 2 down to where clue 3 starts, with a margin around it
+    margin = CrosswordImageProcessor.REOCR_MARGIN
+    assert [psm for _, psm in requests] == [6, 6]
+    assert requests[1][0].shape[:2] == (_LINE_HEIGHT + margin // 2 + 2 * margin, 600 + 2 * margin)
+
+
+def test_crop_read_again_can_hold_more_than_one_clue():
+
+    # The first attempt reads a different clue, so the next page segmentation mode is tried
+    clues, requests = read_clues(["1 Feline (3)", "2 Gone by (3) 3 Bovine (3)"],
+                                 [["5 Wrong (3)"], ["2 Gone by (3)", "3 Bovine (3)"]])
+
+    assert clues == [(1, "Feline", [3]), (2, "Gone by", [3]), (3, "Bovine", [3])]
+    assert [psm for _, psm in requests] == [6, 6, 4]
+
+
+def test_consecutive_unreadable_clues_are_cropped_to_the_page():
+
+    # Clue 3 is read again first, and its new entries have the coordinates of its crop, so clue 2's crop
+    # must still end where clue 3 starts on the page
+    page = ["1 Feline (3)", "2 Gone by", "   and past", "3 Bovine", "4 Consumed (3)"]
+    clues, requests = read_clues(page, [["3 Bovine (3)"], ["2 Gone by", "   and past (3)"]])
+
+    assert clues == [(1, "Feline", [3]), (2, "Gone by and past", [3]), (3, "Bovine", [3]), (4, "Consumed", [3])]
+
+    margin = CrosswordImageProcessor.REOCR_MARGIN
+    assert requests[2][0].shape[0] == 2 * _LINE_HEIGHT + margin // 2 + 2 * margin
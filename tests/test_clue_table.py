@@ -0,0 +1,15 @@
+from crossword_puzzle.clue_table import ClueTable
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+
+
+def test_keeps_clue_numbers_above_65535():
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.add_clue(70000, True, "Giant puzzle", [5])
+    crossword_puzzle.add_clue(3, False, "Small one", [2, 3])
+
+    table = ClueTable.from_puzzles([crossword_puzzle])
+
+    assert sorted(table.clue_nos.tolist()) == [3, 70000]
+    assert sorted(zip(table.clue_nos.tolist(), map(table.text, range(len(table))))) == \
+           [(3, "Small one"), (70000, "Giant puzzle")]
@@ -0,0 +1,47 @@
+import sys
+import types
+
+import pytest
+
+from ocr_backends import TesseractPoolBackend, TesseractSubprocessBackend, create_ocr_backend
+
+
+def stub_tesserocr(monkeypatch, working_engines: int):
+    """
+    Installs a stand-in for tesserocr whose engines fail to start after the first working_engines,
+    as tesserocr's do when the language data is missing
+    :return: list of the engines that started, which record whether they were ended
+    """
+
+    started = []
+
+    class PyTessBaseAPI:
+
+        def __init__(self, lang: str, path: str = None):
+            if len(started) >= working_engines:
+                raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+            self.ended = False
+            started.append(self)
+
+        def End(self):
+            self.ended = True
+
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=PyTessBaseAPI))
+
+    return started
+
+
+@pytest.mark.parametrize("working_engines", [0, 1])
+def test_falls_back_to_the_executable_when_engines_fail_to_start(monkeypatch, working_engines):
+
+    started = stub_tesserocr(monkeypatch, working_engines)
+
+    assert isinstance(create_ocr_backend("tesseract", pool_size=2), TesseractSubprocessBackend)
+    assert all(engine.ended for engine in started)
+
+
+def test_uses_a_pool_when_engines_start(monkeypatch):
+
+    stub_tesserocr(monkeypatch, 2)
+
+    assert isinstance(create_ocr_backend("tesseract", pool_size=2), TesseractPoolBackend)
@@ -0,0 +1,120 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from ocr_backends import OcrBackend, create_ocr_backend, get_shared_ocr_backend
+from ocr_cache import CachedOcrBackend, OcrCache
+
+# TSV output with the Windows line endings Tesseract writes on some platforms, which must come back unchanged
+_TSV = "level\tpage_num\r\n5\t1\tword\r\n"
+
+
+class CountingBackend(OcrBackend):
+    """
+    Backend that records the images it's asked to read, returning the same output for each
+    """
+
+    def __init__(self, version: str = "tesseract 5.3.0"):
+        self._version = version
+        self.calls = []
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def image_to_string(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        self.calls.append(("image_to_string", psm))
+        return "text\r\n"
+
+    def image_to_data(self, img, lang: str = 'eng', psm: int = 6) -> str:
+        self.calls.append(("image_to_data", psm))
+        return _TSV
+
+
+def image(value: int = 255):
+    return np.full((20, 30), value, dtype=np.uint8)
+
+
+def test_repeated_reads_are_served_from_the_cache(tmp_path):
+
+    backend = CountingBackend()
+    cached = CachedOcrBackend(backend, OcrCache(str(tmp_path)))
+
+    assert cached.image_to_data(image()) == _TSV
+    assert cached.image_to_data(image()) == _TSV
+    assert cached.image_to_string(image()) == "text\r\n"
+
+    assert backend.calls == [("image_to_data", 6), ("image_to_string", 6)]
+    assert cached.cache.stats()["hits"] == 1
+    assert cached.cache.stats()["misses"] == 2
+
+
+def test_cache_persists_between_instances(tmp_path):
+
+    CachedOcrBackend(CountingBackend(), OcrCache(str(tmp_path))).image_to_data(image())
+
+    backend = CountingBackend()
+    assert CachedOcrBackend(backend, OcrCache(str(tmp_path))).image_to_data(image()) == _TSV
+    assert backend.calls == []
+
+
+@pytest.mark.parametrize("changed", [
+    dict(img=image(0)),
+    dict(psm=4),
+    dict(lang="fra"),
+    dict(engine_version="tesseract 5.4.0"),
+    dict(method="image_to_string"),
+])
+def test_key_depends_on_everything_that_affects_the_result(changed):
+
+    arguments = dict(img=image(), method="image_to_data", lang="eng", psm=6, engine_version="tesseract 5.3.0")
+
+    assert OcrCache.make_key(**arguments) == OcrCache.make_key(**dict(arguments))
+    assert OcrCache.make_key(**arguments) != OcrCache.make_key(**{**arguments, **changed})
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+
+    cache = OcrCache(str(tmp_path), max_bytes=10)
+
+    cache.put("a" * 64, "1234")
+    cache.put("b" * 64, "1234")
+    assert cache.get("a" * 64) == "1234"
+
+    # Storing a third result evicts "b", which was used least recently
+    cache.put("c" * 64, "1234")
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) == "1234"
+    assert cache.get("c" * 64) == "1234"
+    assert cache.stats()["bytes"] == 8
+
+
+def test_stale_temporary_files_are_removed(tmp_path):
+
+    stale = tmp_path / "ab" / "interrupted.tmp"
+    recent = tmp_path / "ab" / "writing.tmp"
+    stale.parent.mkdir()
+    stale.write_bytes(b"partial")
+    recent.write_bytes(b"partial")
+
+    an_hour_ago = time.time() - OcrCache.STALE_TEMP_SECONDS - 1
+    os.utime(stale, (an_hour_ago, an_hour_ago))
+
+    OcrCache(str(tmp_path))
+
+    assert not stale.exists()
+    assert recent.exists()
+
+
+def test_backends_are_created_with_a_cache(tmp_path):
+
+    assert isinstance(create_ocr_backend("tesseract", cache_dir=str(tmp_path)), CachedOcrBackend)
+    assert not isinstance(create_ocr_backend("tesseract"), CachedOcrBackend)
+
+    shared = get_shared_ocr_backend("tesseract", str(tmp_path))
+    assert isinstance(shared, CachedOcrBackend)
+    assert get_shared_ocr_backend("tesseract", str(tmp_path)) is shared
+    assert get_shared_ocr_backend("tesseract") is not shared
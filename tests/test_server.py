@@ -0,0 +1,160 @@
+import http.client
+import json
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+from crossword_server import CrosswordServer
+
+
+
+def puzzle_json():
+    """
+    JSON of a verified 3x3 puzzle with a black centre cell
+    """
+
+    white = np.ones((3, 3), dtype=bool)
+    white[1, 1] = False
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(white)
+    for clue_no, is_across, clue_text in ((1, True, "Feline"), (3, True, "Gone by"), (1, False, "Bovine"),
+                                          (2, False, "Consumed")):
+        crossword_puzzle.add_clue(clue_no, is_across, clue_text, [3])
+    crossword_puzzle.verify_and_sync()
+
+    return json.dumps(crossword_puzzle.to_dict())
+
+
+_PUZZLE_JSON = puzzle_json()
+
+
+class WorkerExit:
+    """
+    A payload that ends the worker process that unpickles it, as if it had crashed
+    """
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+@pytest.fixture
+def server():
+
+    crossword_server = CrosswordServer(port=0, workers=1, batch_delay=0)
+    thread = threading.Thread(target=crossword_server.serve_forever, daemon=True)
+    thread.start()
+
+    yield crossword_server
+
+    crossword_server.shutdown()
+
+
+def hold_dispatcher(server):
+    """
+    Keeps the only worker busy and has the dispatcher take an image request, which is sent to a worker on its
+    own, so that the requests submitted next wait in the queue until the worker is released
+    :return: Future of the image request, which fails as its images are empty
+    """
+
+    server._busy_workers.acquire()
+
+    return server.submit("images", (b"", b"", b"", None, None))
+
+
+def post(server, headers: dict, body: bytes = b""):
+
+    connection = http.client.HTTPConnection(*server.address, timeout=10)
+    connection.putrequest("POST", "/puzzles/json")
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders()
+    connection.send(body)
+
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+
+    return result
+
+
+@pytest.mark.parametrize("content_length", ["many", "-1"])
+def test_invalid_content_length_is_rejected(server, content_length):
+
+    status, body = post(server, {"Content-Length": content_length})
+
+    assert status == 400
+    assert "Content-Length" in body["error"]
+
+
+def test_puzzle_is_digitised(server):
+
+    body = _PUZZLE_JSON.encode()
+    status, result = post(server, {"Content-Length": str(len(body))}, body)
+
+    assert status == 200
+    assert result["crossword"]["across"]["1"]["clue"] == "Feline"
+
+
+def test_cancelled_requests_are_not_run(server):
+
+    first = hold_dispatcher(server)
+    cancelled = server.submit("json", _PUZZLE_JSON)
+    last = server.submit("json", _PUZZLE_JSON)
+
+    assert cancelled.cancel()
+    server._busy_workers.release()
+
+    assert first.result(timeout=30)["status"] == "error"
+    assert last.result(timeout=30)["status"] == "ok"
+    assert cancelled.cancelled()
+
+
+def test_shutdown_answers_queued_requests(server):
+
+    first = hold_dispatcher(server)
+    queued = [server.submit("json", _PUZZLE_JSON) for _ in range(3)]
+
+    shutdown = threading.Thread(target=server.shutdown)
+    shutdown.start()
+
+    for future in queued:
+        with pytest.raises(Exception, match="shutting down"):
+            future.result(timeout=10)
+
+    with pytest.raises(Exception, match="shutting down"):
+        server.submit("json", _PUZZLE_JSON).result(timeout=10)
+
+    # The request already taken by the dispatcher still runs
+    server._busy_workers.release()
+    assert first.result(timeout=30)["status"] == "error"
+
+    shutdown.join()
+
+
+def test_pool_is_replaced_when_a_worker_dies(server):
+
+    # The batch kills a worker on each attempt, so it fails once it has had them all
+    with pytest.raises(BrokenProcessPool):
+        server.submit("json", WorkerExit()).result(timeout=30)
+
+    health = server.health()
+    assert health["status"] == "degraded"
+    assert health["worker_failures"] == CrosswordServer.BATCH_ATTEMPTS
+
+    assert server.submit("json", _PUZZLE_JSON).result(timeout=30)["status"] == "ok"
+
+
+def test_shutdown_without_serving():
+
+    crossword_server = CrosswordServer(port=0, workers=1)
+
+    shutdown = threading.Thread(target=crossword_server.shutdown, daemon=True)
+    shutdown.start()
+    shutdown.join(timeout=30)
+
+    assert not shutdown.is_alive()
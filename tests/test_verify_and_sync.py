@@ -0,0 +1,133 @@
+import random
+
+import numpy as np
+import pytest
+
+from crossword_puzzle.crossword_puzzle import CrosswordPuzzle
+from crossword_puzzle.exceptions import GridVerificationError
+from crossword_puzzle.slots import find_slots
+
+
+def puzzle_from(cells, clues):
+    """
+    Builds an unverified puzzle
+    :param cells: 2D boolean NumPy array, True for white cells
+    :param clues: map of (clue number, is_across) to answer length
+    """
+
+    crossword_puzzle = CrosswordPuzzle()
+    crossword_puzzle.load_grid(cells)
+
+    for (clue_no, is_across), length in clues.items():
+        crossword_puzzle.add_clue(clue_no, is_across, f"Clue {clue_no}", [length])
+
+    return crossword_puzzle
+
+
+def slot_clues(cells):
+    """
+    Gets a clue for every slot in a grid
+    :return: map of (clue number, is_across) to answer length
+    """
+
+    across_metadata, down_metadata = find_slots(cells.astype(np.uint8))
+
+    return {**{(clue_no, True): metadata.length for clue_no, metadata in across_metadata.items()},
+            **{(clue_no, False): metadata.length for clue_no, metadata in down_metadata.items()}}
+
+
+def verifies(crossword_puzzle):
+    try:
+        crossword_puzzle.verify_and_sync()
+    except GridVerificationError:
+        return False
+    return True
+
+
+def edit_clues(crossword_puzzle, clues, cells, rng):
+    """
+    Changes some of a puzzle's clues: either to match every slot of the grid, or by removing, adding or
+    lengthening a few, or not at all
+    """
+
+    choice = rng.random()
+
+    if choice < 0.4:
+        target = slot_clues(cells)
+    elif choice < 0.7:
+        target = dict(clues)
+        for key in rng.sample(sorted(target), min(2, len(target))):
+            if rng.random() < 0.5:
+                del target[key]
+            else:
+                target[key] += 1
+        target[(rng.randint(1, 40), rng.random() < 0.5)] = rng.randint(2, 9)
+    else:
+        return
+
+    for key in [key for key in clues if clues[key] != target.get(key)]:
+        crossword_puzzle.remove_clue(*key)
+        del clues[key]
+
+    for key, length in target.items():
+        if key not in clues:
+            crossword_puzzle.add_clue(key[0], key[1], f"Clue {key[0]}", [length])
+            clues[key] = length
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_verification_matches_full(seed):
+    """
+    Flipping cells and editing clues between verifications gives the same result as verifying a fresh
+    puzzle with the same grid and clues every time
+    """
+
+    rng = random.Random(seed)
+    size = rng.randint(5, 13)
+    cells = np.array([[rng.random() >= 0.2 for _ in range(size)] for _ in range(size)])
+    clues = slot_clues(cells)
+
+    crossword_puzzle = puzzle_from(cells, clues)
+    crossword_puzzle.verify_and_sync()
+
+    for _ in range(300):
+
+        for _ in range(rng.choice((1, 1, 1, 2, 3))):
+            row, col = rng.randrange(size), rng.randrange(size)
+            if cells[row, col]:
+                crossword_puzzle.turn_cell_black(row, col)
+            else:
+                crossword_puzzle.turn_cell_white(row, col)
+            cells[row, col] = not cells[row, col]
+
+        edit_clues(crossword_puzzle, clues, cells, rng)
+
+        full_puzzle = puzzle_from(cells, clues)
+        verified = verifies(full_puzzle)
+
+        assert verifies(crossword_puzzle) == verified
+
+        if verified:
+            assert crossword_puzzle.get_entries() == full_puzzle.get_entries()
+            for clue_no, is_across, clue in full_puzzle.get_clues():
+                assert crossword_puzzle.get_clue(clue_no, is_across).pos == clue.pos
+                assert crossword_puzzle.get_clue_cells(clue_no, is_across) == \
+                    full_puzzle.get_clue_cells(clue_no, is_across)
+
+
+def test_failed_verification_is_retried():
+    """
+    Clues found to be wrong are checked again at the next verification, even with no changes in between
+    """
+
+    cells = np.ones((3, 3), dtype=bool)
+    crossword_puzzle = puzzle_from(cells, slot_clues(cells))
+    crossword_puzzle.verify_and_sync()
+
+    crossword_puzzle.turn_cell_black(0, 1)
+
+    with pytest.raises(GridVerificationError):
+        crossword_puzzle.verify_and_sync()
+
+    with pytest.raises(GridVerificationError):
+        crossword_puzzle.verify_and_sync()